@@ -2,7 +2,7 @@ from fastapi import APIRouter
 
 from app.api.v1.endpoints import (
     health, auth, users, integrations, teams, projects, goals, map, briefings, insights,
-    notes, notifications, organizations
+    notes, notifications, organizations, jobs, search, calendar
 )
 
 api_router = APIRouter()
@@ -19,7 +19,10 @@ api_router.include_router(projects.router, prefix="/projects", tags=["projects"]
 api_router.include_router(goals.router, prefix="/goals", tags=["goals"])
 api_router.include_router(map.router, prefix="/map", tags=["map"])
 api_router.include_router(briefings.router, prefix="/briefings", tags=["briefings"])
+api_router.include_router(calendar.router, prefix="/calendar", tags=["calendar"])
 api_router.include_router(insights.router, prefix="/insights", tags=["insights"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(notes.router, prefix="/notes", tags=["notes"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
 api_router.include_router(organizations.router, prefix="/organizations", tags=["organizations"])
\ No newline at end of file
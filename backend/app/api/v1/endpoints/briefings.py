@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.crud_user import user as crud_user
 from app.services.briefing_service import briefing_service
+from app.services.entity_recognition_service import entity_recognition_service
 from app import models, schemas
 from app.core import security
 from app.db.session import get_db_session
@@ -23,4 +24,18 @@ async def get_daily_briefing(
     return schemas.BriefingResponse(
         summary=summary,
         highlighted_summary=highlighted_summary
-    )
\ No newline at end of file
+    )
+
+@router.post("/highlight", response_model=schemas.HighlightTextsResponse)
+async def highlight_texts(
+    request: schemas.HighlightTextsRequest,
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+):
+    """
+    Highlight entities in several texts at once (e.g. briefing sections or a page of notes).
+
+    Returns one list of highlighted segments per text, in request order.
+    """
+    results = await entity_recognition_service.process_texts(request.texts, db, current_user)
+    return schemas.HighlightTextsResponse(results=results)
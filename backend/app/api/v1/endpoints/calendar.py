@@ -1,46 +1,20 @@
 """API endpoints for calendar data."""
 
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Dict, Any
-from uuid import UUID
+from typing import List, Optional, Dict, Any, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db_session, get_current_active_user
 from app.models.user import User
-from app.schemas.calendar import CalendarEvent
-from app.services.google_calendar import get_google_calendar_service, get_todays_calendar_events as get_google_todays_events
-from app.services.microsoft_outlook_service import get_microsoft_outlook_service, get_todays_calendar_events as get_microsoft_todays_events
-from app.services.microsoft_outlook_service import get_calendar_events_range as get_microsoft_events_range
-from app.services.briefing_service import BriefingService
+from app.schemas.calendar import CalendarEvent, CalendarEventsResponse, CalendarSourceStatus
+from app.services.briefing_service import briefing_service, end_of_day
+from app.services.calendar_sync_service import calendar_sources, calendar_sync_service, merge_events
 
 router = APIRouter()
 
 
-async def _get_available_calendar_sources(user: User) -> List[str]:
-    """
-    Determine which calendar sources are available for the user.
-    
-    Args:
-        user: User model with potential calendar tokens
-        
-    Returns:
-        List of available sources in order of preference
-    """
-    sources = []
-    
-    # Check for Google Calendar credentials
-    if user.google_access_token and user.google_refresh_token:
-        sources.append("google")
-        
-    # Check for Microsoft Outlook credentials
-    if user.microsoft_access_token and user.microsoft_refresh_token:
-        sources.append("microsoft")
-    
-    return sources
-
-
 async def _normalize_google_event(event: Dict[str, Any]) -> CalendarEvent:
     """Normalize a Google Calendar event to our schema."""
     # Extract start and end times
@@ -128,20 +102,10 @@ async def _normalize_microsoft_event(event: Dict[str, Any]) -> CalendarEvent:
     )
 
 
-@router.get("/events/today", response_model=List[CalendarEvent])
-async def get_today_events(
-    db: AsyncSession = Depends(get_db_session),
-    current_user: User = Depends(get_current_active_user),
-    source: Optional[str] = Query(None, description="Preferred calendar source (google or microsoft)")
-):
-    """
-    Get today's calendar events.
-    
-    Returns events from the specified source if available, or from any available source.
-    """
-    # Determine available calendar sources
-    available_sources = await _get_available_calendar_sources(current_user)
-    
+def _ordered_sources(user: User, source: Optional[str]) -> List[str]:
+    """Connected calendar sources with the requested one first; 400 if none or not connected."""
+    available_sources = calendar_sources(user)
+
     if not available_sources:
         raise HTTPException(
             status_code=400, 
@@ -156,44 +120,95 @@ async def get_today_events(
         )
     
     # If source is specified and available, use that first
-    if source and source in available_sources:
-        # Move preferred source to the front
+    if source:
         available_sources = [s for s in available_sources if s != source]
         available_sources.insert(0, source)
-    
-    # Try sources in order until one succeeds
+    return available_sources
+
+
+async def _aggregate_events(
+    db: AsyncSession, user: User, start: datetime, end: datetime, sources: List[str]
+) -> CalendarEventsResponse:
+    """
+    Events in [start, end) merged across all sources.
+
+    Ranges within the synced window are read from the local store. Stale
+    sources are synced concurrently, each for at most the inline sync
+    timeout; a source still syncing at the deadline contributes its stored
+    events and is reported as timed out. Ranges outside the window are
+    fetched live from the providers.
+    """
+    pending = await calendar_sync_service.ensure_fresh(db, user.id, sources)
+    states = await calendar_sync_service.get_sync_states(db, user.id)
+    live_errors: Optional[Dict[str, str]] = None
+    if calendar_sync_service.covers(states, sources, start, end):
+        stored = await calendar_sync_service.stored_events(db, user.id, start, end, sources)
+    else:
+        stored, live_errors = await calendar_sync_service.fetch_live(db, user, start, end, sources)
+        pending = set()
+
     events = []
-    for source in available_sources:
-        try:
-            if source == "google":
-                # Try Google Calendar
-                service = await get_google_calendar_service(user=current_user, db=db)
-                if service:
-                    google_events = await get_google_todays_events(service=service)
-                    if google_events:
-                        for event in google_events:
-                            events.append(await _normalize_google_event(event))
-                        break  # Success, no need to try other sources
-            
-            elif source == "microsoft":
-                # Try Microsoft Outlook
-                service = await get_microsoft_outlook_service(user=current_user, db=db)
-                if service:
-                    ms_events = await get_microsoft_todays_events(service)
-                    if ms_events:
-                        for event in ms_events:
-                            events.append(await _normalize_microsoft_event(event))
-                        break  # Success, no need to try other sources
-        
-        except Exception as e:
-            # Log error but continue with next source
-            print(f"Error fetching calendar events from {source}: {e}")
-            continue
-    
-    # Sort by start time
-    events.sort(key=lambda x: x.startTime if x.startTime != "All-day" else "00:00")
+    for event in merge_events(stored, sources):
+        normalize = _normalize_google_event if event.source == "google" else _normalize_microsoft_event
+        events.append(await normalize(event.data))
+
+    statuses = {}
+    for source in sources:
+        state = states.get(source)
+        if live_errors is not None:
+            authenticated = source not in live_errors
+            error_message = live_errors.get(source)
+        else:
+            authenticated = state is not None and state.last_synced_at is not None
+            error_message = state.last_error if state else None
+        statuses[source] = CalendarSourceStatus(
+            connected=True,
+            authenticated=authenticated,
+            errorMessage=error_message,
+            lastSyncTime=state.last_synced_at if state else None,
+            timedOut=source in pending,
+        )
+    complete = all(status.errorMessage is None and not status.timedOut for status in statuses.values())
+    return CalendarEventsResponse(events=events, sources=statuses, complete=complete)
+
+
+def _parse_date_range(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """Parse YYYY-MM-DD dates into [start of start_date, end of end_date) in UTC."""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid date format. Please use YYYY-MM-DD."
+        )
+    return start, end + timedelta(days=1)
+
+
+async def _today(db: AsyncSession, user: User) -> Tuple[datetime, datetime]:
+    """The current day in the tenant's timezone, as used by the daily briefing."""
+    tz = await briefing_service.get_tenant_timezone(db, user.tenant_id)
+    now = datetime.now(timezone.utc)
+    today_start = datetime.combine(now.astimezone(tz).date(), datetime.min.time(), tzinfo=tz)
+    return today_start, end_of_day(now, tz)
+
+
+@router.get("/events/today", response_model=List[CalendarEvent])
+async def get_today_events(
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_active_user),
+    source: Optional[str] = Query(None, description="Preferred calendar source (google or microsoft)")
+):
+    """
+    Get today's calendar events.
     
-    return events
+    Returns events from all connected sources, merged and ordered by start time; an event
+    present in several calendars is returned once, from the preferred source.
+    Events are served from the local calendar store (see CalendarSyncService).
+    """
+    sources = _ordered_sources(current_user, source)
+    start, end = await _today(db, current_user)
+    return (await _aggregate_events(db, current_user, start, end, sources)).events
 
 
 @router.get("/events/range", response_model=List[CalendarEvent])
@@ -213,77 +228,35 @@ async def get_events_range(
         source: Optional preferred calendar source
     
     Returns:
-        List of calendar events in the specified date range
+        List of calendar events in the specified date range from all connected sources,
+        served from the local calendar store, which covers CALENDAR_SYNC_PAST_DAYS back
+        and CALENDAR_SYNC_FUTURE_DAYS ahead; ranges outside it are fetched live
     """
-    # Validate date format
-    try:
-        start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-        end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-        end = end.replace(hour=23, minute=59, second=59)  # End of day
-    except ValueError:
-        raise HTTPException(
-            status_code=400, 
-            detail="Invalid date format. Please use YYYY-MM-DD."
-        )
-    
-    # Determine available calendar sources
-    available_sources = await _get_available_calendar_sources(current_user)
-    
-    if not available_sources:
-        raise HTTPException(
-            status_code=400, 
-            detail="No calendar provider configured. Please connect to Google Calendar or Microsoft Outlook."
-        )
-    
-    # If source is specified, check if it's available
-    if source and source not in available_sources:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Calendar source '{source}' not available for this user. Available sources: {', '.join(available_sources)}"
-        )
-    
-    # If source is specified and available, use that first
-    if source and source in available_sources:
-        # Move preferred source to the front
-        available_sources = [s for s in available_sources if s != source]
-        available_sources.insert(0, source)
-    
-    # Try sources in order until one succeeds
-    events = []
-    for source in available_sources:
-        try:
-            if source == "google":
-                # Currently Google API doesn't have a separate range method implemented
-                # We would add this functionality in the google_calendar.py service
-                # For now, just get today's events
-                service = await get_google_calendar_service(user=current_user, db=db)
-                if service:
-                    # This would be replaced with a proper date range function
-                    google_events = await get_google_todays_events(service=service)
-                    if google_events:
-                        for event in google_events:
-                            events.append(await _normalize_google_event(event))
-                        break  # Success, no need to try other sources
-            
-            elif source == "microsoft":
-                # Microsoft has a proper date range function
-                service = await get_microsoft_outlook_service(user=current_user, db=db)
-                if service:
-                    ms_events = await get_microsoft_events_range(service, start, end)
-                    if ms_events:
-                        for event in ms_events:
-                            events.append(await _normalize_microsoft_event(event))
-                        break  # Success, no need to try other sources
-        
-        except Exception as e:
-            # Log error but continue with next source
-            print(f"Error fetching calendar events from {source}: {e}")
-            continue
-    
-    # Sort by start time
-    events.sort(key=lambda x: x.startTime if x.startTime != "All-day" else "00:00")
-    
-    return events
+    start, end = _parse_date_range(start_date, end_date)
+    sources = _ordered_sources(current_user, source)
+    return (await _aggregate_events(db, current_user, start, end, sources)).events
+
+
+@router.get("/events", response_model=CalendarEventsResponse)
+async def get_events_with_status(
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD); defaults to today"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD); defaults to the start date"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: User = Depends(get_current_active_user),
+    source: Optional[str] = Query(None, description="Preferred calendar source (google or microsoft)")
+):
+    """
+    Get calendar events merged from all connected sources, with the status of each source.
+
+    Returns partial results when a source is slow or failing: its stored events are
+    included, its status says why, and ``complete`` is false.
+    """
+    if start_date:
+        start, end = _parse_date_range(start_date, end_date or start_date)
+    else:
+        start, end = await _today(db, current_user)
+    sources = _ordered_sources(current_user, source)
+    return await _aggregate_events(db, current_user, start, end, sources)
 
 
 @router.get("/sources", response_model=Dict[str, bool])
@@ -295,13 +268,9 @@ async def get_calendar_sources(
     
     Returns a dictionary with source names as keys and boolean values indicating if they're available.
     """
-    # Check for Google Calendar
-    has_google = bool(current_user.google_access_token and current_user.google_refresh_token)
-    
-    # Check for Microsoft Outlook
-    has_microsoft = bool(current_user.microsoft_access_token and current_user.microsoft_refresh_token)
+    available_sources = calendar_sources(current_user)
     
     return {
-        "google": has_google,
-        "microsoft": has_microsoft
+        "google": "google" in available_sources,
+        "microsoft": "microsoft" in available_sources
     }
\ No newline at end of file
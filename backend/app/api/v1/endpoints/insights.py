@@ -1,5 +1,5 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime, timedelta
@@ -11,6 +11,7 @@ from app.crud.crud_goal import goal as crud_goal
 from app import models, schemas
 from app.core import security
 from app.db.session import get_db_session
+from app.services.community_detection import community_service
 from app.services.insight_service import insight_service
 
 router = APIRouter()
@@ -46,6 +47,86 @@ async def get_network_metrics(
     )
     return metrics
 
+@router.get("/betweenness", response_model=Dict)
+async def get_betweenness(
+    epsilon: float = Query(0.05, ge=0.01, le=0.5, description="Maximum absolute error of the normalised scores"),
+    top_k: int = Query(20, ge=1, le=500, description="Number of bridge nodes to return"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict:
+    """
+    Retrieve approximate betweenness centrality for bridge detection.
+    
+    Scores are estimated from a sample of BFS sources; the response reports
+    the number of samples, the error bound (epsilon) and its confidence.
+    """
+    return await insight_service.calculate_betweenness(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        epsilon=epsilon,
+        top_k=top_k
+    )
+
+@router.get("/goal_alignment", response_model=Dict)
+async def get_goal_alignment(
+    top_k: int = Query(3, ge=1, le=20, description="Maximum number of goals per project"),
+    threshold: float = Query(0.1, ge=0.0, lt=1.0, description="Minimum text similarity of a suggested goal"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict:
+    """
+    Suggest strategic goals for projects not yet aligned with one.
+    
+    Project names and descriptions are matched against the tenant's goals
+    by TF-IDF text similarity.
+    """
+    suggestions = await insight_service.suggest_project_goals(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        top_k=top_k,
+        threshold=threshold
+    )
+    return {"suggestions": suggestions}
+
+@router.get("/team_collaborations", response_model=Dict)
+async def get_team_collaborations(
+    top_k: int = Query(5, ge=1, le=50, description="Partners returned per team"),
+    min_shared: int = Query(1, ge=1, description="Minimum number of shared goals"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict:
+    """
+    Find teams working towards the same goals.
+    
+    A team works on a goal when it owns a project aligned with it. Pairs are
+    ranked by the Jaccard similarity of their goal sets.
+    """
+    collaborations = await insight_service.find_team_collaborations(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        top_k=top_k,
+        min_shared=min_shared
+    )
+    return {"collaborations": collaborations}
+
+@router.get("/communities", response_model=Dict)
+async def get_communities(
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict:
+    """
+    Retrieve the community structure of the organization graph.
+    
+    Returns the summary of the last community detection run (count,
+    modularity, largest communities). Community IDs of individual nodes are
+    included in the map graph data.
+    """
+    return await community_service.get_summary(
+        db=db,
+        tenant_id=current_user.tenant_id,
+        compute_if_missing=True
+    )
+
 @router.get("/timeseries/{metric_type}")
 async def get_metric_timeseries(
     metric_type: str,
@@ -59,32 +140,37 @@ async def get_metric_timeseries(
     Retrieve time-series data for network metrics.
     
     Parameters:
-    - metric_type: The type of metric to retrieve (e.g., "density", "centrality", "clustering")
+    - metric_type: The type of metric to retrieve ("node_count", "edge_count", "density",
+      "clustering", "components", "avg_shortest_path", "centralization", "modularity", "activity")
     - start_date: Start date for the time series (ISO format, default: 30 days ago)
     - end_date: End date for the time series (ISO format, default: current date)
-    - interval: Data interval ("hourly", "daily", "weekly", "monthly")
+    - interval: Data interval ("raw", "hourly", "daily", "weekly", "monthly")
     """
-    # Set default dates if not provided
-    if not end_date:
-        end_date = datetime.now().isoformat()
-        
-    if not start_date:
-        start_date = (datetime.fromisoformat(end_date) - timedelta(days=30)).isoformat()
-        
-    data = await insight_service.get_metric_timeseries(
-        db=db,
-        tenant_id=current_user.tenant_id,
-        metric_type=metric_type,
-        start_date=start_date,
-        end_date=end_date,
-        interval=interval
-    )
+    try:
+        # Set default dates if not provided
+        if not end_date:
+            end_date = datetime.now().isoformat()
+
+        if not start_date:
+            start_date = (datetime.fromisoformat(end_date) - timedelta(days=30)).isoformat()
+
+        data = await insight_service.get_metric_timeseries(
+            db=db,
+            tenant_id=current_user.tenant_id,
+            metric_type=metric_type,
+            start_date=start_date,
+            end_date=end_date,
+            interval=interval
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {"timeseries": data}
 
 @router.get("/heatmap/{entity_type}")
 async def get_heatmap_data(
     entity_type: str,
     metric: str = "connections",
+    top_k: int = Query(50, ge=2, le=500, description="Maximum number of entities per axis"),
     db: AsyncSession = Depends(get_db_session),
     current_user: models.User = Depends(security.get_current_user),
 ) -> Dict:
@@ -92,13 +178,17 @@ async def get_heatmap_data(
     Generate heatmap data for specific entity types.
     
     Parameters:
-    - entity_type: The type of entity to analyze (e.g., "user", "team", "project")
-    - metric: The metric to visualize (e.g., "connections", "collaboration", "activity")
+    - entity_type: The type of entity to analyze ("user", "team", "project")
+    - metric: The metric to visualize (e.g., "connections", "collaboration", "overlap")
+    - top_k: Maximum number of entities per axis (ranked by total interaction)
+    
+    Cells are keyed by entity ID ("x", "y"); "x_name" and "y_name" are for display.
     """
     data = await insight_service.generate_heatmap_data(
         db=db,
         tenant_id=current_user.tenant_id,
         entity_type=entity_type,
-        metric=metric
+        metric=metric,
+        top_k=top_k
     )
     return {"heatmap_data": data}
\ No newline at end of file
@@ -0,0 +1,51 @@
+from typing import Any, Dict, List
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from app import models, schemas
+from app.core import security
+from app.services.job_service import JobError, JobParamsError, job_service
+
+router = APIRouter()
+
+@router.get("/kinds", response_model=List[str])
+async def list_job_kinds(
+    current_user: models.User = Depends(security.get_current_user),
+) -> List[str]:
+    """List the job kinds that can be submitted."""
+    return job_service.kinds
+
+@router.post("", response_model=schemas.JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    job_in: schemas.JobCreate,
+    response: Response,
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict[str, Any]:
+    """
+    Submit a long-running analytics job.
+    
+    Returns immediately with the job ID; poll GET /jobs/{job_id} for its
+    status and result. Parameters are validated against the kind's schema
+    (422 if invalid). Submitting a job identical to one still in flight
+    returns the existing job.
+    """
+    try:
+        job = await job_service.submit(current_user.tenant_id, job_in.kind, job_in.params)
+    except JobParamsError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=e.errors)
+    except JobError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    response.headers["Location"] = f"/api/v1/jobs/{job['id']}"
+    return job
+
+@router.get("/{job_id}", response_model=schemas.JobStatus)
+async def get_job_status(
+    job_id: UUID,
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict[str, Any]:
+    """Retrieve the status, and once finished the result, of a job."""
+    job = await job_service.get_job(current_user.tenant_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found or expired")
+    return job
@@ -675,7 +675,8 @@ async def get_dev_graph_data(
             Node.type,
             Node.props,
             Node.x,
-            Node.y
+            Node.y,
+            Node.community_id
         ).where(Node.tenant_id == tenant_id).limit(limit)
         
         node_result = await db.execute(node_query)
@@ -728,6 +729,7 @@ async def get_dev_graph_data(
                 "x": position["x"],  # Add x directly for some visualization libraries
                 "y": position["y"],  # Add y directly for some visualization libraries
                 "position": position, # Add position object for others
+                "community_id": node.community_id,  # Precomputed by community detection
                 "data": {
                     "entity_id": entity_id,
                     "name": name,
@@ -787,7 +789,8 @@ async def get_graph_data(
             Node.type,
             Node.props,
             Node.x,
-            Node.y
+            Node.y,
+            Node.community_id
         ).where(Node.tenant_id == tenant_id).limit(limit)
         
         node_result = await db.execute(node_query)
@@ -840,6 +843,7 @@ async def get_graph_data(
                 "x": position["x"],  # Add x directly for some visualization libraries
                 "y": position["y"],  # Add y directly for some visualization libraries
                 "position": position, # Add position object for others
+                "community_id": node.community_id,  # Precomputed by community detection
                 "data": {
                     "entity_id": entity_id,
                     "name": name,
@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models, schemas
+from app.core import security
+from app.db.session import get_db_session
+from app.services.semantic_search_service import semantic_search_service
+
+router = APIRouter()
+
+@router.get("/semantic", response_model=schemas.SemanticSearchResponse)
+async def semantic_search(
+    q: str = Query(..., min_length=1, max_length=1000, description="Free-text query"),
+    top_k: int = Query(10, ge=1, le=100, description="Number of results"),
+    types: Optional[List[str]] = Query(None, description="Entity types to include: user, team, project, goal, knowledge_asset"),
+    mode: str = Query("auto", description="'exact', 'ivf' (approximate) or 'auto'"),
+    nprobe: int = Query(32, ge=1, le=1024, description="IVF lists scanned per query"),
+    db: AsyncSession = Depends(get_db_session),
+    current_user: models.User = Depends(security.get_current_user),
+) -> Dict[str, Any]:
+    """
+    Find users, teams, projects, goals and notes related to a free-text query.
+    
+    Results of all entity types are ranked together by cosine similarity of
+    their embeddings to the query. ``mode`` in the response is the search
+    actually run: "ivf" is only available once the tenant has an IVF index
+    (above IVF_AUTO_THRESHOLD entities) and otherwise runs as "exact".
+    """
+    try:
+        return await semantic_search_service.search(
+            db,
+            current_user.tenant_id,
+            q,
+            top_k=top_k,
+            types=types,
+            mode=mode,
+            nprobe=nprobe,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -0,0 +1,97 @@
+"""
+After-commit actions.
+
+Mapper events (after_insert, after_update, after_delete) fire at flush time,
+inside a transaction that may still roll back. In-process indexes, caches and
+metric state updated from them must not see changes that never commit, so
+such updates are recorded on the session with ``defer_until_commit`` and run
+once its transaction commits. A rollback discards them.
+
+Actions are zero-argument callables, run in the order they were recorded.
+Actions returning an awaitable are awaited one after another in a single
+task on the running event loop; the task is referenced until it finishes.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+AfterCommitAction = Callable[[], Any]
+
+# Key of the pending action list in Session.info
+_PENDING_KEY = "after_commit_actions"
+
+# Running action tasks; asyncio only keeps weak references to tasks
+_tasks: Set[asyncio.Task] = set()
+
+
+def defer_until_commit(session: Optional[Union[Session, AsyncSession]], action: AfterCommitAction) -> None:
+    """
+    Run ``action`` once the session's current transaction commits.
+
+    Args:
+        session: Session the change was flushed in (sync or async). Without a
+            session there is no transaction to wait for and the action runs now.
+        action: Zero-argument callable; may return an awaitable
+    """
+    if isinstance(session, AsyncSession):
+        session = session.sync_session
+    if session is None:
+        _run_actions([action])
+        return
+    session.info.setdefault(_PENDING_KEY, []).append(action)
+
+
+def _run_actions(actions: List[AfterCommitAction]) -> None:
+    awaitables: List[Awaitable[Any]] = []
+    for action in actions:
+        try:
+            result = action()
+        except Exception as e:
+            logger.error(f"After-commit action {action} failed: {e}")
+            continue
+        if inspect.isawaitable(result):
+            awaitables.append(result)
+    if not awaitables:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"No running event loop; dropping {len(awaitables)} after-commit action(s)")
+        for awaitable in awaitables:
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+        return
+    task = loop.create_task(_await_in_order(awaitables))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _await_in_order(awaitables: List[Awaitable[Any]]) -> None:
+    for awaitable in awaitables:
+        try:
+            await awaitable
+        except Exception as e:
+            logger.error(f"After-commit action failed: {e}")
+
+
+def _handle_after_commit(session: Session) -> None:
+    actions = session.info.pop(_PENDING_KEY, None)
+    if actions:
+        _run_actions(actions)
+
+
+def _handle_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+event.listen(Session, "after_commit", _handle_after_commit)
+event.listen(Session, "after_rollback", _handle_after_rollback)
@@ -6,17 +6,29 @@ to keep the graph database in sync with the entity tables.
 """
 
 import logging
+from functools import partial
+from typing import Any, Callable, Type
+
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
 from sqlalchemy.orm.session import object_session
 
+from app.core.after_commit import AfterCommitAction, defer_until_commit
 from app.models.user import User
 from app.models.team import Team
 from app.models.project import Project
 from app.models.goal import Goal
 from app.models.department import Department
+from app.models.knowledge_asset import KnowledgeAsset
+from app.models.activity_log import ActivityLog
+from app.services.briefing_service import briefing_service
+from app.services.calendar_sync_service import calendar_sync_service
 from app.services.graph_sync_service import handle_entity_created, handle_entity_updated
+from app.services.entity_dictionary import ENTITY_SOURCES as ENTITY_DICTIONARY_SOURCES, entity_dictionaries
+from app.services.goal_index import goal_indexes
+from app.services.insight_service import insight_service
+from app.services.semantic_search_service import ENTITY_TEXT_FIELDS, entity_text, semantic_search_service
 
 logger = logging.getLogger(__name__)
 
@@ -80,4 +92,104 @@ def register_entity_event_hooks():
         # After update event
         event.listen(entity_type, 'after_update', _handle_object_updated_event)
     
-    logger.info(f"Registered graph sync hooks for {len(entity_types)} entity types")
\ No newline at end of file
+    logger.info(f"Registered graph sync hooks for {len(entity_types)} entity types")
+
+    register_project_overlap_hooks()
+    register_goal_index_hooks()
+    register_semantic_search_hooks()
+    register_entity_dictionary_hooks()
+    register_briefing_hooks()
+
+def _sync_after_commit(
+    model: Type[Any],
+    on_saved: Callable[[Any], AfterCommitAction],
+    on_deleted: Callable[[Any], AfterCommitAction],
+) -> None:
+    """
+    Apply a model's inserts, updates and deletes to in-process state once they commit.
+
+    ``on_saved`` and ``on_deleted`` are called at flush time with the entity
+    and return the action to run after commit, so the action captures the
+    flushed values. Changes of a transaction that rolls back are discarded.
+    """
+
+    def _handle_saved(mapper, connection, target):
+        defer_until_commit(object_session(target), on_saved(target))
+
+    def _handle_deleted(mapper, connection, target):
+        defer_until_commit(object_session(target), on_deleted(target))
+
+    event.listen(model, 'after_insert', _handle_saved)
+    event.listen(model, 'after_update', _handle_saved)
+    event.listen(model, 'after_delete', _handle_deleted)
+
+
+def register_project_overlap_hooks():
+    """Keep the in-process project overlap indexes in sync with committed project writes."""
+    overlap_indexes = insight_service.overlap_indexes
+    _sync_after_commit(
+        Project,
+        lambda project: partial(overlap_indexes.upsert_project, project.tenant_id, project.id, project.description),
+        lambda project: partial(overlap_indexes.remove_project, project.tenant_id, project.id),
+    )
+
+
+def register_goal_index_hooks():
+    """Keep the in-process goal vector indexes in sync with committed goal writes."""
+    _sync_after_commit(
+        Goal,
+        lambda goal: partial(goal_indexes.upsert_goal, goal.tenant_id, goal.id, goal.title, goal.description),
+        lambda goal: partial(goal_indexes.remove_goal, goal.tenant_id, goal.id),
+    )
+
+
+def register_semantic_search_hooks():
+    """Queue committed entity writes for the in-process semantic search indexes."""
+    models = {
+        "user": User,
+        "team": Team,
+        "project": Project,
+        "goal": Goal,
+        "knowledge_asset": KnowledgeAsset,
+    }
+
+    for entity_type, model in models.items():
+        fields = ENTITY_TEXT_FIELDS[entity_type]
+        _sync_after_commit(
+            model,
+            lambda entity, entity_type=entity_type, fields=fields: partial(
+                semantic_search_service.enqueue_upsert,
+                entity.tenant_id, entity_type, entity.id, entity_text(*(getattr(entity, field) for field in fields)),
+            ),
+            lambda entity, entity_type=entity_type: partial(
+                semantic_search_service.enqueue_remove, entity.tenant_id, entity_type, entity.id
+            ),
+        )
+
+
+def register_entity_dictionary_hooks():
+    """Keep the in-process entity recognition dictionaries in sync with committed entity writes."""
+    for collection, (model, fields) in ENTITY_DICTIONARY_SOURCES.items():
+        _sync_after_commit(
+            model,
+            lambda entity, collection=collection, fields=fields: partial(
+                entity_dictionaries.upsert_entity,
+                entity.tenant_id, collection, entity.id, *(getattr(entity, field) for field in fields),
+            ),
+            lambda entity, collection=collection: partial(
+                entity_dictionaries.remove_entity, entity.tenant_id, collection, entity.id
+            ),
+        )
+
+
+def register_briefing_hooks():
+    """Invalidate a user's cached daily briefing when they log new activity or their calendar changes."""
+
+    def _handle_activity_created(mapper, connection, target):
+        # Invalidate once the activity is committed: a briefing built in between
+        # would read the new generation without the new activity and be cached as current
+        if target.user_id is not None:
+            defer_until_commit(object_session(target), partial(briefing_service.invalidate, target.user_id))
+
+    event.listen(ActivityLog, 'after_insert', _handle_activity_created)
+    calendar_sync_service.add_listener(briefing_service.invalidate)
@@ -0,0 +1,59 @@
+"""
+Graph change events.
+
+In-process publish/subscribe hub for node and edge deltas. CRUD and graph
+sync code publish a delta whenever the tenant graph changes; insight caches
+and metric engines subscribe to invalidate or update derived data.
+
+Deltas must only describe committed changes: listeners such as the
+incremental metric state apply them immediately and never revisit them.
+Code that flushes without committing publishes through
+``publish_graph_delta_after_commit``, which drops the delta on rollback.
+"""
+
+import logging
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.after_commit import defer_until_commit
+
+logger = logging.getLogger(__name__)
+
+GraphListener = Callable[[UUID, Dict[str, Any]], Awaitable[None]]
+
+_listeners: List[GraphListener] = []
+
+
+def add_graph_listener(listener: GraphListener) -> None:
+    """Register a coroutine called as ``listener(tenant_id, delta)`` for every graph delta."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_graph_listener(listener: GraphListener) -> None:
+    """Unregister a previously added listener."""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+async def publish_graph_delta(tenant_id: UUID, delta: Dict[str, Any]) -> None:
+    """
+    Notify listeners that the tenant graph changed.
+
+    Args:
+        tenant_id: Tenant whose graph changed
+        delta: Change description, e.g. ``{"type": "edge_created", "src": ..., "dst": ...}``
+    """
+    for listener in list(_listeners):
+        try:
+            await listener(tenant_id, delta)
+        except Exception as e:
+            logger.error(f"Graph listener {listener} failed for tenant {tenant_id}: {e}")
+
+
+def publish_graph_delta_after_commit(db: AsyncSession, tenant_id: UUID, delta: Dict[str, Any]) -> None:
+    """Publish a delta for a change flushed in ``db`` once its transaction commits; dropped on rollback."""
+    defer_until_commit(db, partial(publish_graph_delta, tenant_id, delta))
@@ -0,0 +1,84 @@
+"""
+Shared HTTP clients for external APIs.
+
+Creating a client per request pays a TCP and TLS handshake on every call.
+Instead, each provider (e.g. "google", "microsoft", "okta") gets one
+keep-alive client, created on first use and closed with the app:
+
+- ``get_client``: an ``httpx.AsyncClient``, using HTTP/2 when the optional
+  ``h2`` package is installed
+- ``get_session``: an ``aiohttp.ClientSession`` for code written against aiohttp
+
+Connections per client are bounded by HTTP_POOL_MAX_CONNECTIONS. Shared
+clients carry no credentials; callers pass auth headers per request.
+"""
+
+import logging
+import os
+from typing import Dict
+
+import aiohttp
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+HTTP_POOL_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_POOL_KEEPALIVE_SECONDS", "60"))
+HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "30"))
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+_sessions: Dict[str, aiohttp.ClientSession] = {}
+
+
+def get_client(provider: str) -> httpx.AsyncClient:
+    """Return the shared httpx client of ``provider``, creating it on first use."""
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=HTTP_POOL_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_POOL_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_POOL_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _clients[provider] = client
+    return client
+
+
+def get_session(provider: str) -> aiohttp.ClientSession:
+    """Return the shared aiohttp session of ``provider``, creating it on first use."""
+    session = _sessions.get(provider)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_POOL_MAX_CONNECTIONS, keepalive_timeout=HTTP_POOL_KEEPALIVE_EXPIRY
+            ),
+            timeout=aiohttp.ClientTimeout(total=HTTP_POOL_TIMEOUT),
+        )
+        _sessions[provider] = session
+    return session
+
+
+async def close() -> None:
+    """Close all shared clients (called on application shutdown)."""
+    for provider, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP client '{provider}': {e}")
+    for provider, session in list(_sessions.items()):
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"Failed to close HTTP session '{provider}': {e}")
+    _clients.clear()
+    _sessions.clear()
@@ -0,0 +1,437 @@
+"""
+Insight cache.
+
+Two-level cache for computed insights: a size-bounded in-process LRU (L1) in
+front of a shared backend (Redis in production, an in-memory fake in tests).
+
+Entries are scoped per tenant through a generation counter stored in the
+backend. Bumping the generation (on any graph change) invalidates every
+cached insight of that tenant across all workers without scanning keys; the
+same counter doubles as the tenant's graph version.
+
+``get_or_compute`` adds single-flight protection: concurrent requests for the
+same key in one process share one computation, and a backend lock stops
+other workers from computing it at the same time.
+
+Values computed with a ``latest_key`` are also kept outside the generation
+scope. ``get_precomputed`` serves that last known value while a background
+refresh recomputes the current one, so request handlers only compute inline
+when a tenant has never been computed at all.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.core.graph_events import add_graph_listener
+
+logger = logging.getLogger(__name__)
+
+_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+_BACKEND = os.getenv("INSIGHT_CACHE_BACKEND", "redis")
+
+DEFAULT_TTL = 3600
+L1_MAX_ENTRIES = int(os.getenv("INSIGHT_CACHE_L1_MAX_ENTRIES", "1024"))
+L1_TTL = int(os.getenv("INSIGHT_CACHE_L1_TTL", "30"))
+# How long a worker trusts its local copy of a tenant generation
+GENERATION_TTL = 2.0
+LOCK_TIMEOUT = 120
+# How long the last known value of a precomputed insight is kept
+LATEST_TTL = 7 * 24 * 3600
+LOCK_POLL_INTERVAL = 0.1
+
+
+class CacheBackend(ABC):
+    """Shared key/value store used behind the in-process L1."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        pass
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, token: str, expire: int) -> bool:
+        """Set ``key`` to ``token`` only if it does not exist."""
+        pass
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """Delete ``key`` only if it still holds ``token``."""
+        pass
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local backend with TTL enforcement. Used in tests and local development."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], str]] = {}
+
+    def _get_live(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._get_live(key)
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + expire if expire else None
+        self._data[key] = (expires_at, value)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._get_live(key) or 0) + 1
+        self._data[key] = (None, str(value))
+        return value
+
+    async def acquire_lock(self, key: str, token: str, expire: int) -> bool:
+        if self._get_live(key) is not None:
+            return False
+        await self.set(key, token, expire)
+        return True
+
+    async def release_lock(self, key: str, token: str) -> None:
+        if self._get_live(key) == token:
+            del self._data[key]
+
+
+# Compare-and-delete so a worker never releases a lock that expired and was re-acquired
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed store shared by all workers."""
+
+    def __init__(self, url: str = _REDIS_URL):
+        self._url = url
+        self._client = None
+
+    async def _get_client(self):
+        if self._client is None:
+            import redis.asyncio as redis_async
+            self._client = redis_async.from_url(self._url, encoding="utf-8", decode_responses=True)
+        return self._client
+
+    async def get(self, key: str) -> Optional[str]:
+        client = await self._get_client()
+        return await client.get(key)
+
+    async def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        client = await self._get_client()
+        await client.set(key, value, ex=expire)
+
+    async def delete(self, key: str) -> None:
+        client = await self._get_client()
+        await client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        client = await self._get_client()
+        return await client.incr(key)
+
+    async def acquire_lock(self, key: str, token: str, expire: int) -> bool:
+        client = await self._get_client()
+        return bool(await client.set(key, token, ex=expire, nx=True))
+
+    async def release_lock(self, key: str, token: str) -> None:
+        client = await self._get_client()
+        await client.eval(_RELEASE_LOCK_SCRIPT, 1, key, token)
+
+
+class _LRU:
+    """Size-bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InsightCache:
+    """Tenant-scoped two-level cache with single-flight computation."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        l1_max_entries: int = L1_MAX_ENTRIES,
+        l1_ttl: int = L1_TTL,
+    ):
+        self.backend = backend
+        self.l1_ttl = l1_ttl
+        self._l1 = _LRU(l1_max_entries)
+        self._generations = _LRU(l1_max_entries)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    # --- Plain key/value access ---
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._l1.get(key)
+        if value is not None:
+            return value
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Insight cache backend get failed for {key}: {e}")
+            return None
+        if value is not None:
+            self._l1.set(key, value, self.l1_ttl)
+        return value
+
+    async def set(self, key: str, value: str, expire: int = DEFAULT_TTL) -> None:
+        self._l1.set(key, value, min(self.l1_ttl, expire))
+        try:
+            await self.backend.set(key, value, expire=expire)
+        except Exception as e:
+            logger.warning(f"Insight cache backend set failed for {key}: {e}")
+
+    async def delete(self, key: str) -> None:
+        self._l1.delete(key)
+        try:
+            await self.backend.delete(key)
+        except Exception as e:
+            logger.warning(f"Insight cache backend delete failed for {key}: {e}")
+
+    # --- Tenant scoping ---
+
+    async def get_graph_version(self, tenant_id: UUID) -> int:
+        """Current generation of the tenant's cached insights (bumped on graph changes)."""
+        gen_key = f"insight:gen:{tenant_id}"
+        cached = self._generations.get(gen_key)
+        if cached is not None:
+            return cached
+        try:
+            version = int(await self.backend.get(gen_key) or 0)
+        except Exception as e:
+            logger.warning(f"Insight cache backend unavailable reading generation for {tenant_id}: {e}")
+            version = 0
+        self._generations.set(gen_key, version, GENERATION_TTL)
+        return version
+
+    async def tenant_key(self, tenant_id: UUID, key: str) -> str:
+        """Build a backend key scoped to the tenant's current generation."""
+        version = await self.get_graph_version(tenant_id)
+        return f"insight:{tenant_id}:{version}:{key}"
+
+    async def invalidate_tenant(self, tenant_id: UUID) -> int:
+        """Invalidate every cached insight for a tenant. Returns the new generation."""
+        gen_key = f"insight:gen:{tenant_id}"
+        self._l1.delete_prefix(f"insight:{tenant_id}:")
+        try:
+            version = await self.backend.incr(gen_key)
+        except Exception as e:
+            logger.warning(f"Insight cache backend unavailable invalidating tenant {tenant_id}: {e}")
+            version = (self._generations.get(gen_key) or 0) + 1
+        self._generations.set(gen_key, version, GENERATION_TTL)
+        return version
+
+    # --- Single-flight computation ---
+
+    async def get_or_compute(
+        self,
+        tenant_id: UUID,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire: int = DEFAULT_TTL,
+        latest_key: Optional[str] = None,
+    ) -> Any:
+        """
+        Return the cached JSON value for ``key``, computing it at most once.
+
+        Args:
+            tenant_id: Tenant the value belongs to
+            key: Cache key, unique within the tenant
+            compute: Coroutine factory producing a JSON-serialisable value
+            expire: TTL in seconds for the shared backend
+            latest_key: If given, a freshly computed value is also stored as
+                the tenant's last known value under this key
+
+        Returns:
+            The cached or freshly computed value
+        """
+        full_key = await self.tenant_key(tenant_id, key)
+
+        cached = await self.get(full_key)
+        if cached is not None:
+            return json.loads(cached)
+
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            return json.loads(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            payload = await self._compute_with_lock(full_key, compute, expire)
+            if latest_key is not None:
+                await self.set(self._latest_key(tenant_id, latest_key), payload, expire=LATEST_TTL)
+            future.set_result(payload)
+            return json.loads(payload)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as a warning
+            future.exception()
+            raise
+        finally:
+            del self._inflight[full_key]
+
+    @staticmethod
+    def _latest_key(tenant_id: UUID, key: str) -> str:
+        # Outside the "insight:{tenant_id}:" prefix so tenant invalidation keeps it
+        return f"insight:latest:{tenant_id}:{key}"
+
+    async def get_precomputed(
+        self,
+        tenant_id: UUID,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        latest_key: str,
+        on_stale: Callable[[], None],
+        expire: int = DEFAULT_TTL,
+    ) -> Any:
+        """
+        Read a value maintained by background precomputation.
+
+        Returns the value for the current graph version if present. Otherwise
+        returns the last known value and calls ``on_stale`` to request a
+        refresh. Only when no value was ever computed is ``compute`` run inline.
+
+        Args:
+            tenant_id: Tenant the value belongs to
+            key: Cache key, unique within the tenant
+            compute: Coroutine factory used for the very first computation
+            latest_key: Key of the last known value
+            on_stale: Called when a stale value is served
+            expire: TTL in seconds for the shared backend
+
+        Returns:
+            The current, last known, or freshly computed value
+        """
+        cached = await self.get(await self.tenant_key(tenant_id, key))
+        if cached is not None:
+            return json.loads(cached)
+
+        latest = await self.get(self._latest_key(tenant_id, latest_key))
+        if latest is not None:
+            on_stale()
+            return json.loads(latest)
+
+        return await self.get_or_compute(tenant_id, key, compute, expire=expire, latest_key=latest_key)
+
+    async def _compute_with_lock(
+        self, full_key: str, compute: Callable[[], Awaitable[Any]], expire: int
+    ) -> str:
+        lock_key = f"lock:{full_key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.backend.acquire_lock(lock_key, token, LOCK_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Insight cache lock unavailable for {full_key}: {e}")
+            acquired = True
+            token = None
+
+        if not acquired:
+            # Another worker is computing: wait for its result instead of duplicating work
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_INTERVAL)
+                cached = await self.get(full_key)
+                if cached is not None:
+                    return cached
+                try:
+                    if await self.backend.acquire_lock(lock_key, token, LOCK_TIMEOUT):
+                        break
+                except Exception:
+                    token = None
+                    break
+            else:
+                token = None
+
+        try:
+            # Re-check: the previous lock holder may have finished just before we got the lock
+            cached = await self.get(full_key)
+            if cached is not None:
+                return cached
+            payload = json.dumps(await compute())
+            await self.set(full_key, payload, expire=expire)
+            return payload
+        finally:
+            if token is not None:
+                try:
+                    await self.backend.release_lock(lock_key, token)
+                except Exception as e:
+                    logger.warning(f"Failed to release insight cache lock {lock_key}: {e}")
+
+
+def _create_backend() -> CacheBackend:
+    if _BACKEND == "memory":
+        return InMemoryCacheBackend()
+    return RedisCacheBackend()
+
+
+# Singleton cache instance
+insight_cache = InsightCache(_create_backend())
+
+
+async def _invalidate_on_graph_change(tenant_id: UUID, delta: Dict[str, Any]) -> None:
+    await insight_cache.invalidate_tenant(tenant_id)
+
+
+add_graph_listener(_invalidate_on_graph_change)
@@ -0,0 +1,41 @@
+"""
+Shared process pool for CPU-bound analytics.
+
+Graph algorithms that are loops over numpy arrays hold the GIL, so running
+them in a thread would still stall the event loop. They are submitted here
+instead. The pool is created on first use and shut down with the app.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = int(os.getenv("ANALYTICS_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS)
+    return _executor
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable module-level function in the shared pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+def shutdown() -> None:
+    """Stop the worker processes (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -4,6 +4,7 @@ from uuid import UUID, uuid4
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 
+from app.core.graph_events import publish_graph_delta
 from app.models.edge import Edge
 
 class CRUDEdge:
@@ -21,6 +22,8 @@ class CRUDEdge:
         except ImportError:
             pass
 
+        await publish_graph_delta(tenant_id, {"type": "edge_created", "id": db_obj.id, "src": src, "dst": dst})
+
         return db_obj
 
     async def get(self, db: AsyncSession, *, id: UUID) -> Optional[Edge]:
@@ -34,7 +37,14 @@ class CRUDEdge:
         return result.scalars().all()
 
     async def remove(self, db: AsyncSession, *, id: UUID) -> None:
-        await db.execute(delete(Edge).where(Edge.id == id))
+        result = await db.execute(
+            delete(Edge).where(Edge.id == id).returning(Edge.tenant_id, Edge.src, Edge.dst)
+        )
+        removed = result.one_or_none()
         await db.commit()
 
+        if removed is not None:
+            tenant_id, src, dst = removed
+            await publish_graph_delta(tenant_id, {"type": "edge_deleted", "id": id, "src": src, "dst": dst})
+
 edge = CRUDEdge() 
\ No newline at end of file
@@ -4,6 +4,8 @@ import asyncio
 import logging
 import os
 
+from app.core.graph_events import publish_graph_delta
+
 logger = logging.getLogger(__name__)
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -100,6 +102,8 @@ class CRUDNode:
         except ImportError:
             pass
 
+        await publish_graph_delta(tenant_id, {"type": "node_created", "id": db_obj.id, "node_type": node_type})
+
         return db_obj
 
     async def get(self, db: AsyncSession, *, id: UUID) -> Optional[Node]:
@@ -140,9 +144,13 @@ class CRUDNode:
 
     async def remove(self, db: AsyncSession, *, id: UUID) -> None:
         """Delete a node by ID"""
-        stmt = delete(Node).where(Node.id == id)
-        await db.execute(stmt)
+        stmt = delete(Node).where(Node.id == id).returning(Node.tenant_id)
+        result = await db.execute(stmt)
+        tenant_id = result.scalar_one_or_none()
         await db.commit()
+
+        if tenant_id is not None:
+            await publish_graph_delta(tenant_id, {"type": "node_deleted", "id": id})
     
     async def get_nodes_in_radius(
         self, 
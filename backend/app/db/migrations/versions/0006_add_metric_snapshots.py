@@ -0,0 +1,31 @@
+"""Add metric snapshots
+
+Revision ID: 0006_add_metric_snapshots
+Revises: 0005_add_missing_tables
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '0006_add_metric_snapshots'
+down_revision = '0005_add_missing_tables'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # One row per tenant, resolution and time bucket; the primary key serves range scans
+    op.create_table(
+        'metric_snapshots',
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('resolution', sa.String(10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('samples', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('metrics', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint('tenant_id', 'resolution', 'bucket_start')
+    )
+
+def downgrade():
+    op.drop_table('metric_snapshots')
@@ -0,0 +1,23 @@
+"""Add community_id to nodes
+
+Revision ID: 0007_add_node_community
+Revises: 0006_add_metric_snapshots
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = '0007_add_node_community'
+down_revision = '0006_add_metric_snapshots'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('nodes', sa.Column('community_id', sa.Integer(), nullable=True))
+    op.create_index('ix_nodes_tenant_community', 'nodes', ['tenant_id', 'community_id'])
+
+def downgrade():
+    op.drop_index('ix_nodes_tenant_community', table_name='nodes')
+    op.drop_column('nodes', 'community_id')
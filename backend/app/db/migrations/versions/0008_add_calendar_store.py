@@ -0,0 +1,51 @@
+"""Add calendar event store
+
+Revision ID: 0008_add_calendar_store
+Revises: 0007_add_node_community
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic
+revision = '0008_add_calendar_store'
+down_revision = '0007_add_node_community'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'calendar_events',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('event_id', sa.String(), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('tenants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('ical_uid', sa.String(), nullable=True),
+        sa.Column('start_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('end_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('is_all_day', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('data', postgresql.JSON(astext_type=sa.Text()), nullable=False),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'source', 'event_id')
+    )
+    op.create_index('ix_calendar_events_user_start', 'calendar_events', ['user_id', 'start_at'])
+
+    op.create_table(
+        'calendar_sync_states',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('source', sa.String(20), nullable=False),
+        sa.Column('sync_token', sa.Text(), nullable=True),
+        sa.Column('window_start', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('window_end', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_synced_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_attempted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('user_id', 'source')
+    )
+
+def downgrade():
+    op.drop_table('calendar_sync_states')
+    op.drop_index('ix_calendar_events_user_start', table_name='calendar_events')
+    op.drop_table('calendar_events')
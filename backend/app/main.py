@@ -3,6 +3,7 @@ from fastapi import FastAPI, Request
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import os
 import time
 
 from app.core.config import settings
@@ -10,6 +11,14 @@ from app.core.tenant_middleware import configure_tenant_middleware
 from app.core.tenant_decorator import register_tenant_events  # Updated import
 from app.core.security import initialize_oauth
 from app.core.entity_event_hooks import register_entity_event_hooks
+from app.core import http_clients, process_pool
+from app.services.briefing_scheduler import briefing_scheduler
+from app.services.calendar_sync_service import calendar_sync_service
+from app.services.insight_scheduler import insight_scheduler
+from app.services.job_service import job_service
+from app.services.llm_service import llm_service
+from app.services.metric_snapshot_service import metric_snapshot_service
+from app.services.semantic_search_service import semantic_search_service
 
 # Configure logging - simple, clean configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -29,8 +38,29 @@ async def startup_event():
     logger.info("Starting application initialization")
     # Remove any reference to create_dev_user.py script - it's no longer needed
     await initialize_oauth()
+    if os.getenv("METRIC_SNAPSHOTS_ENABLED", "true").lower() == "true":
+        metric_snapshot_service.start()
+    if os.getenv("INSIGHT_PRECOMPUTE_ENABLED", "true").lower() == "true":
+        insight_scheduler.start()
+    if os.getenv("BRIEFING_PREGENERATE_ENABLED", "true").lower() == "true":
+        briefing_scheduler.start()
+    if os.getenv("CALENDAR_SYNC_ENABLED", "true").lower() == "true":
+        calendar_sync_service.start()
     logger.info("Application initialization complete")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_service.shutdown()
+    await insight_scheduler.stop()
+    await briefing_scheduler.stop()
+    await calendar_sync_service.stop()
+    await metric_snapshot_service.stop()
+    await semantic_search_service.flush()
+    await llm_service.close()
+    await http_clients.close()
+    # Stop worker processes used for graph analytics
+    process_pool.shutdown()
+
 # Configure middleware
 configure_tenant_middleware(app)
 register_tenant_events()
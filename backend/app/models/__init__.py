@@ -17,6 +17,8 @@ from .activity_log import ActivityLog
 from .node import Node
 from .edge import Edge
 from .notification import Notification
+from .metric_snapshot import MetricSnapshot
+from .calendar_event import CalendarEvent, CalendarSyncState
 __all__ = [
     "User",
     "Tenant",
@@ -28,5 +30,8 @@ __all__ = [
     "Node",
     "Edge",
     "ActivityLog",
-    "Notification"
+    "Notification",
+    "MetricSnapshot",
+    "CalendarEvent",
+    "CalendarSyncState"
 ]
\ No newline at end of file
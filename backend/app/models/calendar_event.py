@@ -0,0 +1,49 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, JSON, Text, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+class CalendarEvent(Base):
+    """
+    A user's calendar event as last seen at the provider.
+
+    Kept current by CalendarSyncService through incremental provider sync;
+    ``data`` holds the provider's event resource unchanged, so it can be
+    normalized exactly like a live API response.
+    """
+    __tablename__ = "calendar_events"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    source = Column(String(20), primary_key=True) # google, microsoft
+    event_id = Column(String, primary_key=True) # Provider event ID
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False)
+    ical_uid = Column(String, nullable=True)
+    start_at = Column(DateTime(timezone=True), nullable=True)
+    end_at = Column(DateTime(timezone=True), nullable=True)
+    is_all_day = Column(Boolean(), nullable=False, default=False)
+    data = Column(JSON, nullable=False) # Provider event resource
+    synced_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_calendar_events_user_start", "user_id", "start_at"),
+    )
+
+
+class CalendarSyncState(Base):
+    """
+    Incremental sync position of one user's calendar at one provider.
+
+    ``sync_token`` is the Google ``nextSyncToken`` or the Microsoft Graph
+    ``@odata.deltaLink`` returned by the last sync; the window is the time
+    range the last full sync covered.
+    """
+    __tablename__ = "calendar_sync_states"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    source = Column(String(20), primary_key=True)
+    sync_token = Column(Text, nullable=True)
+    window_start = Column(DateTime(timezone=True), nullable=True)
+    window_end = Column(DateTime(timezone=True), nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True) # Last successful sync
+    last_attempted_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, JSON
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+class MetricSnapshot(Base):
+    """
+    Network metrics of a tenant aggregated over one time bucket.
+
+    "raw" rows hold individual snapshots; hourly/daily/weekly/monthly rows
+    hold the running mean of all raw snapshots in the bucket. The primary key
+    doubles as the index for time range scans.
+    """
+    __tablename__ = "metric_snapshots"
+
+    tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(String(10), primary_key=True) # raw, hourly, daily, weekly, monthly
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    samples = Column(Integer, nullable=False, default=1) # Raw snapshots folded into this bucket
+    metrics = Column(JSON, nullable=False) # Metric name -> value
@@ -69,7 +69,7 @@ try:
 except Exception as e:
     logger.error(f"Error running system checks: {str(e)}")
 
-from sqlalchemy import Column, String, JSON, ForeignKey, Float, Index
+from sqlalchemy import Column, String, JSON, ForeignKey, Float, Index, Integer
 from sqlalchemy.dialects.postgresql import UUID
 
 # Check if we want to use spatial features or run in compatibility mode
@@ -157,6 +157,9 @@ class Node(Base):
     type = Column(String, nullable=False, index=True)
     props = Column(JSON, nullable=True)
     
+    # Community assigned by community detection (see app.services.community_detection)
+    community_id = Column(Integer, nullable=True)
+    
     # Spatial coordinates
     x = Column(Float, nullable=True)
     y = Column(Float, nullable=True)
@@ -172,6 +175,7 @@ class Node(Base):
     __table_args__ = (
         # Add composite index on x,y for faster 2D queries
         Index("ix_nodes_xy", "x", "y"),
+        Index("ix_nodes_tenant_community", "tenant_id", "community_id"),
     )
     
     def __repr__(self):
@@ -12,8 +12,12 @@ from .knowledge_asset import (
 )
 from .map import MapData, MapNode, MapEdge, MapNodeTypeEnum, MapEdgeTypeEnum
 from .activity_log import ActivityLogCreate, ActivityLogRead
-from .briefing import BriefingResponse, HighlightedEntity, HighlightedTextSegment
+from .briefing import (
+    BriefingResponse, HighlightedEntity, HighlightedTextSegment, HighlightTextsRequest, HighlightTextsResponse
+)
 from .insight import ProjectOverlapResponse
+from .job import JobCreate, JobStatus
+from .search import SemanticSearchResponse, SemanticSearchResult
 from .note import NoteBase, NoteCreate, NoteUpdate, NoteRead, NoteReadRecent, NoteInDB
 from .provider import OAuthProviderBase, OAuthProviderCreate, OAuthProviderUpdate, OAuthProviderRead
 # from .token import Token, TokenData # Placeholder for token schemas
@@ -32,8 +36,10 @@ __all__ = [
     "NoteCreate", "NoteRead",
     "MapData", "MapNode", "MapEdge", "MapNodeTypeEnum", "MapEdgeTypeEnum",
     "ActivityLogCreate", "ActivityLogRead",
-    "BriefingResponse", "HighlightedEntity", "HighlightedTextSegment",
+    "BriefingResponse", "HighlightedEntity", "HighlightedTextSegment", "HighlightTextsRequest", "HighlightTextsResponse",
     "ProjectOverlapResponse",
+    "JobCreate", "JobStatus",
+    "SemanticSearchResponse", "SemanticSearchResult",
     "NoteBase",
     "NoteCreate",
     "NoteUpdate",
@@ -13,4 +13,10 @@ class HighlightedTextSegment(BaseModel):
 
 class BriefingResponse(BaseModel):
     summary: str
-    highlighted_summary: Optional[List[HighlightedTextSegment]] = None
\ No newline at end of file
+    highlighted_summary: Optional[List[HighlightedTextSegment]] = None
+
+class HighlightTextsRequest(BaseModel):
+    texts: List[str] = Field(..., max_length=500)
+
+class HighlightTextsResponse(BaseModel):
+    results: List[List[HighlightedTextSegment]]
@@ -67,4 +67,12 @@ class CalendarSourceStatus(BaseModel):
     connected: bool
     authenticated: bool
     errorMessage: Optional[str] = None
-    lastSyncTime: Optional[datetime] = None
\ No newline at end of file
+    lastSyncTime: Optional[datetime] = None
+    timedOut: bool = False  # Sync still running at the deadline; events may be stale
+
+
+class CalendarEventsResponse(BaseModel):
+    """Events merged from all connected calendar sources, with the status of each source."""
+    events: List[CalendarEvent]
+    sources: Dict[str, CalendarSourceStatus]
+    complete: bool  # False if a source timed out or failed, so events may be missing or stale
\ No newline at end of file
@@ -0,0 +1,64 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobCreate(BaseModel):
+    """Schema for submitting an analytics job."""
+    kind: str = Field(..., description="Job kind, e.g. 'network_metrics' or 'project_overlaps'")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Keyword arguments for the job")
+
+
+class JobStatus(BaseModel):
+    """Schema for the state of an analytics job."""
+    id: uuid.UUID
+    kind: str
+    status: str  # queued, running, succeeded, failed
+    params: Dict[str, Any] = {}
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+# --- Job parameters ---
+# One model per job kind, with the same bounds as the matching synchronous
+# endpoint. Unknown parameters are rejected.
+
+class JobParams(BaseModel):
+    """Base schema for job parameters."""
+
+    class Config:
+        extra = "forbid"
+
+
+class NetworkMetricsJobParams(JobParams):
+    include_historical: bool = False
+
+
+class ProjectOverlapsJobParams(JobParams):
+    min_overlap_keywords: int = Field(3, ge=1, le=50)
+    mode: Literal["exact", "lsh"] = "exact"
+
+
+class BetweennessJobParams(JobParams):
+    epsilon: float = Field(0.05, ge=0.01, le=0.5)
+    top_k: int = Field(20, ge=1, le=500)
+
+
+class HeatmapJobParams(JobParams):
+    entity_type: Literal["user", "team", "project"]
+    metric: str = Field("connections", max_length=50)
+    top_k: int = Field(50, ge=2, le=500)
+
+
+class CommunitiesJobParams(JobParams):
+    pass
+
+
+class RecommendationsJobParams(JobParams):
+    top_k: int = Field(3, ge=1, le=20)
+    partners_per_team: int = Field(5, ge=1, le=50)
@@ -0,0 +1,22 @@
+import uuid
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class SemanticSearchResult(BaseModel):
+    """A single entity matched by semantic search."""
+    id: uuid.UUID
+    type: str  # user, team, project, goal or knowledge_asset
+    title: Optional[str] = None
+    score: float  # Cosine similarity to the query
+
+
+class SemanticSearchResponse(BaseModel):
+    """Schema for semantic search results."""
+    query: str
+    requested_mode: str  # auto, exact or ivf, as requested
+    mode: str  # exact or ivf, as actually used
+    total_indexed: int
+    took_ms: float
+    results: List[SemanticSearchResult]
@@ -1,16 +1,31 @@
-from typing import List, Dict, Optional, Any
-from sqlalchemy.orm import Session
-from datetime import datetime
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import asyncio
+import logging
+from typing import Any, Dict, List, Sequence
+from uuid import UUID
 
-from app.models.alignment import Recommendation, RecommendationFeedback
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.process_pool import run_in_process
 from app.models.project import Project
-from app.models.goal import Goal
-from app.models.edge import Edge
-from app.models.user import User
-from app.schemas.strategic_alignment import RecommendationType, RecommendationDifficulty
+from app.services.goal_index import goal_indexes, score_goals
+from app.services.team_collaboration import collaboration_candidates, load_team_goals
+
+logger = logging.getLogger(__name__)
+
+# Recommendation types and difficulty levels
+GOAL_ALIGNMENT = "goal_alignment"
+TEAM_COLLABORATION = "team_collaboration"
+DIFFICULTY_MEDIUM = "medium"
+
+# Minimum cosine similarity for a goal to be recommended
+GOAL_SIMILARITY_THRESHOLD = 0.1
+GOAL_RECOMMENDATIONS_PER_PROJECT = 3
+
+TEAM_COLLABORATION_MIN_SHARED_GOALS = 1
+TEAM_COLLABORATION_MIN_JACCARD = 0.0
+# Partners recommended per team; keeps the output linear in the number of teams
+TEAM_COLLABORATIONS_PER_TEAM = 5
 
 
 class AlignmentRecommendationService:
@@ -19,13 +34,20 @@ class AlignmentRecommendationService:
     
     This service analyzes organizational data to provide recommendations
     for improving alignment between projects, goals, and teams.
+    
+    Database work goes through the AsyncSession; text scoring runs in a
+    worker thread (it reads the in-process goal index) and team matching in
+    the analytics process pool, so generation never blocks the event loop.
+
+    There is no recommendation table yet, so recommendations are returned
+    as dictionaries for the caller to present rather than stored.
     """
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         """Initialize the service with a database session."""
         self.db = db
     
-    def recommend_goals_for_project(self, project_id: int, tenant_id: int) -> List[Recommendation]:
+    async def recommend_goals_for_project(self, project_id: UUID, tenant_id: UUID) -> List[Dict[str, Any]]:
         """
         Recommend goals that an unaligned project should consider aligning with.
         
@@ -39,103 +61,84 @@ class AlignmentRecommendationService:
         Returns:
             List of goal recommendations
         """
-        # Get the project
-        project = self.db.query(Project).filter(
-            Project.id == project_id, 
-            Project.tenant_id == tenant_id
-        ).first()
+        result = await self.db.execute(
+            select(Project.id, Project.name, Project.description).where(
+                Project.id == project_id,
+                Project.tenant_id == tenant_id
+            )
+        )
+        project = result.first()
         
         if not project:
             return []
         
-        # Get all active goals for this tenant
-        # Assuming there's an is_active field, if not, remove that condition
-        goals = self.db.query(Goal).filter(
-            Goal.tenant_id == tenant_id
-        ).all()
-        
-        if not goals:
-            return []
-        
-        # Use TF-IDF and cosine similarity to find similar goals based on text
-        vectorizer = TfidfVectorizer(stop_words='english')
-        
-        # Combine project name and description
-        project_text = f"{project.name} {project.description or ''}"
+        return await self.recommend_goals_for_projects([project], tenant_id)
+    
+    async def recommend_goals_for_projects(self, projects: Sequence[Any], tenant_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Recommend goals for several projects in one batched pass.
         
-        # Combine goal names and descriptions
-        goal_texts = [f"{goal.name} {goal.description or ''}" for goal in goals]
+        All projects are scored against the tenant's goal index with a single
+        sparse similarity product; the goal vectors are not refitted per project.
         
-        # If we have no text to analyze, return empty list
-        if not project_text.strip() or not any(goal_text.strip() for goal_text in goal_texts):
+        Args:
+            projects: Projects (or rows with id, name and description) of the tenant
+            tenant_id: The tenant ID
+            
+        Returns:
+            One goal recommendation per project with at least one similar goal
+        """
+        if not projects:
             return []
         
-        try:
-            # Create the document-term matrix
-            all_texts = [project_text] + goal_texts
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
-            
-            # Calculate cosine similarities between project and each goal
-            project_vector = tfidf_matrix[0:1]
-            goal_vectors = tfidf_matrix[1:]
-            similarities = cosine_similarity(project_vector, goal_vectors).flatten()
-            
-            # Sort goals by similarity and keep only those with similarity > threshold
-            threshold = 0.1  # Minimum similarity score to consider
-            similar_goals = []
-            
-            for i, similarity in enumerate(similarities):
-                if similarity > threshold:
-                    similar_goals.append((goals[i], float(similarity)))
-            
-            # Sort by similarity (highest first)
-            similar_goals.sort(key=lambda x: x[1], reverse=True)
-            
-            # Take top 3 most similar goals
-            top_goals = similar_goals[:3]
-            
-            if not top_goals:
-                return []
-                
-        except Exception as e:
-            # If text analysis fails, return empty list
-            print(f"Error in goal recommendation: {str(e)}")
+        index = await goal_indexes.ensure_synced(self.db, tenant_id)
+        if not len(index):
             return []
         
-        # Create recommendation record
-        recommendation = Recommendation(
-            tenant_id=tenant_id,
-            type=RecommendationType.GOAL_ALIGNMENT,
-            title=f"Align Project '{project.name}' with Strategic Goals",
-            description=f"This project appears to align with {len(top_goals)} strategic goals based on content analysis.",
-            difficulty=RecommendationDifficulty.MEDIUM,
-            project_id=project_id,
-            details={
-                "recommended_goals": [
-                    {
-                        "goal_id": goal.id,
-                        "goal_name": goal.name,
-                        "similarity_score": float(similarity),
-                        "confidence": min(float(similarity) * 2, 1.0)  # Convert similarity to confidence
-                    }
-                    for goal, similarity in top_goals
-                ],
-                "analysis_method": "text_similarity"
-            }
+        # Combine project name and description
+        project_texts = [f"{project.name} {project.description or ''}" for project in projects]
+        matches = await asyncio.to_thread(
+            score_goals,
+            *index.snapshot(),
+            project_texts,
+            GOAL_RECOMMENDATIONS_PER_PROJECT,
+            GOAL_SIMILARITY_THRESHOLD,
         )
         
-        self.db.add(recommendation)
-        self.db.commit()
-        self.db.refresh(recommendation)
+        rows = []
+        for project, top_goals in zip(projects, matches):
+            if not top_goals:
+                continue
+            rows.append({
+                "tenant_id": tenant_id,
+                "type": GOAL_ALIGNMENT,
+                "title": f"Align Project '{project.name}' with Strategic Goals",
+                "description": f"This project appears to align with {len(top_goals)} strategic goals based on content analysis.",
+                "difficulty": DIFFICULTY_MEDIUM,
+                "project_id": project.id,
+                "details": {
+                    "recommended_goals": [
+                        {
+                            "goal_id": str(goal_id),
+                            "goal_name": index.title(goal_id),
+                            "similarity_score": similarity,
+                            "confidence": min(similarity * 2, 1.0)  # Convert similarity to confidence
+                        }
+                        for goal_id, similarity in top_goals
+                    ],
+                    "analysis_method": "text_similarity"
+                }
+            })
         
-        return [recommendation]
+        return rows
     
-    def recommend_team_collaborations(self, tenant_id: int) -> List[Recommendation]:
+    async def recommend_team_collaborations(self, tenant_id: UUID) -> List[Dict[str, Any]]:
         """
         Recommend team collaborations based on goal alignment.
         
         Identifies teams working on similar or complementary goals
-        who might benefit from collaboration.
+        who might benefit from collaboration. A team works on a goal when it
+        owns a project aligned with that goal.
         
         Args:
             tenant_id: The tenant ID
@@ -143,156 +146,43 @@ class AlignmentRecommendationService:
         Returns:
             List of team collaboration recommendations
         """
-        from app.models.team import Team
-        
-        # Get all teams in this tenant
-        teams = self.db.query(Team).filter(
-            Team.tenant_id == tenant_id
-        ).all()
-        
+        teams, goals, incidence = await load_team_goals(self.db, tenant_id)
         if len(teams) < 2:
             return []  # Need at least 2 teams to recommend collaborations
         
-        # Build dictionary of team_id -> set of goal_ids
-        team_goals = {}
-        recommendations = []
-        
-        for team in teams:
-            # Get all goals associated with this team
-            goals = self.db.query(Goal).join(
-                Edge,
-                (Edge.target_id == Goal.id) &
-                (Edge.target_type == "goal") &
-                (Edge.source_id == team.id) &
-                (Edge.source_type == "team") &
-                (Edge.tenant_id == tenant_id)
-            ).all()
-            
-            # Store as set for efficient overlap calculation
-            team_goals[team.id] = {goal.id for goal in goals}
-        
-        # Compare each pair of teams to find overlapping goals
-        for i, team1 in enumerate(teams):
-            for team2 in teams[i+1:]:
-                # Skip if either team has no goals
-                if not team_goals.get(team1.id) or not team_goals.get(team2.id):
-                    continue
-                
-                # Find overlapping goals
-                common_goals = team_goals[team1.id].intersection(team_goals[team2.id])
-                
-                # If teams share goals, create a collaboration recommendation
-                if common_goals:
-                    # Get details of common goals
-                    goals = self.db.query(Goal).filter(Goal.id.in_(common_goals)).all()
-                    
-                    recommendation = Recommendation(
-                        tenant_id=tenant_id,
-                        type=RecommendationType.TEAM_COLLABORATION,
-                        title=f"Collaboration Opportunity: {team1.name} and {team2.name}",
-                        description=f"These teams are working on {len(common_goals)} shared goals and could benefit from collaboration.",
-                        difficulty=RecommendationDifficulty.MEDIUM,
-                        details={
-                            "teams": [
-                                {"id": team1.id, "name": team1.name},
-                                {"id": team2.id, "name": team2.name}
-                            ],
-                            "common_goals": [
-                                {"id": goal.id, "name": goal.name} for goal in goals
-                            ],
-                            "collaboration_score": len(common_goals) / max(len(team_goals[team1.id]), len(team_goals[team2.id]))
-                        }
-                    )
-                    
-                    self.db.add(recommendation)
-                    recommendations.append(recommendation)
-        
-        if recommendations:
-            self.db.commit()
-            
-        return recommendations
-    
-    def record_recommendation_feedback(
-        self, 
-        recommendation_id: int, 
-        user_id: int, 
-        is_helpful: bool, 
-        feedback_text: Optional[str] = None,
-        implemented: Optional[bool] = None
-    ) -> RecommendationFeedback:
-        """
-        Record user feedback for a recommendation.
-        
-        Args:
-            recommendation_id: The recommendation ID
-            user_id: The user ID providing feedback
-            is_helpful: Whether the recommendation was helpful
-            feedback_text: Optional textual feedback
-            implemented: Whether the recommendation was implemented
-            
-        Returns:
-            The created feedback record
-        """
-        # Check if recommendation exists
-        recommendation = self.db.query(Recommendation).filter(
-            Recommendation.id == recommendation_id
-        ).first()
-        
-        if not recommendation:
-            raise ValueError(f"Recommendation with ID {recommendation_id} not found")
-        
-        # Check if user exists
-        user = self.db.query(User).filter(User.id == user_id).first()
-        
-        if not user:
-            raise ValueError(f"User with ID {user_id} not found")
-        
-        # Create feedback record
-        feedback = RecommendationFeedback(
-            recommendation_id=recommendation_id,
-            user_id=user_id,
-            is_helpful=is_helpful,
-            feedback_text=feedback_text,
-            implemented=implemented,
+        candidates = await run_in_process(
+            collaboration_candidates,
+            incidence,
+            TEAM_COLLABORATION_MIN_SHARED_GOALS,
+            TEAM_COLLABORATION_MIN_JACCARD,
+            TEAM_COLLABORATIONS_PER_TEAM,
         )
         
-        self.db.add(feedback)
-        self.db.commit()
-        self.db.refresh(feedback)
-        
-        return feedback
-    
-    def get_recommendations_for_project(self, project_id: int, tenant_id: int) -> List[Recommendation]:
-        """
-        Get all recommendations for a specific project.
-        
-        Args:
-            project_id: The ID of the project
-            tenant_id: The tenant ID
-            
-        Returns:
-            List of recommendations
-        """
-        return self.db.query(Recommendation).filter(
-            Recommendation.project_id == project_id,
-            Recommendation.tenant_id == tenant_id
-        ).all()
-    
-    def get_all_recommendations(self, tenant_id: int) -> List[Recommendation]:
-        """
-        Get all recommendations for a tenant.
-        
-        Args:
-            tenant_id: The tenant ID
-            
-        Returns:
-            List of all recommendations
-        """
-        return self.db.query(Recommendation).filter(
-            Recommendation.tenant_id == tenant_id
-        ).all()
+        rows = []
+        for candidate in candidates:
+            team1, team2 = teams[candidate["team_a"]], teams[candidate["team_b"]]
+            rows.append({
+                "tenant_id": tenant_id,
+                "type": TEAM_COLLABORATION,
+                "title": f"Collaboration Opportunity: {team1.name} and {team2.name}",
+                "description": f"These teams are working on {candidate['shared']} shared goals and could benefit from collaboration.",
+                "difficulty": DIFFICULTY_MEDIUM,
+                "details": {
+                    "teams": [
+                        {"id": str(team1.id), "name": team1.name},
+                        {"id": str(team2.id), "name": team2.name}
+                    ],
+                    "common_goals": [
+                        {"id": str(goals[g].id), "name": goals[g].title} for g in candidate["goals"]
+                    ],
+                    # Jaccard similarity of the two teams' goal sets
+                    "collaboration_score": candidate["jaccard"]
+                }
+            })
+        
+        return rows
     
-    def generate_all_recommendations(self, tenant_id: int) -> List[Recommendation]:
+    async def generate_all_recommendations(self, tenant_id: UUID) -> List[Dict[str, Any]]:
         """
         Generate all types of recommendations for a tenant.
         
@@ -304,29 +194,17 @@ class AlignmentRecommendationService:
         """
         recommendations = []
         
-        # Find unaligned projects and recommend goals
-        unaligned_projects = []
-        projects = self.db.query(Project).filter(Project.tenant_id == tenant_id).all()
-        
-        for project in projects:
-            # Check if project has goals
-            has_goals = self.db.query(Edge).filter(
-                Edge.source_id == project.id,
-                Edge.source_type == "project",
-                Edge.target_type == "goal",
-                Edge.tenant_id == tenant_id
-            ).count() > 0
-            
-            if not has_goals:
-                unaligned_projects.append(project)
-        
-        # Generate goal recommendations for unaligned projects
-        for project in unaligned_projects:
-            project_recommendations = self.recommend_goals_for_project(project.id, tenant_id)
-            recommendations.extend(project_recommendations)
+        # Find unaligned projects and recommend goals in one batch
+        unaligned_projects = (await self.db.execute(
+            select(Project.id, Project.name, Project.description).where(
+                Project.tenant_id == tenant_id,
+                Project.goal_id.is_(None)
+            )
+        )).all()
+        recommendations.extend(await self.recommend_goals_for_projects(unaligned_projects, tenant_id))
         
         # Generate team collaboration recommendations
-        team_recommendations = self.recommend_team_collaborations(tenant_id)
-        recommendations.extend(team_recommendations)
+        recommendations.extend(await self.recommend_team_collaborations(tenant_id))
         
-        return recommendations
\ No newline at end of file
+        logger.info(f"Generated {len(recommendations)} alignment recommendations for tenant {tenant_id}")
+        return recommendations
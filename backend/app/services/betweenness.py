@@ -0,0 +1,199 @@
+"""
+Approximate Betweenness Centrality
+
+Brandes' algorithm run from a uniform sample of source nodes instead of all
+of them. Each source contributes a dependency vector delta_s(v) bounded by
+n - 2, so by Hoeffding's inequality (with a union bound over all nodes) the
+normalised estimate is within ``epsilon`` of the exact value for every node
+with probability at least ``1 - delta`` once
+
+    k >= ln(2n / delta) / (2 * epsilon^2)
+
+sources are used. When k reaches n the computation is simply exact.
+
+BFS batches run in the shared analytics process pool; each worker receives
+the CSR arrays and a slice of the sampled sources and returns the summed
+dependencies.
+"""
+
+import asyncio
+import logging
+import math
+from typing import Any, Dict, List
+
+import numpy as np
+from scipy import sparse
+
+from app.core.process_pool import run_in_process
+from app.services.network_metrics import TenantGraph
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EPSILON = 0.05
+DEFAULT_DELTA = 0.1
+# Sources per worker task; small enough to balance load, large enough to amortise pickling
+BATCH_SIZE = 32
+# Below this many sampled sources the pool overhead outweighs the parallelism
+MIN_PARALLEL_SOURCES = 2 * BATCH_SIZE
+
+
+def required_samples(n: int, epsilon: float, delta: float) -> int:
+    """Number of sources needed for an (epsilon, delta) guarantee on an n-node graph."""
+    if n < 3:
+        return n
+    # Inverse of achieved_epsilon: the mean's error bound must be epsilon * (n - 1) / n
+    mean_epsilon = epsilon * (n - 1) / n
+    return min(n, math.ceil(math.log(2 * n / delta) / (2 * mean_epsilon ** 2)))
+
+
+def achieved_epsilon(n: int, samples: int, delta: float) -> float:
+    """Error bound on the normalised estimate for a given number of sampled sources."""
+    if samples >= n or n < 3:
+        return 0.0
+    # Hoeffding bound on the sample mean, rescaled by n / (n - 1) to the normalised score
+    return math.sqrt(math.log(2 * n / delta) / (2 * samples)) * n / (n - 1)
+
+
+def _expand(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray):
+    """All (tail, head) edges leaving the nodes in ``frontier``."""
+    starts = indptr[frontier]
+    counts = indptr[frontier + 1] - starts
+    total = int(counts.sum())
+    tails = np.repeat(frontier, counts)
+    # Position of each edge inside the CSR arrays: row start + offset within the row
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    heads = indices[np.repeat(starts, counts) + offsets]
+    return tails, heads
+
+
+def _brandes_batch(indptr: np.ndarray, indices: np.ndarray, n: int, sources: np.ndarray) -> np.ndarray:
+    """
+    Sum of Brandes dependencies from each source in ``sources``.
+
+    BFS and the backward accumulation are level-synchronous, so each level is
+    processed with vectorised array operations over the CSR edge lists.
+    """
+    total = np.zeros(n, dtype=np.float64)
+
+    for source in sources:
+        dist = np.full(n, -1, dtype=np.int64)
+        sigma = np.zeros(n, dtype=np.float64)
+        dist[source] = 0
+        sigma[source] = 1.0
+        levels: List[np.ndarray] = []
+        frontier = np.array([source], dtype=np.int64)
+
+        # Forward pass: distances and shortest-path counts, one level at a time
+        while frontier.size:
+            levels.append(frontier)
+            tails, heads = _expand(indptr, indices, frontier)
+            next_level = dist[frontier[0]] + 1
+            unseen = dist[heads] == -1
+            dist[heads[unseen]] = next_level
+            on_path = dist[heads] == next_level
+            np.add.at(sigma, heads[on_path], sigma[tails[on_path]])
+            frontier = np.unique(heads[unseen])
+
+        # Backward pass: accumulate dependencies from the deepest level up
+        dependency = np.zeros(n, dtype=np.float64)
+        for frontier in reversed(levels[:-1]):
+            tails, heads = _expand(indptr, indices, frontier)
+            successor = dist[heads] == dist[tails] + 1
+            tails, heads = tails[successor], heads[successor]
+            np.add.at(dependency, tails, sigma[tails] / sigma[heads] * (1.0 + dependency[heads]))
+
+        dependency[source] = 0.0
+        total += dependency
+
+    return total
+
+
+async def approximate_betweenness(
+    adjacency: sparse.csr_matrix,
+    epsilon: float = DEFAULT_EPSILON,
+    delta: float = DEFAULT_DELTA,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Estimate normalised betweenness centrality for every node.
+
+    Args:
+        adjacency: Symmetric binary CSR adjacency matrix
+        epsilon: Target maximum absolute error of the normalised scores
+        delta: Allowed failure probability of the error bound
+        seed: Seed for source sampling
+
+    Returns:
+        Dictionary with the score array and the sampling/error statistics
+    """
+    n = adjacency.shape[0]
+    samples = required_samples(n, epsilon, delta)
+    if n < 3:
+        return {"scores": np.zeros(n), "samples": n, "exact": True, "epsilon": 0.0}
+
+    if samples >= n:
+        sources = np.arange(n)
+    else:
+        sources = np.random.default_rng(seed).choice(n, size=samples, replace=False)
+
+    indptr = adjacency.indptr.astype(np.int64)
+    indices = adjacency.indices.astype(np.int64)
+
+    if sources.size < MIN_PARALLEL_SOURCES:
+        totals = await asyncio.to_thread(_brandes_batch, indptr, indices, n, sources)
+    else:
+        batches = [sources[i:i + BATCH_SIZE] for i in range(0, sources.size, BATCH_SIZE)]
+        partials = await asyncio.gather(*[
+            run_in_process(_brandes_batch, indptr, indices, n, batch)
+            for batch in batches
+        ])
+        totals = np.sum(partials, axis=0)
+
+    # Scale the sample to all sources, then normalise by the (n - 1)(n - 2) ordered pairs
+    scores = totals * (n / sources.size) / ((n - 1) * (n - 2))
+    return {
+        "scores": scores,
+        "samples": int(sources.size),
+        "exact": bool(sources.size >= n),
+        "epsilon": achieved_epsilon(n, int(sources.size), delta),
+    }
+
+
+async def compute_betweenness(
+    graph: TenantGraph,
+    epsilon: float = DEFAULT_EPSILON,
+    delta: float = DEFAULT_DELTA,
+    top_k: int = 20,
+) -> Dict[str, Any]:
+    """
+    Approximate betweenness for a tenant graph, reporting the top bridge nodes.
+
+    Args:
+        graph: Tenant graph to analyse
+        epsilon: Target maximum absolute error of the normalised scores
+        delta: Allowed failure probability of the error bound
+        top_k: Number of highest scoring nodes to return
+
+    Returns:
+        Dictionary with the top nodes and the confidence of the estimate
+    """
+    result = await approximate_betweenness(graph.adjacency, epsilon=epsilon, delta=delta)
+    scores = result["scores"]
+    top = np.argsort(-scores, kind="stable")[:top_k] if scores.size else []
+
+    return {
+        "node_count": graph.node_count,
+        "edge_count": graph.edge_count,
+        "samples": result["samples"],
+        "exact": result["exact"],
+        "epsilon": result["epsilon"],
+        "confidence": 1.0 if result["exact"] else 1.0 - delta,
+        "top_nodes": [
+            {
+                "node_id": str(graph.node_ids[i]),
+                "node_type": graph.node_types[i],
+                "betweenness": float(scores[i]),
+            }
+            for i in top
+        ],
+    }
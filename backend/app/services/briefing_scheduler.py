@@ -0,0 +1,168 @@
+"""
+Briefing Pre-generation Scheduler
+
+Generates the daily briefings of active users before the workday starts, so
+the morning rush reads cached briefings instead of all calling calendar
+providers and the LLM at once.
+
+Every CHECK_INTERVAL seconds the scheduler looks for tenants whose local
+time (``settings["timezone"]``) lies in the pre-generation window
+[PREGENERATE_HOUR, WORKDAY_START_HOUR). The first worker to claim a
+tenant's local day in the shared cache backend pre-generates the briefings
+of its users who logged in within ACTIVE_USER_DAYS.
+
+A semaphore bounds how many briefings are built at once across all tenants,
+which bounds the concurrent calendar provider and LLM calls. Degraded or
+failed builds are retried with exponential backoff.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+from sqlalchemy import select
+
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.models.tenant import Tenant
+from app.models.user import User
+from app.services.briefing_service import briefing_service, tenant_timezone
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = int(os.getenv("BRIEFING_PREGENERATE_CHECK_SECONDS", "300"))
+PREGENERATE_HOUR = int(os.getenv("BRIEFING_PREGENERATE_HOUR", "6"))
+WORKDAY_START_HOUR = int(os.getenv("BRIEFING_WORKDAY_START_HOUR", "9"))
+ACTIVE_USER_DAYS = int(os.getenv("BRIEFING_ACTIVE_USER_DAYS", "14"))
+PREGENERATE_CONCURRENCY = int(os.getenv("BRIEFING_PREGENERATE_CONCURRENCY", "4"))
+MAX_ATTEMPTS = int(os.getenv("BRIEFING_PREGENERATE_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("BRIEFING_PREGENERATE_RETRY_SECONDS", "30"))
+# How long a claimed tenant day is remembered
+CLAIM_TTL = 2 * 24 * 3600
+
+
+class BriefingScheduler:
+    """Pre-generates daily briefings per tenant before the local workday."""
+
+    def __init__(
+        self,
+        check_interval: int = CHECK_INTERVAL,
+        concurrency: int = PREGENERATE_CONCURRENCY,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_base_delay: float = RETRY_BASE_DELAY,
+    ):
+        self.check_interval = check_interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._tenant_tasks: Set[asyncio.Task] = set()
+        self._token = str(uuid.uuid4())
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @staticmethod
+    def in_window(local_now: datetime) -> bool:
+        """Whether ``local_now`` lies in the pre-generation window."""
+        return PREGENERATE_HOUR <= local_now.hour < WORKDAY_START_HOUR
+
+    async def _claim(self, tenant_id: uuid.UUID, day: str) -> bool:
+        """Claim a tenant's local day so only one worker pre-generates it."""
+        try:
+            return await insight_cache.backend.acquire_lock(
+                f"briefing:pregenerated:{tenant_id}:{day}", self._token, CLAIM_TTL
+            )
+        except Exception as e:
+            logger.warning(f"Briefing cache unavailable claiming tenant {tenant_id}: {e}")
+            return False
+
+    async def check_tenants(self) -> None:
+        """Start pre-generation for every tenant that has entered its window today."""
+        now = datetime.now(timezone.utc)
+        async with SessionLocal() as db:
+            result = await db.execute(select(Tenant.id, Tenant.settings).where(Tenant.is_active.is_(True)))
+            tenants = result.all()
+
+        for tenant_id, settings in tenants:
+            tz = tenant_timezone(settings)
+            briefing_service.set_tenant_timezone(tenant_id, tz)
+            local_now = now.astimezone(tz)
+            if not self.in_window(local_now):
+                continue
+            if not await self._claim(tenant_id, local_now.date().isoformat()):
+                continue
+            task = asyncio.create_task(self.pregenerate_tenant(tenant_id))
+            self._tenant_tasks.add(task)
+            task.add_done_callback(self._tenant_tasks.discard)
+
+    async def pregenerate_tenant(self, tenant_id: uuid.UUID) -> int:
+        """
+        Pre-generate the briefings of a tenant's active users.
+
+        Returns:
+            Number of briefings that are cached afterwards
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(days=ACTIVE_USER_DAYS)
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(User).where(User.tenant_id == tenant_id, User.last_login_at >= cutoff)
+            )
+            users = result.scalars().all()
+
+        users = [user for user in users if user.auth_provider != "mock"]
+        results = await asyncio.gather(*(self._pregenerate_user(user) for user in users))
+        cached = sum(1 for ok in results if ok)
+        logger.info(f"Pre-generated {cached}/{len(users)} briefings for tenant {tenant_id}")
+        return cached
+
+    async def _pregenerate_user(self, user: User) -> bool:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        for attempt in range(self.max_attempts):
+            async with self._semaphore:
+                try:
+                    if await briefing_service.pregenerate(user):
+                        return True
+                    reason = "degraded inputs"
+                except Exception as e:
+                    reason = str(e) or e.__class__.__name__
+            if attempt + 1 < self.max_attempts:
+                # Back off outside the semaphore so other users proceed meanwhile
+                delay = self.retry_base_delay * (2 ** attempt) * (0.5 + random.random())
+                logger.debug(f"Retrying briefing of user {user.id} in {delay:.0f}s ({reason})")
+                await asyncio.sleep(delay)
+        logger.warning(f"Giving up pre-generating the briefing of user {user.id} after {self.max_attempts} attempts")
+        return False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check_tenants()
+            except Exception as e:
+                logger.error(f"Briefing pre-generation check failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        """Start the periodic pre-generation check."""
+        if not self.started:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the scheduler and cancel running pre-generation."""
+        tasks = [t for t in [self._task, *self._tenant_tasks] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._tenant_tasks.clear()
+
+
+# Singleton scheduler instance
+briefing_scheduler = BriefingScheduler()
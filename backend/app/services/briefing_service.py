@@ -1,27 +1,177 @@
+"""
+Briefing Service
+
+Builds the daily briefing: today's calendar events and the user's recent
+activity are summarised by the LLM and the summary is highlighted with
+entity recognition.
+
+Calendar events are read from the local store kept current by
+CalendarSyncService. The calendar and activity fetches run concurrently
+(the tenant's entity dictionary is warmed up alongside them), each bounded
+by its own timeout, so first-load latency follows the slowest source
+instead of their sum.
+
+Finished briefings are cached per user until the end of the day in the
+tenant's timezone (``settings["timezone"]``), at most BRIEFING_CACHE_MAX_AGE
+seconds, in the shared cache backend. BriefingScheduler pre-generates them
+before the workday through ``pregenerate``. Each user has a generation counter that is bumped by
+``invalidate`` (on new activity, or when calendar changes arrive); a cached
+briefing is only served while its generation is current. Briefings built
+from degraded inputs (a source timed out or the LLM failed) are not cached.
+"""
+
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional, Tuple, Dict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import asyncio
+import json
 import logging
+import os
+import time
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.crud.crud_activity_log import activity_log as crud_activity_log # Use specific import
 from app import models, schemas # Keep models import if needed elsewhere
-# LLM service removed - no longer needed
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.models.tenant import Tenant
+from app.services.llm_service import llm_service
 from app.services.entity_recognition_service import entity_recognition_service
-
-# Import calendar service functions from both providers
-from app.services.google_calendar import get_todays_calendar_events as get_google_calendar_events
-from app.services.google_calendar import get_google_calendar_service
-from app.services.microsoft_outlook_service import get_todays_calendar_events as get_microsoft_calendar_events
-from app.services.microsoft_outlook_service import get_microsoft_outlook_service
+from app.services.calendar_sync_service import calendar_sources, calendar_sync_service, merge_events
 
 logger = logging.getLogger(__name__)
 
+CALENDAR_TIMEOUT = float(os.getenv("BRIEFING_CALENDAR_TIMEOUT_SECONDS", "5"))
+ACTIVITY_TIMEOUT = float(os.getenv("BRIEFING_ACTIVITY_TIMEOUT_SECONDS", "3"))
+LLM_TIMEOUT = float(os.getenv("BRIEFING_LLM_TIMEOUT_SECONDS", "20"))
+# Upper bound on the age of a cached briefing, for calendar edits made directly in the
+# provider; long enough for a briefing pre-generated before the workday to cover the morning
+BRIEFING_CACHE_MAX_AGE = int(os.getenv("BRIEFING_CACHE_MAX_AGE_SECONDS", "14400"))
+DEFAULT_TIMEZONE = os.getenv("BRIEFING_DEFAULT_TIMEZONE", "UTC")
+TENANT_TIMEZONE_TTL = 3600
+
+
+def tenant_timezone(settings: Optional[Dict[str, Any]]) -> ZoneInfo:
+    """Timezone configured in the tenant settings, falling back to BRIEFING_DEFAULT_TIMEZONE."""
+    name = (settings or {}).get("timezone") or DEFAULT_TIMEZONE
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning(f"Unknown timezone '{name}', using {DEFAULT_TIMEZONE}")
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def end_of_day(now: datetime, tz: ZoneInfo) -> datetime:
+    """Next local midnight in ``tz`` after ``now``."""
+    local = now.astimezone(tz)
+    return datetime.combine(local.date() + timedelta(days=1), datetime.min.time(), tzinfo=tz)
+
+
+class _SourceUnavailable(Exception):
+    """A briefing input could not be fetched in time."""
+    pass
+
+
 class BriefingService:
 
+    def __init__(self):
+        # In-flight briefing builds per user, shared by concurrent requests
+        self._inflight: Dict[UUID, asyncio.Task] = {}
+        # tenant ID -> (timezone, monotonic time loaded)
+        self._timezones: Dict[UUID, Tuple[ZoneInfo, float]] = {}
+
+    # --- Cache ---
+
+    @staticmethod
+    def _cache_key(user_id: UUID) -> str:
+        return f"briefing:{user_id}"
+
+    @staticmethod
+    def _generation_key(user_id: UUID) -> str:
+        return f"briefing:gen:{user_id}"
+
+    async def get_tenant_timezone(self, db: AsyncSession, tenant_id: UUID) -> ZoneInfo:
+        """Timezone of the tenant, cached for TENANT_TIMEZONE_TTL seconds."""
+        cached = self._timezones.get(tenant_id)
+        if cached is not None and time.monotonic() - cached[1] < TENANT_TIMEZONE_TTL:
+            return cached[0]
+        try:
+            tenant = await db.get(Tenant, tenant_id)
+        except Exception as e:
+            logger.warning(f"Failed to load timezone of tenant {tenant_id}: {e}")
+            return tenant_timezone(None)
+        tz = tenant_timezone(tenant.settings if tenant else None)
+        self._timezones[tenant_id] = (tz, time.monotonic())
+        return tz
+
+    def set_tenant_timezone(self, tenant_id: UUID, tz: ZoneInfo) -> None:
+        """Remember a tenant's timezone loaded elsewhere (e.g. by the scheduler)."""
+        self._timezones[tenant_id] = (tz, time.monotonic())
+
+    async def _get_generation(self, user_id: UUID) -> int:
+        try:
+            return int(await insight_cache.backend.get(self._generation_key(user_id)) or 0)
+        except Exception as e:
+            logger.warning(f"Briefing cache unavailable reading generation for user {user_id}: {e}")
+            return -1
+
+    async def _get_cached(self, user: models.User) -> Optional[Tuple[str, List[schemas.HighlightedTextSegment]]]:
+        generation = await self._get_generation(user.id)
+        if generation < 0:
+            return None
+        try:
+            raw = await insight_cache.backend.get(self._cache_key(user.id))
+        except Exception as e:
+            logger.warning(f"Briefing cache get failed for user {user.id}: {e}")
+            return None
+        if raw is None:
+            return None
+        cached = json.loads(raw)
+        if cached.get("expires_at", 0) <= time.time() or cached.get("generation") != generation:
+            return None
+        highlighted = [schemas.HighlightedTextSegment.model_validate(segment) for segment in cached["highlighted"]]
+        return cached["summary"], highlighted
+
+    async def _store(
+        self,
+        user: models.User,
+        generation: int,
+        tz: ZoneInfo,
+        summary: str,
+        highlighted: List[schemas.HighlightedTextSegment],
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        expires_at = min(end_of_day(now, tz), now + timedelta(seconds=BRIEFING_CACHE_MAX_AGE))
+        value = {
+            "expires_at": expires_at.timestamp(),
+            "generation": generation,
+            "summary": summary,
+            "highlighted": [segment.model_dump() for segment in highlighted],
+        }
+        expire = max(1, int((expires_at - now).total_seconds()))
+        try:
+            await insight_cache.backend.set(self._cache_key(user.id), json.dumps(value), expire=expire)
+        except Exception as e:
+            logger.warning(f"Briefing cache set failed for user {user.id}: {e}")
+
+    async def invalidate(self, user_id: UUID) -> None:
+        """Drop the user's cached briefing, e.g. after new activity or calendar changes."""
+        try:
+            await insight_cache.backend.incr(self._generation_key(user_id))
+        except Exception as e:
+            logger.warning(f"Briefing cache unavailable invalidating user {user_id}: {e}")
+
+    # --- Briefing ---
+
     async def get_daily_briefing(self, db: AsyncSession, user: models.User) -> Tuple[str, List[schemas.HighlightedTextSegment]]:
         """
-        Generates a daily briefing summary for the user with entity highlighting.
+        Returns the user's daily briefing summary with entity highlighting.
+
+        Served from the cache when today's briefing is still current;
+        otherwise built once (concurrent requests for the same user share
+        the build).
 
         Returns:
             Tuple of (plain_text_summary, highlighted_summary_segments)
@@ -32,10 +182,83 @@ class BriefingService:
             mock_summary = "Welcome to your daily briefing! You have a team meeting at 2 PM today. Yesterday, you updated the Main Project documentation."
             highlighted_summary = [schemas.HighlightedTextSegment(type="text", content=mock_summary)]
             return mock_summary, highlighted_summary
-            
-        # 1. Fetch Input Data 
-        calendar_summary = await self._get_calendar_summary(user)
-        activity_summary = await self._get_activity_summary(db, user)
+
+        cached = await self._get_cached(user)
+        if cached is not None:
+            return cached
+
+        summary, highlighted_summary, _ = await self._shared_build(user)
+        return summary, highlighted_summary
+
+    async def pregenerate(self, user: models.User) -> bool:
+        """
+        Build and cache the user's briefing unless a current one is cached.
+
+        Returns:
+            True if a current briefing is cached afterwards, False if the
+            build was degraded (a source timed out or the LLM failed)
+        """
+        if await self._get_cached(user) is not None:
+            return True
+        _, _, complete = await self._shared_build(user)
+        return complete
+
+    async def _shared_build(self, user: models.User) -> Tuple[str, List[schemas.HighlightedTextSegment], bool]:
+        task = self._inflight.get(user.id)
+        if task is None:
+            task = asyncio.create_task(self._build_and_store(user))
+            self._inflight[user.id] = task
+            task.add_done_callback(lambda _, user_id=user.id: self._inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _build_and_store(self, user: models.User) -> Tuple[str, List[schemas.HighlightedTextSegment], bool]:
+        # Read before building, so an invalidation during the build is not masked
+        generation = await self._get_generation(user.id)
+        # Own session: the build is shared and may outlive the request that started it
+        async with SessionLocal() as db:
+            summary, highlighted_summary, complete = await self._build_briefing(db, user)
+            tz = await self.get_tenant_timezone(db, user.tenant_id) if complete and generation >= 0 else None
+        if tz is not None:
+            await self._store(user, generation, tz, summary, highlighted_summary)
+        return summary, highlighted_summary, complete
+
+    @staticmethod
+    async def _with_timeout(source: str, coroutine, timeout: float) -> Any:
+        try:
+            return await asyncio.wait_for(coroutine, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Briefing source '{source}' timed out after {timeout}s")
+            raise _SourceUnavailable(source)
+
+    async def _get_activity_and_warm_entities(self, db: AsyncSession, user: models.User) -> Optional[str]:
+        # Both use the request's session, which cannot run queries concurrently
+        try:
+            return await self._with_timeout("activity", self._get_activity_summary(db, user), ACTIVITY_TIMEOUT)
+        finally:
+            await entity_recognition_service.prepare(db, user.tenant_id)
+
+    async def _build_briefing(
+        self, db: AsyncSession, user: models.User
+    ) -> Tuple[str, List[schemas.HighlightedTextSegment], bool]:
+        """
+        Build the briefing from fresh inputs.
+
+        Returns:
+            Tuple of (summary, highlighted segments, whether all inputs were available)
+        """
+        # 1. Fetch Input Data concurrently, each source bounded by its own timeout
+        calendar_result, activity_result = await asyncio.gather(
+            self._with_timeout("calendar", self._get_calendar_summary(user), CALENDAR_TIMEOUT),
+            self._get_activity_and_warm_entities(db, user),
+            return_exceptions=True,
+        )
+        # Timed-out sources may answer on the next attempt, so such briefings are not cached
+        complete = not any(isinstance(result, _SourceUnavailable) for result in (calendar_result, activity_result))
+        calendar_summary = None if isinstance(calendar_result, BaseException) else calendar_result
+        activity_summary = None if isinstance(activity_result, BaseException) else activity_result
+        for source, result in (("calendar", calendar_result), ("activity", activity_result)):
+            if isinstance(result, BaseException) and not isinstance(result, _SourceUnavailable):
+                logger.error(f"Briefing source '{source}' failed for user {user.id}: {result}")
 
         # Combine data for the prompt
         prompt_context = "Here is information about my day:\n\n"
@@ -61,7 +284,14 @@ class BriefingService:
         )
 
         # 3. Call LLM Service
-        summary = await llm_service.generate_summary(prompt=prompt, max_tokens=200, temperature=0.5)
+        try:
+            summary = await self._with_timeout(
+                "llm", llm_service.generate_summary(prompt=prompt, max_tokens=200, temperature=0.5), LLM_TIMEOUT
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate briefing summary for user {user.id}: {e}")
+            fallback = self._fallback_summary(calendar_summary, activity_summary)
+            return fallback, [schemas.HighlightedTextSegment(type="text", content=fallback)], False
 
         # 4. Process the summary with entity recognition
         try:
@@ -71,36 +301,21 @@ class BriefingService:
             # If entity recognition fails, return a simple text segment
             highlighted_summary = [schemas.HighlightedTextSegment(type="text", content=summary)]
 
-        return summary, highlighted_summary
+        return summary, highlighted_summary, complete
 
-    async def _get_available_calendar_sources(self, user: models.User) -> List[str]:
-        """
-        Determine which calendar sources are available for the user.
-        
-        Args:
-            user: User model with potential calendar tokens
-            
-        Returns:
-            List of available sources in order of preference
-        """
-        sources = []
-        
-        # Check for Google Calendar credentials
-        if user.google_access_token and user.google_refresh_token:
-            sources.append("google")
-            
-        # Check for Microsoft Outlook credentials
-        if user.microsoft_access_token and user.microsoft_refresh_token:
-            sources.append("microsoft")
-            
-        # If we have both, Google is already first due to append order
-        # This establishes the default preference order
-        
-        return sources
+    @staticmethod
+    def _fallback_summary(calendar_summary: Optional[str], activity_summary: Optional[str]) -> str:
+        """Plain summary of the inputs, used when the LLM is unavailable."""
+        parts = []
+        if calendar_summary:
+            parts.append(f"Today's calendar:\n{calendar_summary}")
+        if activity_summary:
+            parts.append(f"Your recent activity:\n{activity_summary}")
+        return "\n\n".join(parts) or "Your briefing is not available right now. Please check back shortly."
 
     async def _get_calendar_summary(self, user: models.User, preferred_source: Optional[str] = None) -> Optional[str]:
         """
-        Fetches and summarizes today's calendar events from the appropriate service.
+        Summarizes today's calendar events from the local calendar store.
         
         Args:
             user: User model with calendar credentials
@@ -110,66 +325,59 @@ class BriefingService:
             String summary of calendar events or None if no events/error
         """
         # Determine available calendar sources
-        available_sources = await self._get_available_calendar_sources(user)
+        available_sources = calendar_sources(user)
         
         if not available_sources:
             logger.warning(f"No calendar sources available for user {user.id}")
             return None
             
-        # If preferred source is specified and available, use that first
+        # If preferred source is specified and available, use that first (it wins duplicates)
         if preferred_source and preferred_source in available_sources:
             # Move preferred source to the front
             available_sources = [s for s in available_sources if s != preferred_source]
             available_sources.insert(0, preferred_source)
-        
-        # Try sources in order until one succeeds
-        for source in available_sources:
-            try:
-                if source == "google":
-                    # Try Google Calendar
-                    service = await get_google_calendar_service(user=user, db=None)
-                    if service:
-                        events = await get_google_calendar_events(service=service)
-                        if events:
-                            # Format events into a simple list string
-                            event_lines = []
-                            for event in events[:5]:  # Limit number of events shown
-                                start_time_str = event.get('start', {}).get('dateTime', event.get('start', {}).get('date'))
-                                summary = event.get('summary', '(No Title)')
-                                time_str = "All-day" if 'date' in event.get('start', {}) else datetime.fromisoformat(start_time_str).strftime('%I:%M %p')
-                                event_lines.append(f"- {time_str}: {summary} [Google]")
-                            return "\n".join(event_lines)
-                            
-                elif source == "microsoft":
-                    # Try Microsoft Outlook
-                    service = await get_microsoft_outlook_service(user=user, db=None)
-                    if service:
-                        events = await get_microsoft_calendar_events(service)
-                        if events:
-                            # Format events into a simple list string
-                            event_lines = []
-                            for event in events[:5]:  # Limit number of events shown
-                                # Microsoft uses "subject" instead of "summary"
-                                start_time = event.get('start', {}).get('dateTime')
-                                subject = event.get('subject', '(No Title)')
-                                
-                                # Format time string
-                                if start_time:
-                                    time_str = datetime.fromisoformat(start_time.replace('Z', '+00:00')).strftime('%I:%M %p')
-                                else:
-                                    time_str = "All-day"
-                                    
-                                # Add online meeting information if available
-                                meeting_tag = " [Teams]" if event.get('isOnlineMeeting', False) else " [Outlook]"
-                                event_lines.append(f"- {time_str}: {subject}{meeting_tag}")
-                            return "\n".join(event_lines)
-            
-            except Exception as e:
-                logger.error(f"Failed to get calendar summary for user {user.id} from {source}: {e}")
-                continue  # Try next source
-        
-        # If we get here, all sources failed
-        return None
+
+        # Own session: runs concurrently with the activity fetch on the build's session
+        async with SessionLocal() as db:
+            # "Today" is the tenant's local day, not the UTC day
+            tz = await self.get_tenant_timezone(db, user.tenant_id)
+            now = datetime.now(timezone.utc)
+            today_start = datetime.combine(now.astimezone(tz).date(), datetime.min.time(), tzinfo=tz)
+            stored = await calendar_sync_service.get_events(
+                db, user, today_start, end_of_day(now, tz),
+                sources=available_sources, max_wait=CALENDAR_TIMEOUT / 2,
+            )
+
+        # Events of all sources, each shared event once
+        events = merge_events(stored, available_sources)
+        if not events:
+            return None
+
+        # Format events into a simple list string
+        event_lines = []
+        for stored_event in events[:5]:  # Limit number of events shown
+            event = stored_event.data
+            if stored_event.source == "google":
+                start_time_str = event.get('start', {}).get('dateTime', event.get('start', {}).get('date'))
+                summary = event.get('summary', '(No Title)')
+                time_str = "All-day" if 'date' in event.get('start', {}) else datetime.fromisoformat(start_time_str).astimezone(tz).strftime('%I:%M %p')
+                event_lines.append(f"- {time_str}: {summary} [Google]")
+            else:
+                # Microsoft uses "subject" instead of "summary"
+                start_time = event.get('start', {}).get('dateTime')
+                subject = event.get('subject', '(No Title)')
+                if start_time and not event.get('isAllDay', False):
+                    # Graph returns UTC times (see GRAPH_PREFER), without an offset
+                    start = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
+                    if start.tzinfo is None:
+                        start = start.replace(tzinfo=timezone.utc)
+                    time_str = start.astimezone(tz).strftime('%I:%M %p')
+                else:
+                    time_str = "All-day"
+                # Add online meeting information if available
+                meeting_tag = " [Teams]" if event.get('isOnlineMeeting', False) else " [Outlook]"
+                event_lines.append(f"- {time_str}: {subject}{meeting_tag}")
+        return "\n".join(event_lines)
 
     async def _get_activity_summary(self, db: AsyncSession, user: models.User) -> Optional[str]:
         """Fetches and summarizes recent user activity."""
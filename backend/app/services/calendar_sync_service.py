@@ -0,0 +1,647 @@
+"""
+Calendar Sync Service
+
+Keeps a local store of each user's calendar events (``calendar_events``)
+current with incremental provider sync, so calendar pages and briefings read
+events from the database instead of calling Google or Microsoft per request.
+
+- Google: ``events.list`` with the ``nextSyncToken`` of the previous sync;
+  cancelled events are deletions.
+- Microsoft: Graph ``calendarView/delta``, resumed from the stored
+  ``@odata.deltaLink``; ``@removed`` items are deletions.
+
+A full sync covers [now - CALENDAR_SYNC_PAST_DAYS, now + CALENDAR_SYNC_FUTURE_DAYS]
+and is redone when the provider expires the sync token (HTTP 410) or the
+window's remaining future falls below half its length. Reads only return
+events the window covers; ``covers`` tells whether a range is inside it and
+``fetch_live`` reads ranges outside it from the providers without storing them.
+
+The background refresher syncs every provider of users who logged in within
+CALENDAR_SYNC_ACTIVE_USER_DAYS once per CALENDAR_SYNC_INTERVAL. Reads check
+the freshness bound (CALENDAR_MAX_STALENESS) and only sync inline, for at
+most a short wait, when the refresher has fallen behind. Syncs of the same
+user and provider are coalesced within a process and serialized across
+workers by a lock in the shared cache backend. Listeners registered with
+``add_listener`` are called with the user ID whenever a sync changed events.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import googleapiclient.errors
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.models.calendar_event import CalendarEvent, CalendarSyncState
+from app.models.user import User
+from app.services.google_calendar import get_google_calendar_service
+from app.services.microsoft_outlook_service import MICROSOFT_GRAPH_BASE_URL, get_microsoft_outlook_service
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_SYNC_INTERVAL = int(os.getenv("CALENDAR_SYNC_INTERVAL_SECONDS", "300"))
+CALENDAR_SYNC_CHECK_INTERVAL = int(os.getenv("CALENDAR_SYNC_CHECK_SECONDS", "60"))
+CALENDAR_MAX_STALENESS = int(os.getenv("CALENDAR_MAX_STALENESS_SECONDS", "900"))
+CALENDAR_INLINE_SYNC_TIMEOUT = float(os.getenv("CALENDAR_INLINE_SYNC_TIMEOUT_SECONDS", "10"))
+CALENDAR_SYNC_PAST_DAYS = int(os.getenv("CALENDAR_SYNC_PAST_DAYS", "30"))
+CALENDAR_SYNC_FUTURE_DAYS = int(os.getenv("CALENDAR_SYNC_FUTURE_DAYS", "180"))
+CALENDAR_SYNC_ACTIVE_USER_DAYS = int(os.getenv("CALENDAR_SYNC_ACTIVE_USER_DAYS", "14"))
+CALENDAR_SYNC_CONCURRENCY = int(os.getenv("CALENDAR_SYNC_CONCURRENCY", "4"))
+# Upper bound on one sync; the cross-worker lock expires after it
+SYNC_LOCK_TTL = 120
+GOOGLE_PAGE_SIZE = 250
+# Rows per upsert statement, well below the PostgreSQL bind parameter limit
+UPSERT_BATCH_SIZE = 500
+GRAPH_PREFER = 'outlook.timezone="UTC", odata.maxpagesize=100'
+
+CalendarListener = Callable[[uuid.UUID], Awaitable[None]]
+
+
+class CalendarSyncError(Exception):
+    """Raised when a provider cannot be synced."""
+    pass
+
+
+class _SyncTokenExpired(Exception):
+    """The provider no longer accepts the stored sync token; a full sync is needed."""
+    pass
+
+
+def calendar_sources(user: User) -> List[str]:
+    """Calendar providers the user has connected, in order of preference."""
+    sources = []
+    if user.google_access_token and user.google_refresh_token:
+        sources.append("google")
+    if getattr(user, "microsoft_access_token", None) and getattr(user, "microsoft_refresh_token", None):
+        sources.append("microsoft")
+    return sources
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a provider timestamp; naive values (Graph with the UTC preference) are UTC."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _google_row(user: User, event: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    start, end = event.get("start", {}), event.get("end", {})
+    return {
+        "user_id": user.id,
+        "source": "google",
+        "event_id": event["id"],
+        "tenant_id": user.tenant_id,
+        "ical_uid": event.get("iCalUID"),
+        "start_at": _parse_time(start.get("dateTime") or start.get("date")),
+        "end_at": _parse_time(end.get("dateTime") or end.get("date")),
+        "is_all_day": "date" in start,
+        "data": event,
+        "synced_at": now,
+    }
+
+
+def _microsoft_row(user: User, event: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    return {
+        "user_id": user.id,
+        "source": "microsoft",
+        "event_id": event["id"],
+        "tenant_id": user.tenant_id,
+        "ical_uid": event.get("iCalUId"),
+        "start_at": _parse_time(event.get("start", {}).get("dateTime")),
+        "end_at": _parse_time(event.get("end", {}).get("dateTime")),
+        "is_all_day": bool(event.get("isAllDay", False)),
+        "data": event,
+        "synced_at": now,
+    }
+
+
+def _list_google_events(service, sync_token: Optional[str], window: Optional[Tuple[datetime, datetime]]):
+    """Page through ``events.list`` (blocking); returns (events, next sync token)."""
+    events: List[Dict[str, Any]] = []
+    page_token = None
+    while True:
+        params: Dict[str, Any] = {"calendarId": "primary", "singleEvents": True, "maxResults": GOOGLE_PAGE_SIZE}
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            params["timeMin"] = window[0].isoformat()
+            params["timeMax"] = window[1].isoformat()
+        if page_token:
+            params["pageToken"] = page_token
+        try:
+            result = service.events().list(**params).execute()
+        except googleapiclient.errors.HttpError as e:
+            if sync_token and e.resp.status == 410:
+                raise _SyncTokenExpired() from e
+            raise
+        events.extend(result.get("items", []))
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return events, result.get("nextSyncToken")
+
+
+def merge_events(events: List[CalendarEvent], sources: List[str]) -> List[CalendarEvent]:
+    """
+    Merge stored events of several providers, ordered by start.
+
+    An event present at several providers (same iCalUID and start time, e.g. a
+    meeting invite accepted in both calendars) is kept once, from the first
+    of ``sources``.
+    """
+    rank = {source: index for index, source in enumerate(sources)}
+    merged: Dict[Any, CalendarEvent] = {}
+    for event in sorted(events, key=lambda e: rank.get(e.source, len(rank))):
+        key = (event.ical_uid, event.start_at) if event.ical_uid else (event.source, event.event_id)
+        merged.setdefault(key, event)
+    far_past = datetime.min.replace(tzinfo=timezone.utc)
+    return sorted(merged.values(), key=lambda e: (e.start_at or far_past, rank.get(e.source, len(rank))))
+
+
+class CalendarSyncService:
+    """Incremental calendar sync into the local event store, and reads from it."""
+
+    def __init__(
+        self,
+        sync_interval: int = CALENDAR_SYNC_INTERVAL,
+        check_interval: int = CALENDAR_SYNC_CHECK_INTERVAL,
+        concurrency: int = CALENDAR_SYNC_CONCURRENCY,
+    ):
+        self.sync_interval = sync_interval
+        self.check_interval = check_interval
+        self.concurrency = concurrency
+        self._listeners: List[CalendarListener] = []
+        # In-flight syncs per (user ID, source), shared by concurrent callers
+        self._inflight: Dict[Tuple[uuid.UUID, str], asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        # (user ID, source) pairs the refresher has queued or is syncing
+        self._queued: Set[Tuple[uuid.UUID, str]] = set()
+        self._token = str(uuid.uuid4())
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_listener(self, listener: CalendarListener) -> None:
+        """Register an async callback invoked with the user ID when their events change."""
+        self._listeners.append(listener)
+
+    # --- Reads ---
+
+    async def get_events(
+        self,
+        db: AsyncSession,
+        user: User,
+        start: datetime,
+        end: datetime,
+        sources: Optional[List[str]] = None,
+        max_wait: float = CALENDAR_INLINE_SYNC_TIMEOUT,
+    ) -> List[CalendarEvent]:
+        """
+        Stored events of the user overlapping [start, end), ordered by start.
+
+        Providers whose last sync attempt is older than CALENDAR_MAX_STALENESS
+        are synced first, waiting at most ``max_wait`` seconds; past that the
+        sync continues in the background and the stored events are returned.
+
+        Args:
+            db: Database session
+            user: User whose events to read
+            start: Range start (inclusive)
+            end: Range end (exclusive)
+            sources: Providers to read; defaults to all connected ones
+            max_wait: Seconds to wait for an inline sync
+
+        Returns:
+            List of stored CalendarEvent rows
+        """
+        sources = calendar_sources(user) if sources is None else sources
+        if not sources:
+            return []
+        await self.ensure_fresh(db, user.id, sources, max_wait)
+        return await self.stored_events(db, user.id, start, end, sources)
+
+    async def stored_events(
+        self, db: AsyncSession, user_id: uuid.UUID, start: datetime, end: datetime, sources: List[str]
+    ) -> List[CalendarEvent]:
+        """Stored events of the user overlapping [start, end), ordered by start, without syncing."""
+        result = await db.execute(
+            select(CalendarEvent)
+            .where(
+                CalendarEvent.user_id == user_id,
+                CalendarEvent.source.in_(sources),
+                CalendarEvent.start_at < end,
+                or_(CalendarEvent.start_at >= start, CalendarEvent.end_at > start),
+            )
+            .order_by(CalendarEvent.start_at)
+        )
+        return list(result.scalars().all())
+
+    async def get_sync_states(self, db: AsyncSession, user_id: uuid.UUID) -> Dict[str, CalendarSyncState]:
+        """Sync state per provider for the user, as currently committed."""
+        result = await db.execute(
+            select(CalendarSyncState)
+            .where(CalendarSyncState.user_id == user_id)
+            # Syncs commit in their own sessions; reload rows this session has seen before
+            .execution_options(populate_existing=True)
+        )
+        return {state.source: state for state in result.scalars().all()}
+
+    def covers(
+        self, states: Dict[str, CalendarSyncState], sources: List[str], start: datetime, end: datetime
+    ) -> bool:
+        """
+        Whether [start, end) lies within the synced window of every source.
+
+        The past bound is the retention horizon (CALENDAR_SYNC_PAST_DAYS); the
+        future bound is the window end of each source's last full sync, or the
+        nominal window for sources not synced yet.
+        """
+        now = datetime.now(timezone.utc)
+        if start < now - timedelta(days=CALENDAR_SYNC_PAST_DAYS):
+            return False
+        for source in sources:
+            state = states.get(source)
+            window_end = state.window_end if state is not None else None
+            if end > (window_end or now + timedelta(days=CALENDAR_SYNC_FUTURE_DAYS)):
+                return False
+        return True
+
+    async def fetch_live(
+        self, db: AsyncSession, user: User, start: datetime, end: datetime, sources: List[str]
+    ) -> Tuple[List[CalendarEvent], Dict[str, str]]:
+        """
+        Events of the user in [start, end) read directly from the providers.
+
+        Used for ranges outside the synced window. The events are transient
+        CalendarEvent objects that are not added to the store.
+
+        Returns:
+            Tuple of (events, error message per failed source)
+        """
+        now = datetime.now(timezone.utc)
+        events: List[CalendarEvent] = []
+        errors: Dict[str, str] = {}
+        # Sequential: the provider clients may refresh tokens through ``db``
+        for source in sources:
+            try:
+                if source == "google":
+                    service = await get_google_calendar_service(user=user, db=db)
+                    if service is None:
+                        raise CalendarSyncError("Google Calendar credentials are not valid")
+                    items, _ = await asyncio.to_thread(_list_google_events, service, None, (start, end))
+                    rows = [_google_row(user, item, now) for item in items if item.get("status") != "cancelled"]
+                elif source == "microsoft":
+                    client = await get_microsoft_outlook_service(user=user, db=db)
+                    if client is None:
+                        raise CalendarSyncError("Microsoft Outlook credentials are not valid")
+                    try:
+                        items, _ = await self._list_graph_delta(
+                            client,
+                            f"{MICROSOFT_GRAPH_BASE_URL}/me/calendarView/delta",
+                            {"startDateTime": start.isoformat(), "endDateTime": end.isoformat()},
+                        )
+                    finally:
+                        await client.aclose()
+                    rows = [
+                        _microsoft_row(user, item, now) for item in items
+                        if "@removed" not in item and not item.get("isCancelled")
+                    ]
+                else:
+                    raise CalendarSyncError(f"Unknown calendar source '{source}'")
+            except Exception as e:
+                errors[source] = str(e)[:500] or e.__class__.__name__
+                logger.warning(f"Live calendar fetch of user {user.id} from {source} failed: {errors[source]}")
+                continue
+            events.extend(CalendarEvent(**row) for row in rows)
+        return events, errors
+
+    async def ensure_fresh(
+        self,
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        sources: List[str],
+        max_wait: float = CALENDAR_INLINE_SYNC_TIMEOUT,
+    ) -> Set[str]:
+        """
+        Sync the providers whose store is older than the freshness bound.
+
+        Providers are synced concurrently, each waited for at most
+        ``max_wait`` seconds, so the wait is bounded by the slowest provider
+        and the deadline rather than their sum.
+
+        Returns:
+            Providers whose sync was still running at the deadline
+        """
+        states = await self.get_sync_states(db, user_id)
+        threshold = datetime.now(timezone.utc) - timedelta(seconds=CALENDAR_MAX_STALENESS)
+        stale = [
+            source for source in sources
+            if source not in states
+            or states[source].last_attempted_at is None
+            or states[source].last_attempted_at < threshold
+        ]
+        if not stale:
+            return set()
+        finished = await asyncio.gather(*(self._wait_for_sync(user_id, source, max_wait) for source in stale))
+        pending = {source for source, done in zip(stale, finished) if not done}
+        if pending:
+            logger.warning(
+                f"Calendar sync of user {user_id} from {', '.join(sorted(pending))} still running "
+                f"after {max_wait}s; serving stored events"
+            )
+        return pending
+
+    async def _wait_for_sync(self, user_id: uuid.UUID, source: str, max_wait: float) -> bool:
+        try:
+            await asyncio.wait_for(self.sync(user_id, source), max_wait)
+        except asyncio.TimeoutError:
+            return False
+        except Exception as e:
+            logger.error(f"Calendar sync of user {user_id} from {source} failed: {e}")
+        return True
+
+    # --- Sync ---
+
+    async def sync(self, user_id: uuid.UUID, source: str) -> bool:
+        """
+        Sync one provider of a user into the store.
+
+        Concurrent calls for the same user and provider share one sync, which
+        runs to completion even if the callers stop waiting.
+
+        Returns:
+            True if the sync succeeded, False if it failed or another worker
+            was already syncing
+        """
+        key = (user_id, source)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._sync(user_id, source))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _sync(self, user_id: uuid.UUID, source: str) -> bool:
+        lock_key = f"calendar:sync:{user_id}:{source}"
+        try:
+            if not await insight_cache.backend.acquire_lock(lock_key, self._token, SYNC_LOCK_TTL):
+                return False
+        except Exception as e:
+            logger.warning(f"Calendar sync lock unavailable for user {user_id}: {e}")
+
+        try:
+            changed = False
+            async with SessionLocal() as db:
+                user = await db.get(User, user_id)
+                if user is None:
+                    return False
+                state = await db.get(CalendarSyncState, (user_id, source))
+                if state is None:
+                    state = CalendarSyncState(user_id=user_id, source=source)
+                    db.add(state)
+
+                now = datetime.now(timezone.utc)
+                try:
+                    if source == "google":
+                        changed = await self._sync_google(db, user, state, now)
+                    elif source == "microsoft":
+                        changed = await self._sync_microsoft(db, user, state, now)
+                    else:
+                        raise CalendarSyncError(f"Unknown calendar source '{source}'")
+                    state.last_synced_at = now
+                    state.last_error = None
+                    ok = True
+                except Exception as e:
+                    # Keep the stored events; the error is recorded for source status
+                    await db.rollback()
+                    state = await db.get(CalendarSyncState, (user_id, source)) or CalendarSyncState(
+                        user_id=user_id, source=source
+                    )
+                    state.last_error = str(e)[:500] or e.__class__.__name__
+                    logger.warning(f"Calendar sync of user {user_id} from {source} failed: {state.last_error}")
+                    changed = False
+                    ok = False
+
+                state.last_attempted_at = now
+                db.add(state)
+                await db.commit()
+
+            if changed:
+                await self._notify(user_id)
+            return ok
+        finally:
+            try:
+                await insight_cache.backend.release_lock(lock_key, self._token)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _window(now: datetime) -> Tuple[datetime, datetime]:
+        return now - timedelta(days=CALENDAR_SYNC_PAST_DAYS), now + timedelta(days=CALENDAR_SYNC_FUTURE_DAYS)
+
+    @staticmethod
+    def _needs_full_sync(state: CalendarSyncState, now: datetime) -> bool:
+        if not state.sync_token or state.window_end is None:
+            return True
+        return state.window_end - now < timedelta(days=CALENDAR_SYNC_FUTURE_DAYS / 2)
+
+    async def _sync_google(self, db: AsyncSession, user: User, state: CalendarSyncState, now: datetime) -> bool:
+        service = await get_google_calendar_service(user=user, db=db)
+        if service is None:
+            raise CalendarSyncError("Google Calendar credentials are not valid")
+
+        full = self._needs_full_sync(state, now)
+        if not full:
+            try:
+                events, sync_token = await asyncio.to_thread(_list_google_events, service, state.sync_token, None)
+            except _SyncTokenExpired:
+                logger.info(f"Google sync token of user {user.id} expired; running a full sync")
+                full = True
+        if full:
+            window = self._window(now)
+            events, sync_token = await asyncio.to_thread(_list_google_events, service, None, window)
+            state.window_start, state.window_end = window
+
+        rows = [_google_row(user, event, now) for event in events if event.get("status") != "cancelled"]
+        removed = [event["id"] for event in events if event.get("status") == "cancelled"]
+        changed = await self._apply(db, user, "google", rows, removed, replace=full, now=now)
+        state.sync_token = sync_token
+        return changed
+
+    async def _sync_microsoft(self, db: AsyncSession, user: User, state: CalendarSyncState, now: datetime) -> bool:
+        client = await get_microsoft_outlook_service(user=user, db=db)
+        if client is None:
+            raise CalendarSyncError("Microsoft Outlook credentials are not valid")
+
+        try:
+            full = self._needs_full_sync(state, now)
+            if not full:
+                try:
+                    events, delta_link = await self._list_graph_delta(client, state.sync_token)
+                except _SyncTokenExpired:
+                    logger.info(f"Graph delta link of user {user.id} expired; running a full sync")
+                    full = True
+            if full:
+                window = self._window(now)
+                events, delta_link = await self._list_graph_delta(
+                    client,
+                    f"{MICROSOFT_GRAPH_BASE_URL}/me/calendarView/delta",
+                    {"startDateTime": window[0].isoformat(), "endDateTime": window[1].isoformat()},
+                )
+                state.window_start, state.window_end = window
+        finally:
+            await client.aclose()
+
+        def is_removed(event: Dict[str, Any]) -> bool:
+            return "@removed" in event or bool(event.get("isCancelled"))
+
+        rows = [_microsoft_row(user, event, now) for event in events if not is_removed(event)]
+        removed = [event["id"] for event in events if is_removed(event)]
+        changed = await self._apply(db, user, "microsoft", rows, removed, replace=full, now=now)
+        state.sync_token = delta_link
+        return changed
+
+    @staticmethod
+    async def _list_graph_delta(client, url: str, params: Optional[Dict[str, str]] = None):
+        """Follow a Graph delta query to its end; returns (events, delta link)."""
+        events: List[Dict[str, Any]] = []
+        while True:
+            response = await client.get(url, params=params, headers={"Prefer": GRAPH_PREFER}, timeout=30.0)
+            if response.status_code == 410:
+                raise _SyncTokenExpired()
+            if response.status_code != 200:
+                raise CalendarSyncError(f"Graph delta query failed: {response.status_code}")
+            data = response.json()
+            events.extend(data.get("value", []))
+            next_link = data.get("@odata.nextLink")
+            if not next_link:
+                return events, data.get("@odata.deltaLink")
+            url, params = next_link, None
+
+    async def _apply(
+        self,
+        db: AsyncSession,
+        user: User,
+        source: str,
+        rows: List[Dict[str, Any]],
+        removed: List[str],
+        replace: bool,
+        now: datetime,
+    ) -> bool:
+        """Write a sync's changes to the store; a full sync replaces the provider's events."""
+        owned = and_(CalendarEvent.user_id == user.id, CalendarEvent.source == source)
+        if replace:
+            await db.execute(delete(CalendarEvent).where(owned))
+        elif removed:
+            await db.execute(delete(CalendarEvent).where(owned, CalendarEvent.event_id.in_(removed)))
+
+        # One row per event; a page boundary can repeat an event within a sync
+        unique = list({row["event_id"]: row for row in rows}.values())
+        for offset in range(0, len(unique), UPSERT_BATCH_SIZE):
+            statement = insert(CalendarEvent).values(unique[offset:offset + UPSERT_BATCH_SIZE])
+            await db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id", "source", "event_id"],
+                    set_={
+                        column: statement.excluded[column]
+                        for column in ("ical_uid", "start_at", "end_at", "is_all_day", "data", "synced_at")
+                    },
+                )
+            )
+
+        # Incremental syncs also report changes to events that have left the window
+        horizon = now - timedelta(days=CALENDAR_SYNC_PAST_DAYS)
+        await db.execute(
+            delete(CalendarEvent).where(
+                owned,
+                or_(CalendarEvent.end_at < horizon, and_(CalendarEvent.end_at.is_(None), CalendarEvent.start_at < horizon)),
+            )
+        )
+        return replace or bool(unique) or bool(removed)
+
+    async def _notify(self, user_id: uuid.UUID) -> None:
+        for listener in self._listeners:
+            try:
+                await listener(user_id)
+            except Exception as e:
+                logger.warning(f"Calendar change listener failed for user {user_id}: {e}")
+
+    # --- Background refresher ---
+
+    async def refresh_due(self) -> int:
+        """
+        Sync every provider of active users that was not synced within the interval.
+
+        Returns:
+            Number of syncs started
+        """
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=CALENDAR_SYNC_ACTIVE_USER_DAYS)
+        async with SessionLocal() as db:
+            result = await db.execute(select(User).where(User.last_login_at >= cutoff))
+            users = [user for user in result.scalars().all() if user.auth_provider != "mock"]
+            result = await db.execute(
+                select(CalendarSyncState.user_id, CalendarSyncState.source, CalendarSyncState.last_attempted_at)
+            )
+            attempted = {(user_id, source): at for user_id, source, at in result.all()}
+
+        due_before = now - timedelta(seconds=self.sync_interval)
+        due = [
+            (user.id, source)
+            for user in users
+            for source in calendar_sources(user)
+            if (user.id, source) not in self._queued
+            and (attempted.get((user.id, source)) or datetime.min.replace(tzinfo=timezone.utc)) < due_before
+        ]
+        for user_id, source in due:
+            self._queued.add((user_id, source))
+            task = asyncio.create_task(self._refresh(user_id, source))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+        return len(due)
+
+    async def _refresh(self, user_id: uuid.UUID, source: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            async with self._semaphore:
+                await self.sync(user_id, source)
+        finally:
+            self._queued.discard((user_id, source))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_due()
+            except Exception as e:
+                logger.error(f"Calendar refresh check failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def start(self) -> None:
+        """Start the background refresher."""
+        if not self.started:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the refresher and cancel running syncs."""
+        tasks = [t for t in [self._task, *self._refresh_tasks, *self._inflight.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._refresh_tasks.clear()
+        self._queued.clear()
+
+
+# Singleton service instance
+calendar_sync_service = CalendarSyncService()
@@ -0,0 +1,329 @@
+"""
+Community Detection
+
+Louvain modularity optimisation over the sparse tenant adjacency matrix and a
+service that persists the resulting community IDs on nodes.
+
+Each Louvain level runs local moving (every node joins the neighbouring
+community with the best modularity gain) and then aggregates communities
+into super-nodes with S.T @ A @ S, where S is the node -> community
+indicator matrix. When the graph changed only a little since the last run,
+the first level starts from the previous partition instead of singletons
+(warm start), which typically converges in one or two passes.
+
+Community IDs are matched to the previous run by overlap, so unchanged
+communities keep their ID and only nodes that actually moved are updated.
+Other APIs read ``Node.community_id`` and the stored summary directly;
+detection itself is run by the insight precompute scheduler.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.graph_events import add_graph_listener
+from app.core.insight_cache import insight_cache
+from app.core.process_pool import run_in_process
+from app.models.node import Node
+from app.services.network_metrics import load_tenant_graph
+
+logger = logging.getLogger(__name__)
+
+# Warm start when fewer than this fraction of edges changed since the last run
+WARM_START_THRESHOLD = float(os.getenv("COMMUNITY_WARM_START_THRESHOLD", "0.1"))
+MAX_LEVELS = 10
+MAX_PASSES = 20
+SUMMARY_TOP_COMMUNITIES = 10
+
+
+def _contiguous(labels: np.ndarray) -> np.ndarray:
+    """Relabel arbitrary labels to 0..k-1."""
+    _, relabelled = np.unique(labels, return_inverse=True)
+    return relabelled.astype(np.int64)
+
+
+def _local_moving(
+    adjacency: sparse.csr_matrix, labels: np.ndarray, resolution: float, rng: np.random.Generator
+) -> bool:
+    """
+    Move single nodes between communities while modularity improves.
+
+    Mutates ``labels`` in place and returns whether any node moved. Node
+    neighbourhoods are small, so the inner loop works on plain Python lists;
+    per-node numpy calls would cost more than they save.
+    """
+    n = adjacency.shape[0]
+    indptr = adjacency.indptr.tolist()
+    indices = adjacency.indices.tolist()
+    weights = adjacency.data.tolist()
+    degree_array = np.asarray(adjacency.sum(axis=1)).ravel()
+    degrees = degree_array.tolist()
+    scale = resolution / degree_array.sum()
+    community_totals = np.bincount(labels, weights=degree_array, minlength=n).tolist()
+    node_labels = labels.tolist()
+
+    improved = False
+    order = rng.permutation(n).tolist()
+    for _ in range(MAX_PASSES):
+        moved = 0
+        for i in order:
+            links: Dict[int, float] = {}
+            for k in range(indptr[i], indptr[i + 1]):
+                j = indices[k]
+                if j != i:
+                    community = node_labels[j]
+                    links[community] = links.get(community, 0.0) + weights[k]
+            if not links:
+                continue
+
+            current = node_labels[i]
+            degree = degrees[i]
+            community_totals[current] -= degree
+
+            target = current
+            best_gain = links.get(current, 0.0) - community_totals[current] * degree * scale
+            for community, weight in links.items():
+                gain = weight - community_totals[community] * degree * scale
+                if gain > best_gain + 1e-12:
+                    target, best_gain = community, gain
+
+            community_totals[target] += degree
+            if target != current:
+                node_labels[i] = target
+                moved += 1
+
+        if moved == 0:
+            break
+        improved = True
+
+    labels[:] = node_labels
+    return improved
+
+
+def louvain(
+    adjacency: sparse.csr_matrix,
+    initial: Optional[np.ndarray] = None,
+    resolution: float = 1.0,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Louvain community detection.
+
+    Args:
+        adjacency: Symmetric CSR adjacency matrix
+        initial: Optional starting partition (one label per node) for warm starts
+        resolution: Modularity resolution parameter
+        seed: Seed for the node visiting order
+
+    Returns:
+        Array of community labels (0..k-1), one per node
+    """
+    n = adjacency.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    if adjacency.nnz == 0:
+        return np.arange(n, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    graph = sparse.csr_matrix(adjacency, dtype=np.float64)
+    node_to_community = _contiguous(initial) if initial is not None else np.arange(n, dtype=np.int64)
+    labels = node_to_community.copy()
+
+    for level in range(MAX_LEVELS):
+        improved = _local_moving(graph, labels, resolution, rng)
+        labels = _contiguous(labels)
+        if level > 0:
+            node_to_community = labels[node_to_community]
+        else:
+            node_to_community = labels.copy()
+        if not improved and level > 0:
+            break
+
+        communities = labels.max() + 1
+        if communities == graph.shape[0] and level > 0:
+            break
+        # Collapse each community into a super-node; internal edges become self-loops
+        indicator = sparse.csr_matrix(
+            (np.ones(labels.size), (np.arange(labels.size), labels)),
+            shape=(labels.size, communities),
+        )
+        graph = (indicator.T @ graph @ indicator).tocsr()
+        labels = np.arange(communities, dtype=np.int64)
+
+    return _contiguous(node_to_community)
+
+
+def modularity(adjacency: sparse.csr_matrix, labels: np.ndarray, resolution: float = 1.0) -> float:
+    """Newman modularity of a partition."""
+    total_weight = adjacency.sum()
+    if total_weight == 0:
+        return 0.0
+    degrees = np.asarray(adjacency.sum(axis=1)).ravel()
+    coo = adjacency.tocoo()
+    internal = coo.data[labels[coo.row] == labels[coo.col]].sum()
+    community_totals = np.bincount(labels, weights=degrees)
+    return float(internal / total_weight - resolution * np.sum((community_totals / total_weight) ** 2))
+
+
+def detect(adjacency: sparse.csr_matrix, initial: Optional[np.ndarray]) -> Dict[str, Any]:
+    """Run Louvain and score the result (executed in the analytics process pool)."""
+    labels = louvain(adjacency, initial=initial)
+    return {"labels": labels, "modularity": modularity(adjacency, labels)}
+
+
+def align_labels(labels: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """
+    Map new community labels onto previous community IDs by member overlap.
+
+    ``previous`` holds the old ID per node (-1 when unknown). Larger new
+    communities pick first; communities without a free match get new IDs.
+    """
+    members = defaultdict(list)
+    for node, label in enumerate(labels):
+        members[label].append(node)
+
+    taken = set()
+    mapping: Dict[int, int] = {}
+    next_id = int(previous.max()) + 1 if previous.size and previous.max() >= 0 else 0
+    for label in sorted(members, key=lambda lbl: -len(members[lbl])):
+        overlap = Counter(int(previous[node]) for node in members[label] if previous[node] >= 0)
+        for old_id, _ in overlap.most_common():
+            if old_id not in taken:
+                mapping[label] = old_id
+                taken.add(old_id)
+                break
+        else:
+            mapping[label] = next_id
+            next_id += 1
+    return np.array([mapping[label] for label in labels], dtype=np.int64)
+
+
+class CommunityService:
+    """Detects, persists and summarises node communities per tenant."""
+
+    def __init__(self, warm_start_threshold: float = WARM_START_THRESHOLD):
+        self.warm_start_threshold = warm_start_threshold
+        self._pending_changes: Dict[UUID, int] = defaultdict(int)
+        self._locks: Dict[UUID, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    @staticmethod
+    def _summary_key(tenant_id: UUID) -> str:
+        # Not generation-scoped: the summary stays readable until the next detection replaces it
+        return f"community_summary:{tenant_id}"
+
+    async def detect_communities(self, db: AsyncSession, tenant_id: UUID) -> Dict[str, Any]:
+        """
+        Run community detection for a tenant and persist community IDs on nodes.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+
+        Returns:
+            Community summary (count, modularity, largest communities)
+        """
+        async with self._locks[tenant_id]:
+            changes = self._pending_changes.pop(tenant_id, 0)
+            graph = await load_tenant_graph(db, tenant_id)
+
+            result = await db.execute(
+                select(Node.id, Node.community_id).where(Node.tenant_id == tenant_id)
+            )
+            stored = dict(result.all())
+            previous = np.array(
+                [stored.get(node_id) if stored.get(node_id) is not None else -1 for node_id in graph.node_ids],
+                dtype=np.int64,
+            )
+
+            known = previous >= 0
+            warm_start = (
+                graph.node_count > 0
+                and known.mean() > 0.5
+                and changes <= self.warm_start_threshold * max(1, graph.edge_count)
+            )
+            initial = None
+            if warm_start:
+                # Nodes without a community start as singletons
+                initial = previous.copy()
+                unknown = np.flatnonzero(~known)
+                initial[unknown] = previous.max() + 1 + np.arange(unknown.size)
+
+            detection = await run_in_process(detect, graph.adjacency, initial)
+            labels = align_labels(detection["labels"], previous)
+
+            changed = [
+                {"id": node_id, "community_id": int(label)}
+                for node_id, label, old in zip(graph.node_ids, labels, previous)
+                if label != old
+            ]
+            if changed:
+                await db.execute(update(Node), changed)
+                await db.commit()
+
+            sizes = Counter(int(label) for label in labels)
+            summary = {
+                "count": len(sizes),
+                "modularity": detection["modularity"],
+                "largest": [
+                    {"community_id": community_id, "size": size}
+                    for community_id, size in sizes.most_common(SUMMARY_TOP_COMMUNITIES)
+                ],
+                "warm_start": bool(warm_start),
+                "nodes_moved": len(changed),
+                "computed_at": datetime.now(timezone.utc).isoformat(),
+            }
+            try:
+                await insight_cache.backend.set(self._summary_key(tenant_id), json.dumps(summary))
+            except Exception as e:
+                logger.warning(f"Failed to store community summary for tenant {tenant_id}: {e}")
+
+            logger.info(
+                f"Detected {summary['count']} communities for tenant {tenant_id} "
+                f"(modularity {summary['modularity']:.3f}, warm_start={warm_start}, moved={len(changed)})"
+            )
+            return summary
+
+    async def get_summary(
+        self, db: AsyncSession, tenant_id: UUID, compute_if_missing: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read the stored community summary.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            compute_if_missing: Run detection now if the tenant has never been processed
+
+        Returns:
+            Community summary, or None if none is stored and computation was not requested
+        """
+        try:
+            cached = await insight_cache.backend.get(self._summary_key(tenant_id))
+        except Exception as e:
+            logger.warning(f"Failed to read community summary for tenant {tenant_id}: {e}")
+            cached = None
+        if cached is not None:
+            return json.loads(cached)
+        if compute_if_missing:
+            return await self.detect_communities(db, tenant_id)
+        return None
+
+    async def handle_delta(self, tenant_id: UUID, delta: Dict[str, Any]) -> None:
+        """Graph listener: count changes since the last run to decide on warm starts."""
+        self._pending_changes[tenant_id] += 1
+
+
+# Singleton service instance
+community_service = CommunityService()
+
+add_graph_listener(community_service.handle_delta)
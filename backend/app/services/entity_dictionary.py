@@ -0,0 +1,398 @@
+"""
+Entity Dictionary
+
+Per-tenant, in-process dictionary of the entities that
+EntityRecognitionService highlights (projects, teams, people, goals and
+knowledge assets), together with its compiled EntityMatcher.
+
+The dictionary is loaded from the database once per tenant. Afterwards:
+
+- local creates, updates and deletes arrive through the entity event hooks
+  and reprocess only the changed entity;
+- writes made by other workers are caught by a per-type
+  (count, max(updated_at)) fingerprint, checked at most every SYNC_INTERVAL
+  seconds, which loads only the changed rows.
+
+Every change bumps the dictionary version. The matcher is recompiled in a
+worker thread in the background; until it is ready, texts are matched with
+the previous matcher, so highlighting latency does not depend on tenant size.
+A sorted index over entity IDs, used to resolve IDs and ID prefixes quoted
+in generated text, is built alongside the matcher.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.goal import Goal
+from app.models.knowledge_asset import KnowledgeAsset
+from app.models.project import Project
+from app.models.team import Team
+from app.models.user import User
+from app.services.entity_matcher import EntityMatcher
+
+logger = logging.getLogger(__name__)
+
+SYNC_INTERVAL = float(os.getenv("ENTITY_DICTIONARY_SYNC_SECONDS", "5"))
+
+# Map entity collections to schema types
+ENTITY_TYPE_MAPPING = {
+    "projects": "project",
+    "teams": "team",
+    "users": "person",
+    "goals": "goal",
+    "knowledge_assets": "knowledge_asset"
+}
+
+# collection -> (model, attribute names passed to build_entity)
+ENTITY_SOURCES = {
+    "projects": (Project, ("name", "description")),
+    "teams": (Team, ("name", "description")),
+    "users": (User, ("name", "title")),
+    "goals": (Goal, ("title", "description")),
+    "knowledge_assets": (KnowledgeAsset, ("title",)),
+}
+
+STOP_WORDS = {
+    'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what',
+    'when', 'where', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
+    'most', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same',
+    'so', 'than', 'too', 'very', 's', 't', 'can', 'will', 'just', 'don',
+    'should', 'now', 'to', 'of', 'for', 'with', 'in', 'on', 'at', 'by',
+    'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has',
+    'had', 'having', 'do', 'does', 'did', 'doing'
+}
+
+Fingerprint = Tuple[int, Any]
+
+
+def extract_keywords(name: str, description: str) -> Set[str]:
+    """Extract keywords from name and description."""
+    # Combine name and description
+    text = f"{name} {description}".lower()
+
+    # Remove punctuation, split into words and drop stop words
+    words = re.findall(r'\b\w+\b', text)
+    keywords = {word for word in words if word not in STOP_WORDS and len(word) > 2}
+
+    # Add the full name as a keyword phrase (for exact matching)
+    if name:
+        keywords.add(name.lower())
+
+    return keywords
+
+
+def build_entity(collection: str, entity_id: Any, *fields: Optional[str]) -> Optional[Dict]:
+    """
+    Build the dictionary entry of one entity.
+
+    Args:
+        collection: Key of ENTITY_SOURCES
+        entity_id: Entity ID
+        fields: Values of the collection's source attributes, in order
+
+    Returns:
+        Entity dict with id, name, type, keywords and search_terms, or None
+        if the entity has no name to match
+    """
+    name, detail = fields[0], (fields[1] if len(fields) > 1 else None)
+    if not name:
+        return None
+
+    if collection == "projects":
+        search_terms = [name, f"project {name}", f"{name} project"]
+    elif collection == "teams":
+        search_terms = [name, f"team {name}", f"{name} team"]
+    elif collection == "users":
+        # Just the name for people
+        search_terms = [name]
+    elif collection == "goals":
+        search_terms = [name, f"goal {name}", f"{name} goal"]
+    else:
+        search_terms = [
+            name,
+            f"knowledge asset {name}",
+            f"{name} knowledge asset",
+            f"note {name}",
+            f"{name} note"
+        ]
+
+    return {
+        "id": str(entity_id),
+        "name": name,
+        "type": ENTITY_TYPE_MAPPING[collection],
+        "keywords": extract_keywords(name, detail or ""),
+        "search_terms": search_terms
+    }
+
+
+def build_entity_matcher(entities: Dict[str, List[Dict]]) -> EntityMatcher:
+    """Build one matcher over the search terms of all entities."""
+    matcher = EntityMatcher()
+    for entity_type, entity_list in entities.items():
+        schema_type = ENTITY_TYPE_MAPPING.get(entity_type)
+        if not schema_type:
+            continue
+
+        for entity in entity_list:
+            entity_name = entity["name"]
+            if not entity_name or len(entity_name) < 3:
+                continue
+
+            for term in entity.get("search_terms", [entity_name]):
+                if term and len(term) >= 3:
+                    # Always report the entity name, not the search term
+                    matcher.add(term, (schema_type, entity_name, entity["id"]))
+
+    return matcher.build()
+
+
+class EntityIdIndex:
+    """
+    Sorted array of entity IDs for exact and prefix lookups by bisection.
+
+    Short ID prefixes (e.g. the first 8 hex digits of a UUID) quoted in
+    generated text resolve in O(log n) plus the number of IDs sharing the
+    prefix.
+    """
+
+    def __init__(self, entities: Iterable[Dict]):
+        pairs = sorted(((entity["id"].lower(), entity) for entity in entities), key=lambda pair: pair[0])
+        self._ids = [entity_id for entity_id, _ in pairs]
+        self._entities = [entity for _, entity in pairs]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, entity_id: str) -> Optional[Dict]:
+        """Return the entity with exactly this ID."""
+        key = entity_id.lower()
+        position = bisect.bisect_left(self._ids, key)
+        if position < len(self._ids) and self._ids[position] == key:
+            return self._entities[position]
+        return None
+
+    def find(self, prefix: str, entity_type: Optional[str] = None) -> Optional[Dict]:
+        """
+        Return the first entity whose ID starts with ``prefix``.
+
+        Args:
+            prefix: ID or ID prefix (case-insensitive)
+            entity_type: Only consider entities of this type
+
+        Returns:
+            The matching entity with the smallest ID, or None
+        """
+        if not prefix:
+            return None
+        key = prefix.lower()
+        for position in range(bisect.bisect_left(self._ids, key), len(self._ids)):
+            if not self._ids[position].startswith(key):
+                break
+            entity = self._entities[position]
+            if entity_type is None or entity["type"] == entity_type:
+                return entity
+        return None
+
+
+def compile_entities(entities: Dict[str, List[Dict]]) -> Tuple[EntityMatcher, EntityIdIndex]:
+    """Build the matcher and ID index of a set of entities."""
+    id_index = EntityIdIndex(entity for entity_list in entities.values() for entity in entity_list)
+    return build_entity_matcher(entities), id_index
+
+
+def _updated_at(model):
+    # users.updated_at is only set on update
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+class TenantEntityDictionary:
+    """Entities and compiled matcher of a single tenant."""
+
+    def __init__(self):
+        # collection -> entity ID -> entity dict (only entities with a name)
+        self.entities: Dict[str, Dict[str, Dict]] = {collection: {} for collection in ENTITY_SOURCES}
+        # collection -> IDs of all rows seen, including unnamed ones; compared with row counts
+        self.ids: Dict[str, Set[str]] = {collection: set() for collection in ENTITY_SOURCES}
+        # Bumped on every change
+        self.version = 0
+        self.fingerprints: Dict[str, Fingerprint] = {}
+        self.checked_at = 0.0
+        self._lists: Optional[Dict[str, List[Dict]]] = None
+        self._lists_version = -1
+        self._matcher: Optional[EntityMatcher] = None
+        self._id_index: Optional[EntityIdIndex] = None
+        self._matcher_version = -1
+        self._build_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return sum(len(entities) for entities in self.entities.values())
+
+    def upsert(self, collection: str, entity_id: Any, *fields: Optional[str]) -> None:
+        """Add or replace an entity; only this entity is reprocessed."""
+        key = str(entity_id)
+        self.ids[collection].add(key)
+        entity = build_entity(collection, key, *fields)
+        current = self.entities[collection].get(key)
+        if entity is None:
+            if current is None:
+                return
+            del self.entities[collection][key]
+        else:
+            if current is not None and current["name"] == entity["name"] and current["keywords"] == entity["keywords"]:
+                return
+            self.entities[collection][key] = entity
+        self._record_change()
+
+    def remove(self, collection: str, entity_id: Any) -> None:
+        """Remove an entity."""
+        key = str(entity_id)
+        self.ids[collection].discard(key)
+        if self.entities[collection].pop(key, None) is not None:
+            self._record_change()
+
+    def _record_change(self) -> None:
+        self.version += 1
+        self._schedule_build()
+
+    def entity_lists(self) -> Dict[str, List[Dict]]:
+        """Entities per collection, in the format used by EntityRecognitionService."""
+        if self._lists_version != self.version:
+            self._lists = {collection: list(entities.values()) for collection, entities in self.entities.items()}
+            self._lists_version = self.version
+        return self._lists
+
+    # --- Matcher and ID index ---
+
+    def _schedule_build(self) -> None:
+        """Recompile the matcher and ID index in the background, if they are not already being rebuilt."""
+        if self._matcher is None or self._build_task is not None:
+            # Never built yet (the first caller builds it), or a rebuild picks the change up when it finishes
+            return
+        try:
+            self._build_task = asyncio.get_running_loop().create_task(self._build_matcher())
+        except RuntimeError:
+            # No event loop (e.g. a synchronous script); the next compiled() call rebuilds
+            pass
+
+    async def _build_matcher(self) -> Tuple[EntityMatcher, EntityIdIndex]:
+        try:
+            while self._matcher_version != self.version:
+                version = self.version
+                matcher, id_index = await asyncio.to_thread(compile_entities, self.entity_lists())
+                self._matcher, self._id_index, self._matcher_version = matcher, id_index, version
+                logger.debug(f"Compiled entity matcher version {version}: {len(matcher)} search terms")
+            return self._matcher, self._id_index
+        finally:
+            self._build_task = None
+
+    async def compiled(self) -> Tuple[EntityMatcher, EntityIdIndex]:
+        """
+        Return the compiled matcher and ID index.
+
+        The first call waits for them to be compiled; later calls return the
+        latest compiled pair while a newer one is built.
+        """
+        if self._matcher is not None:
+            if self._matcher_version != self.version and self._build_task is None:
+                self._schedule_build()
+            return self._matcher, self._id_index
+        if self._build_task is None:
+            self._build_task = asyncio.create_task(self._build_matcher())
+        return await asyncio.shield(self._build_task)
+
+    async def matcher(self) -> EntityMatcher:
+        """Return the compiled matcher (see ``compiled``)."""
+        matcher, _ = await self.compiled()
+        return matcher
+
+
+class EntityDictionaryRegistry:
+    """Per-tenant registry of entity dictionaries, synchronised with the entity tables."""
+
+    def __init__(self, sync_interval: float = SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._dictionaries: Dict[UUID, TenantEntityDictionary] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def get(self, tenant_id: UUID) -> Optional[TenantEntityDictionary]:
+        """Return the tenant's dictionary if it has been loaded in this process."""
+        return self._dictionaries.get(tenant_id)
+
+    async def ensure_synced(self, db: AsyncSession, tenant_id: UUID) -> TenantEntityDictionary:
+        """
+        Return the tenant's dictionary, bringing it up to date with the database.
+
+        Local writes are applied through the entity event hooks; writes made
+        by other workers are caught by the fingerprint check.
+        """
+        async with self._locks[tenant_id]:
+            dictionary = self._dictionaries.get(tenant_id)
+            if dictionary is None:
+                dictionary = TenantEntityDictionary()
+                await self._catch_up(db, tenant_id, dictionary)
+                dictionary.checked_at = time.monotonic()
+                self._dictionaries[tenant_id] = dictionary
+                logger.info(f"Loaded entity dictionary for tenant {tenant_id}: {len(dictionary)} entities")
+            elif time.monotonic() - dictionary.checked_at >= self.sync_interval:
+                await self._catch_up(db, tenant_id, dictionary)
+                dictionary.checked_at = time.monotonic()
+            return dictionary
+
+    async def _catch_up(self, db: AsyncSession, tenant_id: UUID, dictionary: TenantEntityDictionary) -> None:
+        """Load rows changed since the last fingerprint, per collection."""
+        for collection, (model, fields) in ENTITY_SOURCES.items():
+            result = await db.execute(
+                select(func.count(model.id), func.max(_updated_at(model))).where(model.tenant_id == tenant_id)
+            )
+            fingerprint = tuple(result.one())
+            previous = dictionary.fingerprints.get(collection)
+            if previous == fingerprint:
+                continue
+
+            condition = model.tenant_id == tenant_id
+            query = select(model.id, *(getattr(model, field) for field in fields))
+            if previous is not None and previous[1] is not None:
+                result = await db.execute(query.where(condition & (_updated_at(model) >= previous[1])))
+            else:
+                result = await db.execute(query.where(condition))
+            for row in result.all():
+                dictionary.upsert(collection, *row)
+
+            if len(dictionary.ids[collection]) != fingerprint[0]:
+                # Rows were deleted (or missed) elsewhere: reconcile the ID sets
+                stored_ids = await db.execute(select(model.id).where(condition))
+                current = {str(entity_id): entity_id for entity_id in stored_ids.scalars().all()}
+                for entity_id in dictionary.ids[collection] - current.keys():
+                    dictionary.remove(collection, entity_id)
+                missing = [current[entity_id] for entity_id in current.keys() - dictionary.ids[collection]]
+                if missing:
+                    result = await db.execute(query.where(model.id.in_(missing)))
+                    for row in result.all():
+                        dictionary.upsert(collection, *row)
+            dictionary.fingerprints[collection] = fingerprint
+
+    def upsert_entity(self, tenant_id: UUID, collection: str, entity_id: UUID, *fields: Optional[str]) -> None:
+        """Apply a local entity create/update to an already loaded dictionary."""
+        dictionary = self._dictionaries.get(tenant_id)
+        if dictionary is not None:
+            dictionary.upsert(collection, entity_id, *fields)
+
+    def remove_entity(self, tenant_id: UUID, collection: str, entity_id: UUID) -> None:
+        """Apply a local entity delete to an already loaded dictionary."""
+        dictionary = self._dictionaries.get(tenant_id)
+        if dictionary is not None:
+            dictionary.remove(collection, entity_id)
+
+
+# Singleton registry instance
+entity_dictionaries = EntityDictionaryRegistry()
@@ -0,0 +1,156 @@
+"""
+Entity Matcher
+
+Aho-Corasick automaton over entity search terms, used by
+EntityRecognitionService to find every known entity in a text in a single
+pass, independent of the number of entities.
+
+Matching is case-insensitive and respects word boundaries like the regex
+``\\b<term>\\b``: a term that starts (ends) with a word character only
+matches where the preceding (following) character is not a word character.
+Overlapping matches are resolved leftmost-longest: the earliest match wins,
+and among matches starting at the same position the longest one.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _fold(text: str) -> str:
+    """Lower-case ``text`` while keeping character offsets stable."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") expand when lower-cased; fold those one by one
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class EntityMatcher:
+    """Multi-pattern matcher returning one payload per matched term."""
+
+    def __init__(self):
+        # Trie nodes: transitions, failure link, and the next node on the
+        # failure chain that ends a term ("dictionary suffix link")
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [0]
+        # Term index ending at a node (-1 if none) and the node's depth
+        self._term: List[int] = [-1]
+        self._depth: List[int] = [0]
+        # Per term: payload and whether it needs a word boundary on each side
+        self._payloads: List[Any] = []
+        self._bounded: List[Tuple[bool, bool]] = []
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def add(self, term: str, payload: Any) -> bool:
+        """
+        Add a search term.
+
+        Args:
+            term: Text to match (case-insensitive)
+            payload: Value returned for matches of this term
+
+        Returns:
+            False if the term was empty or already present; the first payload
+            added for a term is kept
+        """
+        if not term:
+            return False
+        node = 0
+        for char in _fold(term):
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(0)
+                self._term.append(-1)
+                self._depth.append(self._depth[node] + 1)
+            node = next_node
+        if self._term[node] != -1:
+            return False
+        self._term[node] = len(self._payloads)
+        self._payloads.append(payload)
+        self._bounded.append((_is_word_char(term[0]), _is_word_char(term[-1])))
+        self._built = False
+        return True
+
+    def build(self) -> "EntityMatcher":
+        """Compute failure links; called automatically before the first search."""
+        queue = list(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+            self._output[child] = 0
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                fail = self._fail[child]
+                self._output[child] = fail if self._term[fail] != -1 else self._output[fail]
+        self._built = True
+        return self
+
+    def find(self, text: str) -> List[Tuple[int, int, Any]]:
+        """
+        Find non-overlapping term matches in ``text``.
+
+        Returns:
+            List of (start, end, payload), ordered by position
+        """
+        if not self._built:
+            self.build()
+        if not text or not self._payloads:
+            return []
+
+        goto, fail, output, term, depth = self._goto, self._fail, self._output, self._term, self._depth
+        bounded = self._bounded
+        folded = _fold(text)
+        length = len(text)
+        # Longest boundary-respecting match per start position: start -> (end, term)
+        longest: Dict[int, Tuple[int, int]] = {}
+
+        node = 0
+        for position, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not node:
+                continue
+
+            end = position + 1
+            match = node if term[node] != -1 else output[node]
+            while match:
+                index = term[match]
+                start = end - depth[match]
+                bounded_start, bounded_end = bounded[index]
+                if (
+                    (not bounded_start or start == 0 or not _is_word_char(text[start - 1]))
+                    and (not bounded_end or end == length or not _is_word_char(text[end]))
+                ):
+                    # Ends are visited in increasing order, so a later hit at the same start is longer
+                    longest[start] = (end, index)
+                match = output[match]
+
+        matches: List[Tuple[int, int, Any]] = []
+        last_end = 0
+        for start in sorted(longest):
+            if start < last_end:
+                continue
+            end, index = longest[start]
+            matches.append((start, end, self._payloads[index]))
+            last_end = end
+        return matches
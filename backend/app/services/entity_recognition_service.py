@@ -1,19 +1,27 @@
+import asyncio
 import re
 import logging
-from typing import List, Dict, Optional, Tuple, Set
+import os
+from typing import List, Dict, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app import models, schemas
 from app.schemas.briefing import HighlightedEntity, HighlightedTextSegment
-from app.crud.crud_project import project as crud_project
-from app.crud.crud_team import team as crud_team
-from app.crud.crud_user import user as crud_user
-from app.crud.crud_goal import goal as crud_goal
-from app.crud.crud_knowledge_asset import knowledge_asset as crud_knowledge_asset
+from app.services.entity_dictionary import (
+    ENTITY_TYPE_MAPPING,
+    EntityIdIndex,
+    build_entity_matcher,
+    entity_dictionaries,
+)
+from app.services.entity_matcher import EntityMatcher
 
 logger = logging.getLogger(__name__)
 
+# Batches with more texts than this are highlighted in worker threads
+BATCH_INLINE_LIMIT = int(os.getenv("ENTITY_RECOGNITION_BATCH_INLINE_LIMIT", "16"))
+BATCH_CHUNK_SIZE = 64
+
 class EntityRecognitionService:
     """Service for recognizing entities in text and highlighting them."""
 
@@ -34,35 +42,89 @@ class EntityRecognitionService:
         Returns:
             List of text segments with entities highlighted
         """
-        # 1. Fetch entities from database for the user's tenant
-        entities = await self._fetch_entities(db, user.tenant_id)
+        # 1. Get the tenant's cached entity dictionary, compiled matcher and ID index
+        entities, matcher, id_index = await self._fetch_entities(db, user.tenant_id)
 
-        # 2. Identify entities in the text
-        segments = await self._identify_entities(text, entities)
+        # 2. Identify entities and post-process any remaining IDs
+        return self._highlight(text, entities, matcher, id_index)
 
-        # 3. Post-process to handle any remaining IDs
-        segments = await self._post_process_segments(segments, entities)
+    async def prepare(self, db: AsyncSession, tenant_id: UUID) -> None:
+        """Load and compile the tenant's entity dictionary ahead of processing text."""
+        await self._fetch_entities(db, tenant_id)
 
-        return segments
+    async def process_texts(
+        self,
+        texts: Sequence[str],
+        db: AsyncSession,
+        user: models.User
+    ) -> List[List[HighlightedTextSegment]]:
+        """
+        Process several texts with one entity dictionary lookup.
 
-    async def _post_process_segments(
+        Small batches are highlighted inline; larger ones are split into
+        chunks that run concurrently in worker threads so the event loop
+        stays responsive.
+
+        Args:
+            texts: The texts to process
+            db: Database session
+            user: Current user for tenant context
+
+        Returns:
+            One list of text segments per text, in input order
+        """
+        if not texts:
+            return []
+
+        entities, matcher, id_index = await self._fetch_entities(db, user.tenant_id)
+
+        if len(texts) <= BATCH_INLINE_LIMIT:
+            return self._highlight_many(texts, entities, matcher, id_index)
+
+        chunks = await asyncio.gather(*(
+            asyncio.to_thread(
+                self._highlight_many, texts[start:start + BATCH_CHUNK_SIZE], entities, matcher, id_index
+            )
+            for start in range(0, len(texts), BATCH_CHUNK_SIZE)
+        ))
+        return [segments for chunk in chunks for segments in chunk]
+
+    def _highlight(
+        self,
+        text: str,
+        entities: Dict[str, List[Dict]],
+        matcher: EntityMatcher,
+        id_index: EntityIdIndex
+    ) -> List[HighlightedTextSegment]:
+        """Identify entities in one text and post-process remaining IDs."""
+        segments = self._identify_entities(text, entities, matcher, id_index)
+        return self._post_process_segments(segments, entities, id_index)
+
+    def _highlight_many(
+        self,
+        texts: Sequence[str],
+        entities: Dict[str, List[Dict]],
+        matcher: EntityMatcher,
+        id_index: EntityIdIndex
+    ) -> List[List[HighlightedTextSegment]]:
+        return [self._highlight(text, entities, matcher, id_index) for text in texts]
+
+    def _post_process_segments(
         self,
         segments: List[HighlightedTextSegment],
-        entities: Dict[str, List[Dict]]
+        entities: Dict[str, List[Dict]],
+        id_index: Optional[EntityIdIndex] = None
     ) -> List[HighlightedTextSegment]:
         """
         Post-process segments to handle any remaining IDs in the text.
 
         This looks for patterns like "ID b4018e7c" or "with the ID 8a78fbc1" and
-        tries to replace them with entity names or generic references.
+        tries to replace them with entity names or generic references. IDs and
+        ID prefixes are resolved through ``id_index`` (built from ``entities``
+        if not given).
         """
-        # Create a flat list of all entities for ID lookup
-        all_entities = []
-        for entity_type, entity_list in entities.items():
-            all_entities.extend(entity_list)
-
-        # Create an ID to entity mapping
-        id_to_entity = {entity["id"]: entity for entity in all_entities}
+        if id_index is None:
+            id_index = EntityIdIndex(entity for entity_list in entities.values() for entity in entity_list)
 
         # Process each text segment to look for IDs
         processed_segments = []
@@ -87,11 +149,12 @@ class EntityRecognitionService:
                 name1 = "a new project"
                 name2 = "another new project"
 
-                for entity_id, entity in id_to_entity.items():
-                    if entity_id.startswith(id1) and entity["type"] == "project":
-                        name1 = entity["name"]
-                    if entity_id.startswith(id2) and entity["type"] == "project":
-                        name2 = entity["name"]
+                entity1 = id_index.find(id1, "project")
+                if entity1:
+                    name1 = entity1["name"]
+                entity2 = id_index.find(id2, "project")
+                if entity2:
+                    name2 = entity2["name"]
 
                 # Replace the entire segment with a better version
                 new_content = f"Two new projects were created: {name1} and {name2}"
@@ -117,14 +180,10 @@ class EntityRecognitionService:
                 entity_names = []
 
                 for id_value in id_list:
-                    found = False
-                    for entity_id, entity in id_to_entity.items():
-                        if entity_id.startswith(id_value) and entity["type"] == entity_type_text:
-                            entity_names.append(entity["name"])
-                            found = True
-                            break
-
-                    if not found:
+                    entity = id_index.find(id_value, entity_type_text)
+                    if entity:
+                        entity_names.append(entity["name"])
+                    else:
                         entity_names.append(f"a {entity_type_text}")
 
                 if entity_names:
@@ -190,18 +249,11 @@ class EntityRecognitionService:
                 entity_name = "this item"  # Default generic reference
                 entity_type = "project"    # Default type
 
-                # Look for exact match first
-                if id_value in id_to_entity:
-                    entity = id_to_entity[id_value]
+                # Look for exact match first, then partial match (ID prefix)
+                entity = id_index.get(id_value) or id_index.find(id_value)
+                if entity:
                     entity_name = entity["name"]
                     entity_type = entity["type"]
-                else:
-                    # Look for partial match (ID prefix)
-                    for entity_id, entity in id_to_entity.items():
-                        if entity_id.startswith(id_value):
-                            entity_name = entity["name"]
-                            entity_type = entity["type"]
-                            break
 
                 # Add the entity segment
                 processed_segments.append(HighlightedTextSegment(
@@ -229,147 +281,29 @@ class EntityRecognitionService:
         self,
         db: AsyncSession,
         tenant_id: UUID
-    ) -> Dict[str, List[Dict]]:
-        """Fetch all relevant entities from the database for the tenant."""
-        try:
-            # Fetch projects
-            projects = await crud_project.get_multi_by_tenant(db, tenant_id=tenant_id)
-            project_entities = [
-                {
-                    "id": str(p.id),
-                    "name": p.name,
-                    "type": "project",
-                    "keywords": self._extract_keywords(p.name, p.description or ""),
-                    # Add additional search terms
-                    "search_terms": [
-                        p.name,
-                        f"project {p.name}",
-                        f"{p.name} project"
-                    ]
-                }
-                for p in projects
-            ]
-
-            # Fetch teams
-            teams = await crud_team.get_multi_by_tenant(db, tenant_id=tenant_id)
-            team_entities = [
-                {
-                    "id": str(t.id),
-                    "name": t.name,
-                    "type": "team",
-                    "keywords": self._extract_keywords(t.name, t.description or ""),
-                    # Add additional search terms
-                    "search_terms": [
-                        t.name,
-                        f"team {t.name}",
-                        f"{t.name} team"
-                    ]
-                }
-                for t in teams
-            ]
-
-            # Fetch users
-            users = await crud_user.get_multi_by_tenant(db, tenant_id=tenant_id)
-            user_entities = [
-                {
-                    "id": str(u.id),
-                    "name": u.name or "",
-                    "type": "person",
-                    "keywords": self._extract_keywords(u.name or "", u.title or ""),
-                    # Add additional search terms - just the name for people
-                    "search_terms": [u.name] if u.name else []
-                }
-                for u in users if u.name  # Only include users with names
-            ]
-
-            # Fetch goals
-            goals = await crud_goal.get_multi_by_tenant(db, tenant_id=tenant_id)
-            goal_entities = [
-                {
-                    "id": str(g.id),
-                    "name": g.title,
-                    "type": "goal",
-                    "keywords": self._extract_keywords(g.title, g.description or ""),
-                    # Add additional search terms
-                    "search_terms": [
-                        g.title,
-                        f"goal {g.title}",
-                        f"{g.title} goal"
-                    ]
-                }
-                for g in goals
-            ]
-
-            # Fetch knowledge assets
-            knowledge_assets = await crud_knowledge_asset.get_multi_by_tenant(db, tenant_id=tenant_id)
-            knowledge_entities = [
-                {
-                    "id": str(k.id),
-                    "name": k.title or "",
-                    "type": "knowledge_asset",
-                    "keywords": self._extract_keywords(k.title or "", ""),
-                    # Add additional search terms
-                    "search_terms": [
-                        k.title,
-                        f"knowledge asset {k.title}",
-                        f"{k.title} knowledge asset",
-                        f"note {k.title}",
-                        f"{k.title} note"
-                    ] if k.title else []
-                }
-                for k in knowledge_assets if k.title  # Only include assets with titles
-            ]
+    ) -> Tuple[Dict[str, List[Dict]], EntityMatcher, EntityIdIndex]:
+        """
+        Return the tenant's entities, their compiled matcher and ID index.
 
-            # Combine all entities
-            return {
-                "projects": project_entities,
-                "teams": team_entities,
-                "users": user_entities,
-                "goals": goal_entities,
-                "knowledge_assets": knowledge_entities
-            }
+        Both come from the per-tenant entity dictionary, which is kept up to
+        date by entity events instead of being reloaded for every text.
+        """
+        try:
+            dictionary = await entity_dictionaries.ensure_synced(db, tenant_id)
+            matcher, id_index = await dictionary.compiled()
+            return dictionary.entity_lists(), matcher, id_index
 
         except Exception as e:
             logger.error(f"Error fetching entities: {e}", exc_info=True)
-            return {
-                "projects": [],
-                "teams": [],
-                "users": [],
-                "goals": [],
-                "knowledge_assets": []
-            }
-
-    def _extract_keywords(self, name: str, description: str) -> Set[str]:
-        """Extract keywords from name and description."""
-        # Combine name and description
-        text = f"{name} {description}".lower()
-
-        # Remove punctuation and split into words
-        words = re.findall(r'\b\w+\b', text)
-
-        # Remove common stop words
-        stop_words = {
-            'a', 'an', 'the', 'and', 'or', 'but', 'if', 'because', 'as', 'what',
-            'when', 'where', 'how', 'all', 'any', 'both', 'each', 'few', 'more',
-            'most', 'some', 'such', 'no', 'nor', 'not', 'only', 'own', 'same',
-            'so', 'than', 'too', 'very', 's', 't', 'can', 'will', 'just', 'don',
-            'should', 'now', 'to', 'of', 'for', 'with', 'in', 'on', 'at', 'by',
-            'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has',
-            'had', 'having', 'do', 'does', 'did', 'doing'
-        }
-
-        keywords = {word for word in words if word not in stop_words and len(word) > 2}
-
-        # Add the full name as a keyword phrase (for exact matching)
-        if name:
-            keywords.add(name.lower())
-
-        return keywords
-
-    async def _identify_entities(
+            entities = {collection: [] for collection in ENTITY_TYPE_MAPPING}
+            return entities, EntityMatcher().build(), EntityIdIndex([])
+
+    def _identify_entities(
         self,
         text: str,
-        entities: Dict[str, List[Dict]]
+        entities: Dict[str, List[Dict]],
+        matcher: Optional[EntityMatcher] = None,
+        id_index: Optional[EntityIdIndex] = None
     ) -> List[HighlightedTextSegment]:
         """
         Identify entities in the text and create highlighted segments.
@@ -383,7 +317,11 @@ class EntityRecognitionService:
         calendar_events = self._identify_calendar_events(text)
 
         # Then, identify known entities by name matching
-        entity_matches = self._identify_known_entities(text, entities)
+        if matcher is None:
+            matcher = build_entity_matcher(entities)
+        if id_index is None:
+            id_index = EntityIdIndex(entity for entity_list in entities.values() for entity in entity_list)
+        entity_matches = self._identify_known_entities(text, entities, matcher, id_index)
 
         # Combine all matches and sort by position
         all_matches = calendar_events + entity_matches
@@ -471,22 +409,19 @@ class EntityRecognitionService:
     def _identify_known_entities(
         self,
         text: str,
-        entities: Dict[str, List[Dict]]
+        entities: Dict[str, List[Dict]],
+        matcher: EntityMatcher,
+        id_index: EntityIdIndex
     ) -> List[Tuple[int, int, str, str, Optional[str]]]:
         """
         Identify known entities in text by name matching.
+
+        All search terms are matched in one pass of ``matcher``; overlapping
+        matches resolve to the leftmost, then longest one.
         Returns a list of (start_pos, end_pos, entity_type, entity_text, entity_id)
         """
         matches = []
-
-        # Map entity types to schema types
-        type_mapping = {
-            "projects": "project",
-            "teams": "team",
-            "users": "person",
-            "goals": "goal",
-            "knowledge_assets": "knowledge_asset"
-        }
+        type_mapping = ENTITY_TYPE_MAPPING
 
         # First, check for ID references in parentheses
         # Pattern like: KnowledgeAssets (5d9f42f4, 109b3bf3, a77c75b2)
@@ -511,14 +446,10 @@ class EntityRecognitionService:
 
             # Find entity names for these IDs
             entity_names = []
-            entity_type_key = next((k for k, v in type_mapping.items() if v == schema_type), None)
-
-            if entity_type_key and entity_type_key in entities:
-                for entity_id in id_list:
-                    for entity in entities[entity_type_key]:
-                        if entity["id"].startswith(entity_id):
-                            entity_names.append(entity["name"])
-                            break
+            for entity_id in id_list:
+                entity = id_index.find(entity_id, schema_type)
+                if entity:
+                    entity_names.append(entity["name"])
 
             # If we found entity names, create a match for the entire parenthetical expression
             if entity_names:
@@ -532,45 +463,15 @@ class EntityRecognitionService:
                     None  # No specific ID since this is a group
                 ))
 
-        # Then, check for each entity by name
-        for entity_type, entity_list in entities.items():
-            schema_type = type_mapping.get(entity_type)
-            if not schema_type:
+        # Then, match every entity name in a single pass, skipping the ID references found above
+        group_spans = sorted((start, end) for start, end, _, _, _ in matches)
+        group_index = 0
+        for start, end, (schema_type, entity_name, entity_id) in matcher.find(text):
+            while group_index < len(group_spans) and group_spans[group_index][1] < start:
+                group_index += 1
+            if group_index < len(group_spans) and group_spans[group_index][0] <= end:
                 continue
-
-            for entity in entity_list:
-                entity_name = entity["name"]
-                if not entity_name or len(entity_name) < 3:
-                    continue
-
-                # Get all search terms for this entity
-                search_terms = entity.get("search_terms", [entity_name])
-
-                # Look for each search term in the text
-                for term in search_terms:
-                    if not term or len(term) < 3:
-                        continue
-
-                    # Use word boundaries to avoid partial matches
-                    pattern = r'\b' + re.escape(term) + r'\b'
-                    for match in re.finditer(pattern, text, re.IGNORECASE):
-                        start, end = match.span()
-
-                        # Check if this match overlaps with any existing matches
-                        overlaps = False
-                        for m_start, m_end, _, _, _ in matches:
-                            if (start <= m_end and end >= m_start):
-                                overlaps = True
-                                break
-
-                        if not overlaps:
-                            matches.append((
-                                start,
-                                end,
-                                schema_type,
-                                entity_name,  # Always use the entity name, not the search term
-                                entity["id"]
-                            ))
+            matches.append((start, end, schema_type, entity_name, entity_id))
 
         return matches
 
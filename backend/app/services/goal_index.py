@@ -0,0 +1,274 @@
+"""
+Goal Vector Index
+
+Maintains a per-tenant TF-IDF index over goal titles and descriptions used
+by AlignmentRecommendationService to match projects against goals.
+
+The vectorizer is fitted once on the tenant's goals and kept; goal changes
+are applied incrementally by transforming only the changed goal with the
+existing vocabulary. Terms that are new since the fit are ignored until the
+index is refitted, in a worker thread, once the number of changes exceeds
+REFIT_THRESHOLD of the indexed goals.
+
+Projects are scored in batches: their texts are transformed into one sparse
+matrix Q and multiplied with the goal matrix G (both rows L2-normalised), so
+Q @ G.T holds every project x goal cosine similarity in a single product.
+"""
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.goal import Goal
+
+logger = logging.getLogger(__name__)
+
+# Fraction of changed goals after which the vocabulary and IDF weights are refitted
+REFIT_THRESHOLD = float(os.getenv("GOAL_INDEX_REFIT_THRESHOLD", "0.2"))
+# Projects scored per sparse product; bounds the size of the similarity block
+SCORE_BATCH_SIZE = 4096
+
+
+def goal_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}".strip()
+
+
+def fit_goal_vectors(texts: Dict[str, str]) -> Tuple[Optional[TfidfVectorizer], Dict[str, sparse.csr_matrix]]:
+    """Fit a vectorizer on goal texts and return it with one L2-normalised row per goal."""
+    goal_ids = [goal_id for goal_id, text in texts.items() if text]
+    if not goal_ids:
+        return None, {}
+    vectorizer = TfidfVectorizer(stop_words="english")
+    try:
+        matrix = vectorizer.fit_transform([texts[goal_id] for goal_id in goal_ids])
+    except ValueError:
+        # Only stop words left; nothing can be matched
+        return None, {}
+    return vectorizer, {goal_id: matrix[i] for i, goal_id in enumerate(goal_ids)}
+
+
+def score_goals(
+    vectorizer: Optional[TfidfVectorizer],
+    goal_ids: Sequence[str],
+    goal_matrix: Optional[sparse.csr_matrix],
+    texts: Sequence[str],
+    top_k: int = 3,
+    threshold: float = 0.1,
+) -> List[List[Tuple[str, float]]]:
+    """
+    Find the most similar goals for each text.
+
+    Args:
+        vectorizer: Fitted goal vectorizer
+        goal_ids: Goal ID per row of ``goal_matrix``
+        goal_matrix: Goal TF-IDF vectors
+        texts: Project texts to match
+        top_k: Maximum number of goals per text
+        threshold: Minimum cosine similarity (exclusive)
+
+    Returns:
+        One list of (goal ID, similarity) per text, best match first
+    """
+    results: List[List[Tuple[str, float]]] = [[] for _ in texts]
+    if vectorizer is None or goal_matrix is None or not texts:
+        return results
+
+    goal_matrix_t = goal_matrix.T.tocsc()
+    for start in range(0, len(texts), SCORE_BATCH_SIZE):
+        batch = vectorizer.transform(texts[start:start + SCORE_BATCH_SIZE])
+        similarities = (batch @ goal_matrix_t).tocsr()
+        indptr, indices, data = similarities.indptr, similarities.indices, similarities.data
+        for row in range(similarities.shape[0]):
+            row_data = data[indptr[row]:indptr[row + 1]]
+            row_indices = indices[indptr[row]:indptr[row + 1]]
+            keep = row_data > threshold
+            row_data, row_indices = row_data[keep], row_indices[keep]
+            if row_data.size > top_k:
+                top = np.argpartition(-row_data, top_k - 1)[:top_k]
+                row_data, row_indices = row_data[top], row_indices[top]
+            order = np.argsort(-row_data, kind="stable")
+            results[start + row] = [
+                (goal_ids[row_indices[i]], float(row_data[i])) for i in order
+            ]
+    return results
+
+
+class GoalVectorIndex:
+    """TF-IDF vectors of the goals of a single tenant."""
+
+    def __init__(self, refit_threshold: float = REFIT_THRESHOLD):
+        self.refit_threshold = refit_threshold
+        self._texts: Dict[str, str] = {}
+        self._titles: Dict[str, str] = {}
+        self._vectors: Dict[str, sparse.csr_matrix] = {}
+        self._vectorizer: Optional[TfidfVectorizer] = None
+        self.needs_fit = True
+        self._changes_since_fit = 0
+        # Stacked goal matrix, rebuilt lazily after changes
+        self._goal_ids: List[str] = []
+        self._matrix: Optional[sparse.csr_matrix] = None
+        # Bumped on every change
+        self.version = 0
+        # Fingerprint of the goals table at the last sync (count, max updated_at)
+        self.synced_count = 0
+        self.synced_until: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def title(self, goal_id: str) -> str:
+        return self._titles.get(goal_id, "")
+
+    def texts(self) -> Dict[str, str]:
+        """Copy of the indexed goal texts, e.g. for fitting outside the event loop."""
+        return dict(self._texts)
+
+    def upsert(self, goal_id: str, title: Optional[str], description: Optional[str]) -> None:
+        """Add or replace a goal; only this goal is re-vectorised."""
+        text = goal_text(title, description)
+        self._titles[goal_id] = title or ""
+        if self._texts.get(goal_id) == text:
+            return
+        self._texts[goal_id] = text
+        if self._vectorizer is not None:
+            self._vectors[goal_id] = self._vectorizer.transform([text])
+        self._record_change()
+
+    def remove(self, goal_id: str) -> None:
+        """Remove a goal from the index."""
+        if self._texts.pop(goal_id, None) is None:
+            return
+        self._titles.pop(goal_id, None)
+        self._vectors.pop(goal_id, None)
+        self._record_change()
+
+    def _record_change(self) -> None:
+        self._matrix = None
+        self._changes_since_fit += 1
+        if self._changes_since_fit > self.refit_threshold * max(1, len(self._texts)):
+            self.needs_fit = True
+        self.version += 1
+
+    def fit(self) -> None:
+        """Refit the vocabulary and IDF weights on all goals."""
+        texts = self.texts()
+        self.install_fit(texts, *fit_goal_vectors(texts))
+
+    def install_fit(
+        self,
+        texts: Dict[str, str],
+        vectorizer: Optional[TfidfVectorizer],
+        vectors: Dict[str, sparse.csr_matrix],
+    ) -> None:
+        """
+        Install a fit computed from ``texts``.
+
+        Goals changed since that snapshot are re-vectorised with the new
+        vocabulary and removed goals are dropped.
+        """
+        self._vectorizer = vectorizer
+        self._vectors = {goal_id: vector for goal_id, vector in vectors.items() if goal_id in self._texts}
+        changed = [goal_id for goal_id, text in self._texts.items() if texts.get(goal_id) != text]
+        if vectorizer is not None:
+            for goal_id in changed:
+                self._vectors[goal_id] = vectorizer.transform([self._texts[goal_id]])
+        self._changes_since_fit = len(changed)
+        self.needs_fit = False
+        self._matrix = None
+
+    def snapshot(self) -> Tuple[Optional[TfidfVectorizer], List[str], Optional[sparse.csr_matrix]]:
+        """Vectorizer, goal IDs and stacked goal matrix for ``score_goals``."""
+        if self.needs_fit:
+            self.fit()
+        if self._vectorizer is None or not self._vectors:
+            return None, [], None
+        if self._matrix is None:
+            self._goal_ids = list(self._vectors)
+            self._matrix = sparse.vstack([self._vectors[goal_id] for goal_id in self._goal_ids], format="csr")
+        return self._vectorizer, self._goal_ids, self._matrix
+
+    def score(
+        self, texts: Sequence[str], top_k: int = 3, threshold: float = 0.1
+    ) -> List[List[Tuple[str, float]]]:
+        """Find the most similar goals for each text (see ``score_goals``)."""
+        return score_goals(*self.snapshot(), texts, top_k=top_k, threshold=threshold)
+
+
+class GoalIndexRegistry:
+    """Per-tenant registry of goal indexes, synchronised with the goals table."""
+
+    def __init__(self):
+        self._indexes: Dict[UUID, GoalVectorIndex] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def get(self, tenant_id: UUID) -> Optional[GoalVectorIndex]:
+        """Return the tenant's index if it has been loaded in this process."""
+        return self._indexes.get(tenant_id)
+
+    async def ensure_synced(self, db: AsyncSession, tenant_id: UUID) -> GoalVectorIndex:
+        """
+        Return the tenant's fitted index, bringing it up to date with the database.
+
+        Local writes are applied through the entity event hooks; writes made
+        by other workers are caught by comparing a (count, max(updated_at))
+        fingerprint and loading only the changed rows. Refits run in a
+        worker thread.
+        """
+        async with self._locks[tenant_id]:
+            index = self._indexes.get(tenant_id)
+
+            fingerprint = await db.execute(
+                select(func.count(Goal.id), func.max(Goal.updated_at)).where(Goal.tenant_id == tenant_id)
+            )
+            count, max_updated_at = fingerprint.one()
+
+            if index is None or count != index.synced_count or max_updated_at != index.synced_until:
+                query = select(Goal.id, Goal.title, Goal.description).where(Goal.tenant_id == tenant_id)
+                if index is not None and index.synced_until is not None:
+                    await self._load(db, index, query.where(Goal.updated_at >= index.synced_until))
+                if index is None or len(index) != count:
+                    # First load, or rows were deleted elsewhere: rebuild from scratch
+                    index = GoalVectorIndex()
+                    await self._load(db, index, query)
+
+                index.synced_count = count
+                index.synced_until = max_updated_at
+                self._indexes[tenant_id] = index
+                logger.debug(f"Synced goal index for tenant {tenant_id}: {len(index)} goals")
+
+            if index.needs_fit:
+                texts = index.texts()
+                index.install_fit(texts, *await asyncio.to_thread(fit_goal_vectors, texts))
+            return index
+
+    @staticmethod
+    async def _load(db: AsyncSession, index: GoalVectorIndex, query) -> None:
+        result = await db.execute(query)
+        for goal_id, title, description in result.all():
+            index.upsert(str(goal_id), title, description)
+
+    def upsert_goal(self, tenant_id: UUID, goal_id: UUID, title: Optional[str], description: Optional[str]) -> None:
+        """Apply a local goal create/update to an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.upsert(str(goal_id), title, description)
+
+    def remove_goal(self, tenant_id: UUID, goal_id: UUID) -> None:
+        """Apply a local goal delete to an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.remove(str(goal_id))
+
+
+# Singleton registry instance
+goal_indexes = GoalIndexRegistry()
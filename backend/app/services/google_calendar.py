@@ -1,11 +1,16 @@
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from datetime import datetime, time, timezone
+from typing import Any
 import googleapiclient.errors # Import errors for specific handling
 import asyncio # Import asyncio for running blocking IO in threads
 from google.auth.transport.requests import Request as GoogleAuthRequest  # For refreshing tokens
 from google.auth.exceptions import RefreshError # Import RefreshError
 import logging # Use logging
+import hashlib
+import os
+import requests
+from collections import OrderedDict
 
 # DB
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,10 +18,17 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 
 from app.models.user import User as UserModel
+from app.services.oauth_token_service import oauth_token_service
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+GOOGLE_SERVICE_CACHE_SIZE = int(os.getenv("GOOGLE_SERVICE_CACHE_SIZE", "256"))
+# (user ID, access token hash) -> built Calendar API service
+_service_cache: "OrderedDict[tuple, Any]" = OrderedDict()
+# Keep-alive session for token refreshes
+_auth_session = requests.Session()
+
 class GoogleTokenRefreshError(Exception):
     "Custom exception for Google token refresh failures."
     pass
@@ -40,7 +52,7 @@ async def refresh_google_access_token(user: UserModel) -> tuple[str, datetime |
             client_secret=settings.GOOGLE_CLIENT_SECRET,
             token_uri="https://oauth2.googleapis.com/token",
         )
-        creds.refresh(GoogleAuthRequest())
+        creds.refresh(GoogleAuthRequest(session=_auth_session))
         return creds.token, creds.expiry
 
     try:
@@ -58,46 +70,39 @@ async def refresh_google_access_token(user: UserModel) -> tuple[str, datetime |
 async def get_google_calendar_service(user: UserModel, db: AsyncSession | None = None):
     """Builds the Google Calendar API service client using stored user credentials.
 
-    If the access token is expired, this function will attempt to refresh it using the stored
-    refresh token. If a new access token is obtained, the user record is updated in the database.
+    If the access token is expired or about to expire, it is refreshed through the OAuth token
+    service, which refreshes once for all concurrent callers and updates the user record in the
+    database; ``db`` is no longer needed for that and is kept for compatibility.
+
+    Built services are kept in an LRU keyed by user and access token, so a refreshed token
+    gets a new service. A service keeps its HTTP connection alive between calls but is not
+    thread-safe: callers must not execute requests on it from several threads at once.
     """
     print(f"[Calendar Service] Attempting to build service for user {user.id}")
 
-    # Refresh token if expired or missing access token
-    needs_refresh = (
-        (not user.google_access_token) or
-        (user.google_token_expiry and user.google_token_expiry < datetime.now(timezone.utc))
-    )
-
-    if needs_refresh:
-        print(f"[Calendar Service] Access token missing or expired for user {user.id}. Attempting refresh...")
-        new_token, expiry = await refresh_google_access_token(user)
-
-        if new_token:
-            user.google_access_token = new_token
-            user.google_token_expiry = expiry
-
-            # Persist changes if DB session provided
-            if db is not None:
-                try:
-                    db.add(user)
-                    await db.commit()
-                    await db.refresh(user)
-                    print(f"[Calendar Service] Updated user {user.id} tokens in DB.")
-                except Exception as e:
-                    print(f"[Calendar Service] Failed to save refreshed token for user {user.id}: {e}")
-        else:
-            print(f"[Calendar Service] Could not refresh token for user {user.id}.")
+    # Refreshed once per expiry across concurrent requests; the new token is saved by the token service
+    access_token = await oauth_token_service.get_access_token(user, "google", refresh_google_access_token)
 
     # Still no access token? give up
-    if not user.google_access_token:
+    if not access_token:
         print(f"[Calendar Service] No valid access token available for user {user.id} even after refresh.")
         return None
 
+    # Reuse the service built for this user and access token, if any
+    key = (user.id, hashlib.sha256(access_token.encode("utf-8")).hexdigest())
+    service = _service_cache.get(key)
+    if service is not None:
+        _service_cache.move_to_end(key)
+        return service
+
     try:
-        creds = Credentials(token=user.google_access_token)
-        service = build('calendar', 'v3', credentials=creds, cache_discovery=False)
+        creds = Credentials(token=access_token)
+        # Building parses the discovery document, so it runs off the event loop
+        service = await asyncio.to_thread(build, 'calendar', 'v3', credentials=creds, cache_discovery=False)
         print(f"[Calendar Service] Service built successfully for user {user.id}")
+        _service_cache[key] = service
+        while len(_service_cache) > GOOGLE_SERVICE_CACHE_SIZE:
+            _service_cache.popitem(last=False)
         return service
     except googleapiclient.errors.HttpError as http_err:
         print(f"[Calendar Service] HTTP Error building service for user {user.id}: {http_err}")
@@ -14,6 +14,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.graph_events import publish_graph_delta_after_commit
 from app.models.node import Node
 from app.models.edge import Edge
 from app.models.user import User
@@ -108,6 +109,7 @@ async def create_node_for_entity(
     db.add(node)
     await db.flush()
     logger.info(f"Created node for {entity_type} {entity.id}: {node.id}")
+    publish_graph_delta_after_commit(db, tenant_id, {"type": "node_created", "id": node.id, "node_type": entity_type})
     
     return node
 
@@ -165,6 +167,9 @@ async def create_edge_for_relationship(
     db.add(edge)
     await db.flush()
     logger.info(f"Created edge {relationship_type} from {source_node.id} to {target_node.id}")
+    publish_graph_delta_after_commit(
+        db, tenant_id, {"type": "edge_created", "id": edge.id, "src": edge.src, "dst": edge.dst}
+    )
     
     return edge
 
@@ -0,0 +1,240 @@
+"""
+Heatmap Service
+
+Builds entity x entity interaction matrices for the insights heatmaps from
+sparse incidence matrices instead of pairwise Python loops:
+
+- P (users x projects): project participation
+- E (users x users): direct graph edges between user nodes
+- M (teams x users): team membership
+
+User interactions are P @ P.T (shared projects) and/or E. Team interactions
+go through the teams x projects matrix TP = M @ P: TP @ TP.T counts shared
+project work without building the users x users product, and M @ E @ M.T
+counts direct connections. Project interactions are P.T @ P (shared
+participants). Large matrices are truncated to the top-k entities by total
+interaction before being serialised.
+
+Cells are keyed by entity ID; names are included for display only, since
+they need not be unique.
+"""
+
+import logging
+from typing import Any, Dict, List, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.edge import Edge
+from app.models.node import Node
+from app.models.project import Project, project_participants
+from app.models.team import Team
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Entities shown per axis; the heatmap is top_k x top_k at most
+DEFAULT_TOP_K = 50
+
+HEATMAP_ENTITY_TYPES = ("user", "team", "project")
+
+
+class CollaborationData:
+    """Sparse incidence matrices of a tenant's users, teams and projects."""
+
+    def __init__(
+        self,
+        users: Sequence[Tuple[UUID, str]],
+        teams: Sequence[Tuple[UUID, str]],
+        projects: Sequence[Tuple[UUID, str]],
+        participation: sparse.csr_matrix,
+        user_edges: sparse.csr_matrix,
+        membership: sparse.csr_matrix,
+    ):
+        self.user_ids = [str(entity_id) for entity_id, _ in users]
+        self.user_names = [name for _, name in users]
+        self.team_ids = [str(entity_id) for entity_id, _ in teams]
+        self.team_names = [name for _, name in teams]
+        self.project_ids = [str(entity_id) for entity_id, _ in projects]
+        self.project_names = [name for _, name in projects]
+        self.participation = participation
+        self.user_edges = user_edges
+        self.membership = membership
+
+
+def _incidence(rows: np.ndarray, cols: np.ndarray, shape: Tuple[int, int]) -> sparse.csr_matrix:
+    """Binary sparse matrix with ones at (rows, cols); duplicates collapse to one."""
+    matrix = sparse.csr_matrix((np.ones(rows.shape[0], dtype=np.float64), (rows, cols)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+def _index_pairs(pairs, row_index: Dict[Any, int], col_index: Dict[Any, int]) -> Tuple[np.ndarray, np.ndarray]:
+    indexed = [(row_index[a], col_index[b]) for a, b in pairs if a in row_index and b in col_index]
+    if not indexed:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    array = np.asarray(indexed, dtype=np.int64)
+    return array[:, 0], array[:, 1]
+
+
+async def load_collaboration_data(db: AsyncSession, tenant_id: UUID) -> CollaborationData:
+    """Load users, teams, projects and their relationships as incidence matrices."""
+    users = (await db.execute(
+        select(User.id, User.name, User.team_id).where(User.tenant_id == tenant_id)
+    )).all()
+    teams = (await db.execute(select(Team.id, Team.name).where(Team.tenant_id == tenant_id))).all()
+    projects = (await db.execute(select(Project.id, Project.name).where(Project.tenant_id == tenant_id))).all()
+
+    user_index = {row[0]: i for i, row in enumerate(users)}
+    team_index = {row[0]: i for i, row in enumerate(teams)}
+    project_index = {row[0]: i for i, row in enumerate(projects)}
+
+    participation_rows = (await db.execute(
+        select(project_participants.c.user_id, project_participants.c.project_id)
+        .join(Project, Project.id == project_participants.c.project_id)
+        .where(Project.tenant_id == tenant_id)
+    )).all()
+    rows, cols = _index_pairs(participation_rows, user_index, project_index)
+    participation = _incidence(rows, cols, (len(users), len(projects)))
+
+    rows, cols = _index_pairs(((team_id, user_id) for user_id, _, team_id in users), team_index, user_index)
+    membership = _incidence(rows, cols, (len(teams), len(users)))
+
+    # Map user nodes back to users, then keep edges whose endpoints are both users
+    user_nodes = (await db.execute(
+        select(Node.id, Node.props["entity_id"].as_string())
+        .where(Node.tenant_id == tenant_id, Node.type == "user")
+    )).all()
+    node_to_user = {}
+    for node_id, entity_id in user_nodes:
+        try:
+            user_id = UUID(entity_id)
+        except (TypeError, ValueError):
+            continue
+        if user_id in user_index:
+            node_to_user[node_id] = user_index[user_id]
+
+    user_node_ids = select(Node.id).where(Node.tenant_id == tenant_id, Node.type == "user")
+    edge_rows = (await db.execute(
+        select(Edge.src, Edge.dst).where(
+            Edge.tenant_id == tenant_id,
+            Edge.src.in_(user_node_ids),
+            Edge.dst.in_(user_node_ids),
+        )
+    )).all()
+    rows, cols = _index_pairs(edge_rows, node_to_user, node_to_user)
+    mask = rows != cols
+    rows, cols = rows[mask], cols[mask]
+    user_edges = _incidence(np.concatenate([rows, cols]), np.concatenate([cols, rows]), (len(users), len(users)))
+
+    return CollaborationData(
+        [(row[0], row[1]) for row in users],
+        list(teams),
+        list(projects),
+        participation,
+        user_edges,
+        membership,
+    )
+
+
+def user_interactions(data: CollaborationData, metric: str) -> sparse.csr_matrix:
+    """users x users interaction matrix for a metric."""
+    if metric == "connections":
+        return data.user_edges
+    shared_projects = (data.participation @ data.participation.T).tocsr()
+    if metric == "collaboration":
+        return shared_projects
+    # Overall interaction: direct connections plus shared project work
+    return (shared_projects + data.user_edges).tocsr()
+
+
+def team_interactions(data: CollaborationData, metric: str) -> sparse.csr_matrix:
+    """teams x teams interaction matrix for a metric."""
+    if metric == "connections":
+        return (data.membership @ data.user_edges @ data.membership.T).tocsr()
+    # teams x projects: members of each team on each project
+    team_projects = (data.membership @ data.participation).tocsr()
+    if metric == "overlap":
+        # Number of projects both teams have members on
+        team_projects.data[:] = 1.0
+        return (team_projects @ team_projects.T).tocsr()
+    # Shared project work of the two teams' members, i.e. M @ (P @ P.T) @ M.T
+    shared_projects = (team_projects @ team_projects.T).tocsr()
+    if metric == "collaboration":
+        return shared_projects
+    return (shared_projects + data.membership @ data.user_edges @ data.membership.T).tocsr()
+
+
+def project_interactions(data: CollaborationData, metric: str) -> sparse.csr_matrix:
+    """projects x projects matrix of shared participants."""
+    return (data.participation.T @ data.participation).tocsr()
+
+
+def matrix_to_heatmap(
+    matrix: sparse.csr_matrix, ids: Sequence[str], names: Sequence[str], top_k: int = DEFAULT_TOP_K
+) -> List[Dict[str, Any]]:
+    """
+    Serialise the non-zero off-diagonal cells of an interaction matrix.
+
+    Only the ``top_k`` entities with the largest total interaction are kept.
+    Values are normalised to (0, 1] by the largest kept cell; ``count`` holds
+    the raw interaction count.
+    """
+    matrix = matrix.tocsr().copy()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    if matrix.nnz == 0:
+        return []
+
+    if matrix.shape[0] > top_k:
+        totals = np.asarray(matrix.sum(axis=1)).ravel()
+        keep = np.sort(np.argpartition(-totals, top_k - 1)[:top_k])
+        matrix = matrix[keep][:, keep].tocoo()
+    else:
+        keep = np.arange(matrix.shape[0])
+        matrix = matrix.tocoo()
+    if matrix.nnz == 0:
+        return []
+
+    peak = matrix.data.max()
+    return [
+        {
+            "x": ids[keep[i]],
+            "y": ids[keep[j]],
+            "x_name": names[keep[i]],
+            "y_name": names[keep[j]],
+            "value": float(value / peak),
+            "count": float(value),
+        }
+        for i, j, value in zip(matrix.row, matrix.col, matrix.data)
+    ]
+
+
+def compute_heatmap(data: CollaborationData, entity_type: str, metric: str, top_k: int = DEFAULT_TOP_K) -> List[Dict[str, Any]]:
+    """
+    Compute heatmap cells for an entity type.
+
+    Args:
+        data: Tenant collaboration matrices
+        entity_type: "user", "team" or "project"
+        metric: "connections", "collaboration", "overlap" (teams) or any other
+            value for combined interaction
+        top_k: Maximum number of entities per axis
+
+    Returns:
+        List of {"x", "y", "x_name", "y_name", "value", "count"} cells; x and
+        y are entity IDs
+    """
+    if entity_type == "user":
+        return matrix_to_heatmap(user_interactions(data, metric), data.user_ids, data.user_names, top_k)
+    if entity_type == "team":
+        return matrix_to_heatmap(team_interactions(data, metric), data.team_ids, data.team_names, top_k)
+    if entity_type == "project":
+        return matrix_to_heatmap(
+            project_interactions(data, metric), data.project_ids, data.project_names, top_k
+        )
+    raise ValueError(f"Unsupported heatmap entity type: {entity_type}")
@@ -13,6 +13,7 @@ try:
 except ImportError:
     ldap3 = None
 
+from app.core import http_clients
 from app.models.user import User
 from app.models.team import Team
 from app.models.department import Department
@@ -532,26 +533,25 @@ class OktaConnector(IdentityConnector):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                # Prepare request parameters
-                request_kwargs = {
-                    "headers": headers,
-                    "params": params
-                }
-                
-                # Add JSON body if provided
-                if data:
-                    request_kwargs["json"] = data
-                
-                # Make the request
-                async with session.request(method, url, **request_kwargs) as response:
-                    if response.status >= 400:
-                        error_text = await response.text()
-                        raise ConnectionError(f"Okta API request failed ({response.status}): {error_text}")
-                    
-                    # Parse JSON response
-                    return await response.json()
-                    
+            # Prepare request parameters
+            request_kwargs = {
+                "headers": headers,
+                "params": params
+            }
+
+            # Add JSON body if provided
+            if data:
+                request_kwargs["json"] = data
+
+            # Make the request over the shared keep-alive session
+            async with http_clients.get_session("okta").request(method, url, **request_kwargs) as response:
+                if response.status >= 400:
+                    error_text = await response.text()
+                    raise ConnectionError(f"Okta API request failed ({response.status}): {error_text}")
+
+                # Parse JSON response
+                return await response.json()
+
         except aiohttp.ClientError as e:
             raise ConnectionError(f"Failed to connect to Okta API: {str(e)}")
         except json.JSONDecodeError as e:
@@ -953,20 +953,19 @@ class AzureADConnector(IdentityConnector):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(token_url, data=payload) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        raise AuthenticationError(f"Failed to acquire token: {error_text}")
-                        
-                    token_data = await response.json()
-                    self.token = token_data.get("access_token")
-                    expires_in = token_data.get("expires_in", 3600)
-                    
-                    # Set token expiration time (with a buffer)
-                    self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 300)
-                    
-                    return self.token
+            async with http_clients.get_session("azure_ad").post(token_url, data=payload) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise AuthenticationError(f"Failed to acquire token: {error_text}")
+
+                token_data = await response.json()
+                self.token = token_data.get("access_token")
+                expires_in = token_data.get("expires_in", 3600)
+
+                # Set token expiration time (with a buffer)
+                self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 300)
+
+                return self.token
                     
         except aiohttp.ClientError as e:
             raise ConnectionError(f"Failed to connect to Azure AD: {str(e)}")
@@ -1005,13 +1004,12 @@ class AzureADConnector(IdentityConnector):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(method, url, headers=headers, params=params) as response:
-                    if response.status >= 400:
-                        error_text = await response.text()
-                        raise ConnectionError(f"Graph API request failed ({response.status}): {error_text}")
-                        
-                    return await response.json()
+            async with http_clients.get_session("azure_ad").request(method, url, headers=headers, params=params) as response:
+                if response.status >= 400:
+                    error_text = await response.text()
+                    raise ConnectionError(f"Graph API request failed ({response.status}): {error_text}")
+
+                return await response.json()
                     
         except aiohttp.ClientError as e:
             raise ConnectionError(f"Failed to connect to Graph API: {str(e)}")
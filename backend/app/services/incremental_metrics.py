@@ -0,0 +1,317 @@
+"""
+Incremental Network Metrics
+
+Keeps per-tenant network metrics up to date from graph deltas instead of
+recomputing them from the database on every request.
+
+Cheap metrics are maintained exactly on every delta:
+
+- node/edge counts, degrees and density
+- triangle counts per node (for the clustering coefficient): adding or
+  removing edge (u, v) changes the count by |N(u) & N(v)|
+- connected components via union-find; deletions can split a component,
+  which union-find cannot undo, so they only mark the components stale and
+  the next read rebuilds them in one pass
+
+Expensive metrics (sampled average path length) are carried over from the
+last full computation and refreshed only once the number of changes since
+then exceeds DRIFT_THRESHOLD of the graph size.
+
+Deltas are delivered in-process through app.core.graph_events. Changes made
+by other workers are detected through the tenant graph version kept by
+insight_cache; when it moves ahead of what this worker has applied, the
+state is reloaded from the database.
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.graph_events import add_graph_listener
+from app.core.insight_cache import insight_cache
+from app.services.network_metrics import (
+    TenantGraph,
+    build_adjacency,
+    load_tenant_graph,
+    sampled_average_path_length,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fraction of changed nodes/edges after which expensive metrics are recomputed
+DRIFT_THRESHOLD = float(os.getenv("NETWORK_METRICS_DRIFT_THRESHOLD", "0.05"))
+
+
+class TenantMetricState:
+    """Undirected graph of one tenant with incrementally maintained metrics."""
+
+    def __init__(self, graph: TenantGraph, version: int):
+        self.node_types: Dict[UUID, str] = dict(zip(graph.node_ids, graph.node_types))
+        self.neighbors: Dict[UUID, Set[UUID]] = {node_id: set() for node_id in graph.node_ids}
+        # Number of stored edges behind each undirected pair (duplicates and reverse edges)
+        self.multiplicity: Counter = Counter()
+        self.triangles: Dict[UUID, int] = defaultdict(int)
+        self.edge_count = 0
+
+        # Tenant graph version this state reflects
+        self.version = version
+        # Set when a delta references a node this state does not know about
+        self.stale = False
+
+        self._parent: Dict[UUID, UUID] = {}
+        self.component_count = 0
+        self._components_stale = True
+
+        self.expensive: Dict[str, Any] = {}
+        self.changes_since_full = 0
+        self.size_at_full = 0
+
+        adjacency = graph.adjacency.tocoo()
+        for i, j in zip(adjacency.row, adjacency.col):
+            if i < j:
+                self._add_pair(graph.node_ids[i], graph.node_ids[j])
+
+    # --- Delta application ---
+
+    def apply(self, delta: Dict[str, Any]) -> None:
+        """Apply a graph delta published through graph_events."""
+        delta_type = delta.get("type")
+        if delta_type == "node_created":
+            self._add_node(delta["id"], delta.get("node_type"))
+        elif delta_type == "node_deleted":
+            self._remove_node(delta["id"])
+        elif delta_type == "edge_created":
+            src, dst = delta["src"], delta["dst"]
+            if src not in self.neighbors or dst not in self.neighbors:
+                self.stale = True
+            elif src != dst:
+                self._add_pair(src, dst)
+        elif delta_type == "edge_deleted":
+            src, dst = delta.get("src"), delta.get("dst")
+            if src in self.neighbors and dst in self.neighbors and src != dst:
+                self._remove_pair(src, dst)
+        else:
+            return
+        self.version += 1
+        self.changes_since_full += 1
+
+    def _add_node(self, node_id: UUID, node_type: Optional[str]) -> None:
+        if node_id in self.neighbors:
+            return
+        self.neighbors[node_id] = set()
+        self.node_types[node_id] = node_type
+        if not self._components_stale:
+            self._parent[node_id] = node_id
+            self.component_count += 1
+
+    def _remove_node(self, node_id: UUID) -> None:
+        if node_id not in self.neighbors:
+            return
+        for other in list(self.neighbors[node_id]):
+            pair = self._pair(node_id, other)
+            self.multiplicity[pair] = 1
+            self._remove_pair(node_id, other)
+        del self.neighbors[node_id]
+        self.node_types.pop(node_id, None)
+        self.triangles.pop(node_id, None)
+        self._components_stale = True
+
+    @staticmethod
+    def _pair(u: UUID, v: UUID) -> Tuple[UUID, UUID]:
+        return (u, v) if str(u) < str(v) else (v, u)
+
+    def _add_pair(self, u: UUID, v: UUID) -> None:
+        pair = self._pair(u, v)
+        self.multiplicity[pair] += 1
+        if self.multiplicity[pair] > 1:
+            return
+
+        common = self.neighbors[u] & self.neighbors[v]
+        for w in common:
+            self.triangles[w] += 1
+        self.triangles[u] += len(common)
+        self.triangles[v] += len(common)
+
+        self.neighbors[u].add(v)
+        self.neighbors[v].add(u)
+        self.edge_count += 1
+        if not self._components_stale:
+            self._union(u, v)
+
+    def _remove_pair(self, u: UUID, v: UUID) -> None:
+        pair = self._pair(u, v)
+        if self.multiplicity[pair] == 0:
+            return
+        self.multiplicity[pair] -= 1
+        if self.multiplicity[pair] > 0:
+            return
+        del self.multiplicity[pair]
+
+        self.neighbors[u].discard(v)
+        self.neighbors[v].discard(u)
+        common = self.neighbors[u] & self.neighbors[v]
+        for w in common:
+            self.triangles[w] -= 1
+        self.triangles[u] -= len(common)
+        self.triangles[v] -= len(common)
+        self.edge_count -= 1
+        # The component may have split; union-find cannot undo a union
+        self._components_stale = True
+
+    # --- Union-find ---
+
+    def _find(self, node_id: UUID) -> UUID:
+        root = node_id
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[node_id] != root:  # Path compression
+            self._parent[node_id], node_id = root, self._parent[node_id]
+        return root
+
+    def _union(self, u: UUID, v: UUID) -> None:
+        root_u, root_v = self._find(u), self._find(v)
+        if root_u != root_v:
+            self._parent[root_u] = root_v
+            self.component_count -= 1
+
+    def _rebuild_components(self) -> None:
+        self._parent = {node_id: node_id for node_id in self.neighbors}
+        self.component_count = len(self._parent)
+        for (u, v) in self.multiplicity:
+            self._union(u, v)
+        self._components_stale = False
+
+    # --- Metrics ---
+
+    @property
+    def node_count(self) -> int:
+        return len(self.neighbors)
+
+    @property
+    def drift(self) -> float:
+        """Changes since the last full computation relative to the graph size at that time."""
+        return self.changes_since_full / max(1, self.size_at_full)
+
+    def to_tenant_graph(self) -> TenantGraph:
+        """Snapshot the current state as a TenantGraph (CSR adjacency)."""
+        node_ids = list(self.neighbors)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        if self.multiplicity:
+            endpoints = np.array([(index[u], index[v]) for u, v in self.multiplicity], dtype=np.int64)
+            src, dst = endpoints[:, 0], endpoints[:, 1]
+        else:
+            src = dst = np.empty(0, dtype=np.int64)
+        node_types = [self.node_types.get(node_id) for node_id in node_ids]
+        return TenantGraph(node_ids, node_types, build_adjacency(len(node_ids), src, dst))
+
+    def mark_full_computation(self, expensive: Dict[str, Any]) -> None:
+        self.expensive = expensive
+        self.changes_since_full = 0
+        self.size_at_full = self.node_count + self.edge_count
+
+    def cheap_metrics(self) -> Dict[str, Any]:
+        """Metrics maintained exactly from deltas."""
+        if self._components_stale:
+            self._rebuild_components()
+
+        n = self.node_count
+        m = self.edge_count
+        clustering_sum = 0.0
+        degree_centrality: Dict[str, float] = {}
+        degree_distribution: Counter = Counter()
+        for node_id, neighbors in self.neighbors.items():
+            degree = len(neighbors)
+            degree_distribution[degree] += 1
+            degree_centrality[str(node_id)] = degree / (n - 1) if n > 1 else 0.0
+            if degree > 1:
+                clustering_sum += 2.0 * self.triangles.get(node_id, 0) / (degree * (degree - 1))
+
+        return {
+            "node_count": n,
+            "edge_count": m,
+            "density": (2.0 * m) / (n * (n - 1)) if n > 1 else 0.0,
+            "clustering": clustering_sum / n if n else 0.0,
+            "connected_components": self.component_count,
+            "degree_centrality": degree_centrality,
+            "degree_distribution": {str(degree): count for degree, count in sorted(degree_distribution.items())},
+        }
+
+
+class IncrementalMetricsTracker:
+    """Per-tenant metric states kept current by graph deltas."""
+
+    def __init__(self, drift_threshold: float = DRIFT_THRESHOLD):
+        self.drift_threshold = drift_threshold
+        self._states: Dict[UUID, TenantMetricState] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def handle_delta(self, tenant_id: UUID, delta: Dict[str, Any]) -> None:
+        """Graph listener: apply a delta to the tenant's state if it is loaded."""
+        state = self._states.get(tenant_id)
+        if state is not None:
+            state.apply(delta)
+
+    def drop(self, tenant_id: UUID) -> None:
+        """Forget a tenant's state; it is reloaded on the next request."""
+        self._states.pop(tenant_id, None)
+
+    async def get_metrics(self, db: AsyncSession, tenant_id: UUID, allow_stale: bool = False) -> Dict[str, Any]:
+        """
+        Return the tenant's network metrics, loading or refreshing state as needed.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            allow_stale: Serve a loaded state as is instead of reloading it or
+                recomputing expensive metrics; the result is flagged "stale"
+                when a refresh is due
+
+        Returns:
+            Dictionary with network metrics
+        """
+        state = self._states.get(tenant_id)
+        if allow_stale and state is not None:
+            version = await insight_cache.get_graph_version(tenant_id)
+            needs_refresh = state.stale or state.version < version or state.drift > self.drift_threshold
+            return self._format(state, stale=needs_refresh)
+
+        async with self._locks[tenant_id]:
+            # Read the version before loading so concurrent changes force a later reload
+            version = await insight_cache.get_graph_version(tenant_id)
+            state = self._states.get(tenant_id)
+            if state is None or state.stale or state.version < version:
+                graph = await load_tenant_graph(db, tenant_id)
+                state = await asyncio.to_thread(TenantMetricState, graph, version)
+                self._states[tenant_id] = state
+                await self._recompute_expensive(state, graph)
+            elif state.drift > self.drift_threshold:
+                await self._recompute_expensive(state, state.to_tenant_graph())
+            return self._format(state, stale=False)
+
+    @staticmethod
+    def _format(state: TenantMetricState, stale: bool) -> Dict[str, Any]:
+        metrics = state.cheap_metrics()
+        metrics.update(state.expensive)
+        metrics["graph_version"] = state.version
+        metrics["drift"] = state.drift
+        metrics["stale"] = stale
+        return metrics
+
+    async def _recompute_expensive(self, state: TenantMetricState, graph: TenantGraph) -> None:
+        avg_path, path_samples = await asyncio.to_thread(sampled_average_path_length, graph.adjacency)
+        state.mark_full_computation({
+            "avg_shortest_path": avg_path,
+            "avg_shortest_path_samples": path_samples,
+        })
+
+
+# Singleton tracker instance
+network_metrics_tracker = IncrementalMetricsTracker()
+
+add_graph_listener(network_metrics_tracker.handle_delta)
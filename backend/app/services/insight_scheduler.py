@@ -0,0 +1,181 @@
+"""
+Insight Precompute Scheduler
+
+Precomputes per-tenant insights (project overlaps, network metrics,
+betweenness, heatmaps and communities) and loads the goal index in the
+background so request handlers only read cached results.
+
+A tenant is refreshed:
+
+- after graph changes, debounced so a burst of deltas causes one run
+- on a fixed schedule, well inside the insight cache TTL
+- on request, when a handler had to serve a stale value
+
+CPU-heavy steps run in the shared analytics process pool; a semaphore
+bounds how many tenants are refreshed at once.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.graph_events import add_graph_listener
+from app.db.session import SessionLocal
+from app.models.tenant import Tenant
+from app.services.community_detection import community_service
+from app.services.goal_index import goal_indexes
+from app.services.heatmap_service import HEATMAP_ENTITY_TYPES
+from app.services.incremental_metrics import network_metrics_tracker
+from app.services.insight_service import insight_service
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_INTERVAL = int(os.getenv("INSIGHT_PRECOMPUTE_INTERVAL_SECONDS", "1800"))
+PRECOMPUTE_DEBOUNCE_SECONDS = float(os.getenv("INSIGHT_PRECOMPUTE_DEBOUNCE_SECONDS", "10"))
+PRECOMPUTE_CONCURRENCY = int(os.getenv("INSIGHT_PRECOMPUTE_CONCURRENCY", "2"))
+
+# Heatmap metrics precomputed per entity type (default top_k)
+HEATMAP_METRICS = {
+    "user": ("connections", "collaboration"),
+    "team": ("connections", "collaboration", "overlap"),
+    "project": ("collaboration",),
+}
+
+PrecomputeJob = Callable[[AsyncSession, UUID], Awaitable[object]]
+
+
+def _precompute_jobs() -> List[Tuple[str, PrecomputeJob]]:
+    jobs: List[Tuple[str, PrecomputeJob]] = [
+        ("network_metrics", lambda db, tenant_id: network_metrics_tracker.get_metrics(db, tenant_id)),
+        ("communities", community_service.detect_communities),
+        ("project_overlaps", lambda db, tenant_id: insight_service.find_project_overlaps(
+            db, tenant_id, precompute=True
+        )),
+        ("betweenness", lambda db, tenant_id: insight_service.calculate_betweenness(
+            db, tenant_id, precompute=True
+        )),
+        # Loads and fits the goal index so goal suggestions do not pay for it
+        ("goal_index", goal_indexes.ensure_synced),
+    ]
+    for entity_type in HEATMAP_ENTITY_TYPES:
+        for metric in HEATMAP_METRICS.get(entity_type, ()):
+            jobs.append((
+                f"heatmap:{entity_type}:{metric}",
+                lambda db, tenant_id, entity_type=entity_type, metric=metric: insight_service.generate_heatmap_data(
+                    db, tenant_id, entity_type, metric, precompute=True
+                ),
+            ))
+    return jobs
+
+
+class InsightScheduler:
+    """Runs insight precomputation per tenant on graph changes and on a schedule."""
+
+    def __init__(
+        self,
+        interval: int = PRECOMPUTE_INTERVAL,
+        debounce: float = PRECOMPUTE_DEBOUNCE_SECONDS,
+        concurrency: int = PRECOMPUTE_CONCURRENCY,
+    ):
+        self.interval = interval
+        self.debounce = debounce
+        self.concurrency = concurrency
+        self._jobs = _precompute_jobs()
+        self._pending: Dict[UUID, asyncio.Task] = {}
+        self._running: Dict[UUID, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def handle_delta(self, tenant_id: UUID, delta: Dict[str, object]) -> None:
+        """Graph listener: refresh the tenant once the burst of changes settles."""
+        self.request_refresh(tenant_id)
+
+    def request_refresh(self, tenant_id: UUID, delay: Optional[float] = None) -> None:
+        """Schedule a refresh of a tenant unless one is already pending."""
+        if not self.started:
+            return
+        pending = self._pending.get(tenant_id)
+        if pending is not None and not pending.done():
+            return
+        self._pending[tenant_id] = asyncio.create_task(
+            self._delayed_refresh(tenant_id, self.debounce if delay is None else delay)
+        )
+
+    async def _delayed_refresh(self, tenant_id: UUID, delay: float) -> None:
+        await asyncio.sleep(delay)
+        # Changes arriving from here on schedule a new run
+        self._pending.pop(tenant_id, None)
+        await self.refresh_tenant(tenant_id)
+
+    async def refresh_tenant(self, tenant_id: UUID) -> None:
+        """Run all precompute jobs for a tenant; concurrent calls share one run."""
+        running = self._running.get(tenant_id)
+        if running is not None and not running.done():
+            await asyncio.shield(running)
+            return
+        task = asyncio.create_task(self._refresh(tenant_id))
+        self._running[tenant_id] = task
+        try:
+            await asyncio.shield(task)
+        finally:
+            if self._running.get(tenant_id) is task and task.done():
+                del self._running[tenant_id]
+
+    async def _refresh(self, tenant_id: UUID) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            for name, job in self._jobs:
+                # A fresh session per job keeps one failure from poisoning the rest
+                async with SessionLocal() as db:
+                    try:
+                        await job(db, tenant_id)
+                    except Exception as e:
+                        await db.rollback()
+                        logger.error(f"Precomputing {name} failed for tenant {tenant_id}: {e}")
+            logger.debug(f"Precomputed insights for tenant {tenant_id}")
+
+    async def refresh_all_tenants(self) -> None:
+        """Refresh every active tenant."""
+        async with SessionLocal() as db:
+            result = await db.execute(select(Tenant.id).where(Tenant.is_active.is_(True)))
+            tenant_ids = result.scalars().all()
+        await asyncio.gather(*(self.refresh_tenant(tenant_id) for tenant_id in tenant_ids))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh_all_tenants()
+            except Exception as e:
+                logger.error(f"Insight precompute run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the periodic precompute loop and change-triggered refreshes."""
+        if not self.started:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the scheduler and cancel pending refreshes."""
+        tasks = [t for t in [self._task, *self._pending.values(), *self._running.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._pending.clear()
+        self._running.clear()
+
+
+# Singleton scheduler instance
+insight_scheduler = InsightScheduler()
+
+add_graph_listener(insight_scheduler.handle_delta)
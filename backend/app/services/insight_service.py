@@ -1,22 +1,32 @@
+import asyncio
 import logging
-from collections import defaultdict
-from typing import List, Dict, Set, Tuple, Optional, Union, Any
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple, Union
 from uuid import UUID
 import re
-import json
-from datetime import datetime, timedelta
-# Removed networkx dependency
+from datetime import datetime
 from sqlalchemy import select, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-import random  # For mock data generation
 
-from app.crud.crud_project import project as crud_project
 from app.crud.crud_user import user as crud_user
 from app.crud.crud_team import team as crud_team
 from app.crud.crud_goal import goal as crud_goal
-from app.crud.crud_edge import edge as crud_edge
-from app.crud.crud_node import node as crud_node
-from app import models
+from app.core.insight_cache import insight_cache
+from app.core.process_pool import run_in_process
+from app.models.project import Project
+from app.services.betweenness import DEFAULT_EPSILON, compute_betweenness
+from app.services.community_detection import community_service
+from app.services.goal_index import goal_indexes, score_goals
+from app.services.heatmap_service import (
+    DEFAULT_TOP_K,
+    HEATMAP_ENTITY_TYPES,
+    compute_heatmap,
+    load_collaboration_data,
+)
+from app.services.incremental_metrics import network_metrics_tracker
+from app.services.metric_snapshot_service import metric_snapshot_service
+from app.services.network_metrics import load_tenant_graph
+from app.services.overlap_index import ProjectOverlapIndexRegistry
+from app.services.team_collaboration import collaboration_candidates, load_team_goals
 
 logger = logging.getLogger(__name__)
 
@@ -36,25 +46,11 @@ STOP_WORDS = set([
     "should", "now", "project", "goal", "research", "development", "study"
 ])
 
-# Redis client mock for caching
-class RedisCacheMock:
+class InsightService:
     def __init__(self):
-        self.cache = {}
-    
-    async def get(self, key: str) -> Optional[str]:
-        return self.cache.get(key)
-    
-    async def set(self, key: str, value: str, expire: int = 3600) -> None:
-        self.cache[key] = value
-        
-    async def delete(self, key: str) -> None:
-        if key in self.cache:
-            del self.cache[key]
+        # Per-tenant inverted keyword indexes for overlap detection
+        self.overlap_indexes = ProjectOverlapIndexRegistry(self._extract_keywords)
 
-# Singleton cache instance
-cache = RedisCacheMock()
-
-class InsightService:
     def _extract_keywords(self, text: str | None) -> Set[str]:
         """Extracts simple keywords from text: lowercases, splits, removes stop words."""
         if not text:
@@ -65,58 +61,69 @@ class InsightService:
         words = {word for word in cleaned_text.split() if word not in STOP_WORDS and len(word) > 2}
         return words
 
+    def _request_refresh(self, tenant_id: UUID) -> None:
+        """Ask the precompute scheduler to refresh a tenant's insights in the background."""
+        from app.services.insight_scheduler import insight_scheduler  # Imported lazily: the scheduler imports this module
+        insight_scheduler.request_refresh(tenant_id)
+
+    async def _read_precomputed(
+        self,
+        tenant_id: UUID,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        latest_key: str,
+        precompute: bool,
+    ) -> Any:
+        """
+        Read a precomputed insight, or compute it when called by the scheduler.
+
+        Request handlers get the value for the current graph version, else the
+        last known value (and a background refresh is requested). Only a tenant
+        that was never computed is computed inline.
+        """
+        if precompute:
+            return await insight_cache.get_or_compute(
+                tenant_id, key, compute, expire=3600, latest_key=latest_key  # 1 hour cache
+            )
+        return await insight_cache.get_precomputed(
+            tenant_id, key, compute, latest_key,
+            on_stale=lambda: self._request_refresh(tenant_id),
+            expire=3600,  # 1 hour cache
+        )
+
     async def find_project_overlaps(
-        self, db: AsyncSession, tenant_id: UUID, min_overlap_keywords: int = 3
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        min_overlap_keywords: int = 3,
+        mode: str = "exact",
+        precompute: bool = False,
     ) -> Dict[UUID, List[UUID]]:
-        """Finds potentially overlapping projects based on keyword matches in descriptions."""
-        
-        # Try to get from cache first
-        cache_key = f"project_overlaps:{tenant_id}"
-        cached_result = await cache.get(cache_key)
-        if cached_result:
-            try:
-                return json.loads(cached_result)
-            except:
-                logger.warning(f"Failed to parse cached project overlaps for tenant {tenant_id}")
-        
-        overlaps: Dict[UUID, List[UUID]] = defaultdict(list)
-        projects: List[models.Project] = await crud_project.get_multi_by_tenant(db=db, tenant_id=tenant_id, limit=1000) # Fetch all for now
-        
-        if len(projects) < 2:
+        """
+        Finds potentially overlapping projects based on keyword matches in descriptions.
+
+        Candidate pairs come from the tenant's inverted keyword index, so only
+        projects sharing terms are scored. ``mode`` selects exact prefix
+        filtering (default) or MinHash/LSH, which trades recall for speed.
+        """
+        index = await self.overlap_indexes.ensure_synced(db, tenant_id)
+
+        if len(index) < 2:
             return {}
 
-        # Extract keywords for all projects first
-        project_keywords: Dict[UUID, Set[str]] = {
-            p.id: self._extract_keywords(p.description) for p in projects
-        }
-
-        # Compare all pairs of projects
-        project_ids = [p.id for p in projects]
-        for i in range(len(project_ids)):
-            for j in range(i + 1, len(project_ids)):
-                proj_id_1 = project_ids[i]
-                proj_id_2 = project_ids[j]
-
-                keywords1 = project_keywords.get(proj_id_1, set())
-                keywords2 = project_keywords.get(proj_id_2, set())
-
-                if not keywords1 or not keywords2:
-                    continue
-
-                common_keywords = keywords1.intersection(keywords2)
-                
-                if len(common_keywords) >= min_overlap_keywords:
-                    logger.debug(f"Found overlap between {proj_id_1} and {proj_id_2} (Keywords: {common_keywords})")
-                    overlaps[str(proj_id_1)].append(str(proj_id_2))
-                    overlaps[str(proj_id_2)].append(str(proj_id_1))
-        
-        logger.info(f"Found {len(overlaps)} projects with potential overlaps for tenant {tenant_id}.")
-        result = dict(overlaps)
-        
-        # Cache the results (stringify UUIDs for JSON serialization)
-        await cache.set(cache_key, json.dumps(result), expire=3600)  # 1 hour cache
-        
-        return result
+        async def _compute() -> Dict[str, List[str]]:
+            result = index.find_overlaps(min_overlap_keywords=min_overlap_keywords, mode=mode)
+            logger.info(f"Found {len(result)} projects with potential overlaps for tenant {tenant_id}.")
+            return result
+
+        # Keyed on the indexed content, not the process-local version: the cache is shared across workers
+        return await self._read_precomputed(
+            tenant_id,
+            f"project_overlaps:{min_overlap_keywords}:{mode}:{index.content_hash}",
+            _compute,
+            latest_key=f"project_overlaps:{min_overlap_keywords}:{mode}",
+            precompute=precompute,
+        )
 
     async def calculate_network_metrics(
         self, db: AsyncSession, tenant_id: UUID, include_historical: bool = False
@@ -132,100 +139,19 @@ class InsightService:
         Returns:
             Dictionary with network metrics
         """
-        # Try to get from cache first
-        cache_key = f"network_metrics:{tenant_id}:{include_historical}"
-        cached_result = await cache.get(cache_key)
-        if cached_result:
-            try:
-                return json.loads(cached_result)
-            except:
-                logger.warning(f"Failed to parse cached network metrics for tenant {tenant_id}")
-        
         try:
-            # Get all nodes and edges for the tenant
-            nodes = await crud_node.get_multi_by_tenant(db=db, tenant_id=tenant_id)
-            edges = await crud_edge.get_multi_by_tenant(db=db, tenant_id=tenant_id)
-            
-            # Build a NetworkX graph
-            G = nx.Graph()
-            
-            # Add nodes
-            for node_obj in nodes:
-                G.add_node(node_obj.id, type=node_obj.type, label=node_obj.label)
-                
-            # Add edges
-            for edge_obj in edges:
-                G.add_edge(edge_obj.source_id, edge_obj.target_id, type=edge_obj.type)
-            
-            # If we have a very small graph, return basic metrics
-            if len(G.nodes) < 5:
-                results = {
-                    "node_count": len(G.nodes),
-                    "edge_count": len(G.edges),
-                    "density": 0.0,
-                    "clustering": 0.0,
-                    "connected_components": 1,
-                    "avg_shortest_path": 0.0,
-                }
-                
-                if include_historical:
-                    # Mockup historical data for demonstration
-                    results["historical"] = self._generate_mock_historical_data()
-                    
-                await cache.set(cache_key, json.dumps(results), expire=3600)
-                return results
-            
-            # Calculate basic metrics
-            results = {
-                "node_count": len(G.nodes),
-                "edge_count": len(G.edges),
-                "density": nx.density(G),
-                "clustering": nx.average_clustering(G),
-                "connected_components": nx.number_connected_components(G),
-                "degree_centrality": {str(k): v for k, v in nx.degree_centrality(G).items()},
-                "betweenness_centrality": {},  # Commented out for demo: {str(k): float(v) for k, v in nx.betweenness_centrality(G).items()},
-                "communities": []
-            }
-            
-            # Calculate communities
-            try:
-                communities_generator = nx.community.louvain_communities(G)
-                communities = list(communities_generator)
-                results["communities"] = [
-                    {
-                        "id": f"cluster-{i}",
-                        "size": len(community),
-                        "nodes": [str(node_id) for node_id in community]
-                    }
-                    for i, community in enumerate(communities)
-                ]
-                
-                # Calculate modularity
-                results["modularity"] = nx.community.modularity(G, communities)
-            except Exception as e:
-                logger.error(f"Error calculating communities: {e}")
-                results["communities"] = []
-                results["modularity"] = 0.0
-            
-            # Try to calculate avg_shortest_path for connected components
-            try:
-                # Get largest connected component
-                largest_cc = max(nx.connected_components(G), key=len)
-                largest_cc_graph = G.subgraph(largest_cc)
-                
-                # Calculate average shortest path length in the largest connected component
-                results["avg_shortest_path"] = nx.average_shortest_path_length(largest_cc_graph)
-            except Exception as e:
-                logger.error(f"Error calculating average shortest path: {e}")
-                results["avg_shortest_path"] = 0.0
-                
+            # Maintained incrementally from graph deltas; reloads and expensive
+            # recomputation are left to the precompute scheduler
+            results = await network_metrics_tracker.get_metrics(db, tenant_id, allow_stale=True)
+            # Read from the last detection run; never recomputed inline
+            results["communities"] = await community_service.get_summary(db, tenant_id)
+            if results.pop("stale") or results["communities"] is None:
+                self._request_refresh(tenant_id)
+
             # Include historical data if requested
             if include_historical:
-                results["historical"] = self._generate_mock_historical_data()
-            
-            # Cache the results
-            await cache.set(cache_key, json.dumps(results), expire=3600)  # 1 hour cache
-            
+                results["historical"] = await metric_snapshot_service.get_history(db, tenant_id)
+
             return results
         except Exception as e:
             logger.error(f"Error calculating network metrics: {e}")
@@ -235,6 +161,37 @@ class InsightService:
                 "edge_count": 0
             }
 
+    async def calculate_betweenness(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        epsilon: float = DEFAULT_EPSILON,
+        top_k: int = 20,
+        precompute: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Approximate betweenness centrality to find bridge nodes.
+        
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            epsilon: Maximum absolute error of the normalised scores
+            top_k: Number of top bridge nodes to return
+            precompute: Compute if missing (scheduler) instead of serving stale results
+            
+        Returns:
+            Dictionary with the top nodes, the error bound and its confidence
+        """
+        async def _compute() -> Dict[str, Any]:
+            graph = await load_tenant_graph(db, tenant_id)
+            result = await compute_betweenness(graph, epsilon=epsilon, top_k=top_k)
+            result["graph_version"] = await insight_cache.get_graph_version(tenant_id)
+            return result
+
+        # The cache key is scoped to the tenant's graph version by insight_cache
+        key = f"betweenness:{epsilon}:{top_k}"
+        return await self._read_precomputed(tenant_id, key, _compute, latest_key=key, precompute=precompute)
+
     async def get_metric_timeseries(
         self,
         db: AsyncSession,
@@ -247,313 +204,153 @@ class InsightService:
         """
         Get time series data for a specific metric.
         
-        For the initial implementation, returns mock data.
+        Served from the materialised metric snapshots with a range scan over
+        the rollup of the requested interval.
+
+        Raises:
+            ValueError: If a date is malformed or the metric type or interval is unknown
         """
-        # Try to get from cache first
-        cache_key = f"timeseries:{tenant_id}:{metric_type}:{start_date}:{end_date}:{interval}"
-        cached_result = await cache.get(cache_key)
-        if cached_result:
-            try:
-                return json.loads(cached_result)
-            except:
-                logger.warning(f"Failed to parse cached timeseries for tenant {tenant_id}")
-                
-        # Parse dates
         try:
             start = datetime.fromisoformat(start_date)
             end = datetime.fromisoformat(end_date)
         except ValueError:
-            logger.error(f"Invalid date format: {start_date} or {end_date}")
-            return []
-            
-        # Generate mock time series data
-        data = self._generate_mock_timeseries(metric_type, start, end, interval)
-        
-        # Cache the results
-        await cache.set(cache_key, json.dumps(data), expire=3600)  # 1 hour cache
-        
-        return data
+            raise ValueError(f"Invalid date format: {start_date} or {end_date}")
+
+        return await metric_snapshot_service.get_timeseries(
+            db, tenant_id, metric_type, start, end, interval
+        )
 
     async def generate_heatmap_data(
         self,
         db: AsyncSession,
         tenant_id: UUID,
         entity_type: str,
-        metric: str
+        metric: str,
+        top_k: int = DEFAULT_TOP_K,
+        precompute: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Generate heatmap data for visualization.
         
-        For initial implementation, returns mock data.
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            entity_type: "user", "team" or "project"
+            metric: Interaction metric (e.g. "connections", "collaboration", "overlap")
+            top_k: Maximum number of entities per axis
+            precompute: Compute if missing (scheduler) instead of serving stale results
+            
+        Returns:
+            List of {"x", "y", "x_name", "y_name", "value", "count"} heatmap cells (x and y are entity IDs)
         """
-        # Try to get from cache first
-        cache_key = f"heatmap:{tenant_id}:{entity_type}:{metric}"
-        cached_result = await cache.get(cache_key)
-        if cached_result:
-            try:
-                return json.loads(cached_result)
-            except:
-                logger.warning(f"Failed to parse cached heatmap for tenant {tenant_id}")
-                
-        # Generate mock heatmap data
-        if entity_type == "team":
-            data = self._generate_mock_team_heatmap(metric)
-        elif entity_type == "user":
-            data = self._generate_mock_user_heatmap(metric)
-        else:
-            data = self._generate_mock_generic_heatmap(entity_type, metric)
-        
-        # Cache the results
-        await cache.set(cache_key, json.dumps(data), expire=3600)  # 1 hour cache
-        
-        return data
+        if entity_type not in HEATMAP_ENTITY_TYPES:
+            logger.warning(f"Unsupported heatmap entity type: {entity_type}")
+            return []
 
-    def _generate_mock_historical_data(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Generate mock historical data for demonstrations"""
-        now = datetime.now()
-        days = 30
-        
-        density_data = []
-        clustering_data = []
-        component_data = []
-        
-        # Start with reasonable base values
-        base_density = 0.35
-        base_clustering = 0.55
-        base_components = 3
-        
-        # Add some trend and randomness
-        for i in range(days):
-            date = now - timedelta(days=days-i-1)
-            date_str = date.strftime("%Y-%m-%d")
-            
-            # Add slight upward trend with noise
-            trend_factor = i / (days * 2)  # Maxes out at 0.5 increase
-            random_factor = random.uniform(-0.05, 0.05)
-            
-            density_data.append({
-                "date": date_str,
-                "value": base_density + trend_factor + random_factor
-            })
-            
-            clustering_data.append({
-                "date": date_str,
-                "value": base_clustering + trend_factor + random_factor
-            })
-            
-            # Integer values for components with occasional changes
-            if i % 5 == 0 and random.random() > 0.7:
-                base_components += random.choice([-1, 1])
-                base_components = max(1, base_components)  # Ensure minimum of 1 component
-                
-            component_data.append({
-                "date": date_str,
-                "value": base_components
-            })
-        
-        return {
-            "density": density_data,
-            "clustering": clustering_data,
-            "components": component_data
-        }
-
-    def _generate_mock_timeseries(
-        self, 
-        metric_type: str, 
-        start: datetime,
-        end: datetime,
-        interval: str
+        async def _compute() -> List[Dict[str, Any]]:
+            data = await load_collaboration_data(db, tenant_id)
+            return await run_in_process(compute_heatmap, data, entity_type, metric, top_k)
+
+        key = f"heatmap:{entity_type}:{metric}:{top_k}"
+        return await self._read_precomputed(tenant_id, key, _compute, latest_key=key, precompute=precompute)
+
+    async def suggest_project_goals(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        top_k: int = 3,
+        threshold: float = 0.1,
     ) -> List[Dict[str, Any]]:
-        """Generate mock time series data for the specified metric"""
-        result = []
-        
-        # Determine interval in days
-        interval_days = 1  # default daily
-        if interval == "weekly":
-            interval_days = 7
-        elif interval == "monthly":
-            interval_days = 30
-        elif interval == "hourly":
-            # For hourly, we'll use a fraction of a day
-            interval_days = 1/24
-        
-        # Base values for different metrics
-        base_values = {
-            "density": 0.35,
-            "clustering": 0.55,
-            "centralization": 0.42,
-            "components": 3,
-            "modularity": 0.65,
-            "activity": 75
-        }
-        
-        # Trend factors
-        trend_factors = {
-            "density": 0.001,
-            "clustering": 0.002,
-            "centralization": -0.0005,
-            "components": 0,
-            "modularity": 0.0015,
-            "activity": 0.5
-        }
-        
-        # Volatility factors (randomness)
-        volatility = {
-            "density": 0.05,
-            "clustering": 0.08,
-            "centralization": 0.06,
-            "components": 1,
-            "modularity": 0.04,
-            "activity": 15
-        }
-        
-        # Default to density if metric type not specified
-        if metric_type not in base_values:
-            metric_type = "density"
-            
-        # Generate data points
-        current_date = start
-        day_count = 0
-        while current_date <= end:
-            # Calculate value with trend and randomness
-            trend = trend_factors.get(metric_type, 0) * day_count
-            random_factor = random.uniform(-volatility.get(metric_type, 0.05), 
-                                          volatility.get(metric_type, 0.05))
-            
-            value = base_values.get(metric_type, 0.5) + trend + random_factor
-            
-            # Ensure reasonable values
-            if metric_type in ["density", "clustering", "centralization", "modularity"]:
-                value = max(0.01, min(0.99, value))  # Between 0.01 and 0.99
-            elif metric_type == "components":
-                value = max(1, round(value))  # At least 1 component, rounded to integer
-            elif metric_type == "activity":
-                value = max(0, round(value))  # Non-negative integer
-                
-            result.append({
-                "date": current_date.strftime("%Y-%m-%d"),
-                "value": value
-            })
-            
-            # Move to next interval
-            current_date += timedelta(days=interval_days)
-            day_count += interval_days
-            
-        return result
+        """
+        Suggest goals for projects that are not aligned with one yet.
+
+        All unaligned projects are scored against the tenant's goal index
+        with one sparse similarity product, in a worker thread.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            top_k: Maximum number of goals per project
+            threshold: Minimum cosine similarity of a suggested goal
+
+        Returns:
+            List of {"project_id", "project_name", "goals"} for projects with
+            at least one similar goal; goals are {"goal_id", "goal_name",
+            "similarity"}, best match first
+        """
+        index = await goal_indexes.ensure_synced(db, tenant_id)
+        if not len(index):
+            return []
+
+        result = await db.execute(
+            select(Project.id, Project.name, Project.description).where(
+                Project.tenant_id == tenant_id,
+                Project.goal_id.is_(None),
+            )
+        )
+        projects = result.all()
+        if not projects:
+            return []
 
-    def _generate_mock_team_heatmap(self, metric: str) -> List[Dict[str, Any]]:
-        """Generate mock heatmap data for team relationships"""
-        teams = [
-            "Research Team", "Development Team", "Product Team", 
-            "Marketing Team", "Sales Team", "Support Team"
+        texts = [f"{name} {description or ''}" for _, name, description in projects]
+        matches = await asyncio.to_thread(score_goals, *index.snapshot(), texts, top_k, threshold)
+        return [
+            {
+                "project_id": str(project_id),
+                "project_name": name,
+                "goals": [
+                    {"goal_id": goal_id, "goal_name": index.title(goal_id), "similarity": similarity}
+                    for goal_id, similarity in goals
+                ],
+            }
+            for (project_id, name, _), goals in zip(projects, matches)
+            if goals
         ]
-        
-        result = []
-        
-        for i, team1 in enumerate(teams):
-            for j, team2 in enumerate(teams):
-                # Skip self-connections
-                if i == j:
-                    continue
-                    
-                # For collaboration metric
-                if metric == "collaboration":
-                    # More collaboration between adjacent teams
-                    base_value = 0.7 if abs(i - j) == 1 else 0.3
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.2, 0.2)))
-                
-                # For overlap metric
-                elif metric == "overlap":
-                    # More overlap between teams with similar roles
-                    is_similar = (
-                        (i < 3 and j < 3) or  # Both are technical teams
-                        (i >= 3 and j >= 3)    # Both are customer-facing teams
-                    )
-                    base_value = 0.6 if is_similar else 0.2
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.2, 0.2)))
-                    
-                # Default to connections metric
-                else:
-                    # Basic connection strength
-                    base_value = 0.5
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.3, 0.3)))
-                
-                result.append({
-                    "x": team1,
-                    "y": team2,
-                    "value": value
-                })
-                
-        return result
-
-    def _generate_mock_user_heatmap(self, metric: str) -> List[Dict[str, Any]]:
-        """Generate mock heatmap data for user relationships"""
-        users = [
-            "John Doe", "Jane Smith", "Mike Johnson", 
-            "Lisa Brown", "David Lee", "Sarah Wilson"
+
+    async def find_team_collaborations(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        top_k: int = 5,
+        min_shared: int = 1,
+        min_jaccard: float = 0.0,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find team pairs working towards the same goals.
+
+        Every team pair is scored with one product of the sparse team x goal
+        matrix, in the analytics process pool.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            top_k: Partners kept per team
+            min_shared: Minimum number of shared goals
+            min_jaccard: Minimum Jaccard similarity of the two teams' goal sets
+
+        Returns:
+            List of {"teams", "common_goals", "shared", "collaboration_score"},
+            best pairs first; collaboration_score is the Jaccard similarity
+        """
+        teams, goals, incidence = await load_team_goals(db, tenant_id)
+        if len(teams) < 2:
+            return []
+
+        candidates = await run_in_process(collaboration_candidates, incidence, min_shared, min_jaccard, top_k)
+        return [
+            {
+                "teams": [
+                    {"id": str(teams[i].id), "name": teams[i].name}
+                    for i in (candidate["team_a"], candidate["team_b"])
+                ],
+                "common_goals": [
+                    {"id": str(goals[g].id), "name": goals[g].title} for g in candidate["goals"]
+                ],
+                "shared": candidate["shared"],
+                "collaboration_score": candidate["jaccard"],
+            }
+            for candidate in candidates
         ]
-        
-        result = []
-        
-        for i, user1 in enumerate(users):
-            for j, user2 in enumerate(users):
-                # Skip self-connections
-                if i == j:
-                    continue
-                    
-                # For communication metric
-                if metric == "communication":
-                    # More communication between users with similar indices
-                    is_team = (
-                        (i < 3 and j < 3) or  # Both in first team
-                        (i >= 3 and j >= 3)    # Both in second team
-                    )
-                    base_value = 0.7 if is_team else 0.2
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.2, 0.2)))
-                
-                # For knowledge sharing metric
-                elif metric == "knowledge_sharing":
-                    # Knowledge sharing is stronger between adjacent users
-                    base_value = 0.8 if abs(i - j) == 1 else 0.4
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.3, 0.3)))
-                    
-                # Default to connections metric
-                else:
-                    # Basic connection strength
-                    base_value = 0.5
-                    value = max(0.1, min(0.9, base_value + random.uniform(-0.4, 0.4)))
-                
-                result.append({
-                    "x": user1,
-                    "y": user2,
-                    "value": value
-                })
-                
-        return result
-
-    def _generate_mock_generic_heatmap(self, entity_type: str, metric: str) -> List[Dict[str, Any]]:
-        """Generate mock heatmap data for generic entity relationships"""
-        # Create 5 generic entities
-        entities = [f"{entity_type.capitalize()} {i+1}" for i in range(5)]
-        
-        result = []
-        
-        for i, entity1 in enumerate(entities):
-            for j, entity2 in enumerate(entities):
-                # Skip self-connections
-                if i == j:
-                    continue
-                
-                # Generate a value between 0.1 and 0.9
-                value = max(0.1, min(0.9, 0.5 + random.uniform(-0.4, 0.4)))
-                
-                result.append({
-                    "x": entity1,
-                    "y": entity2,
-                    "value": value
-                })
-                
-        return result
 
 # Singleton instance
 insight_service = InsightService() 
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""
+Job Service
+
+Runs long analytics requests as background jobs so they never hold an HTTP
+connection open. Submitting a job returns its ID immediately; the job runs
+as a task on this worker and its state and result are stored in the shared
+insight cache backend with a TTL, so any worker can answer status polls.
+Completion is not pushed over the delta stream: it broadcasts to every
+connected client regardless of tenant, so clients poll the job instead.
+
+Each job kind has a parameter schema with the same bounds as its
+synchronous endpoint; invalid parameters are rejected at submit time.
+
+Identical jobs (same tenant, kind and parameters) share one run while in
+flight. Each tenant may only run JOB_TENANT_CONCURRENCY jobs at once across
+all workers: a job runs once it holds one of the tenant's slot locks in the
+shared cache backend.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.schemas.job import (
+    BetweennessJobParams,
+    CommunitiesJobParams,
+    HeatmapJobParams,
+    JobParams,
+    NetworkMetricsJobParams,
+    ProjectOverlapsJobParams,
+    RecommendationsJobParams,
+)
+from app.services.community_detection import community_service
+from app.services.insight_service import insight_service
+
+logger = logging.getLogger(__name__)
+
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL_SECONDS", "3600"))
+# Upper bound on a job's run time; also how long a dedupe entry can outlive a crashed worker
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT_SECONDS", "1800"))
+JOB_TENANT_CONCURRENCY = int(os.getenv("JOB_TENANT_CONCURRENCY", "2"))
+# How often a queued job retries the tenant's slots
+JOB_SLOT_POLL_INTERVAL = 0.5
+
+JobHandler = Callable[..., Awaitable[Any]]
+
+
+class JobError(Exception):
+    """Raised for invalid job submissions."""
+    pass
+
+
+class JobParamsError(JobError):
+    """Raised when job parameters fail validation; ``errors`` lists the problems."""
+
+    def __init__(self, kind: str, errors: List[Dict[str, Any]]):
+        super().__init__(f"Invalid parameters for job '{kind}'")
+        self.errors = errors
+
+
+class JobService:
+    """Submits, runs and tracks background analytics jobs."""
+
+    def __init__(self, tenant_concurrency: int = JOB_TENANT_CONCURRENCY):
+        self.tenant_concurrency = tenant_concurrency
+        self._handlers: Dict[str, Tuple[JobHandler, Type[JobParams]]] = {}
+        # Strong references so running tasks are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def register(self, kind: str, handler: JobHandler, params_model: Type[JobParams]) -> None:
+        """Register a coroutine ``handler(db, tenant_id, **params)`` and its parameter schema for a job kind."""
+        self._handlers[kind] = (handler, params_model)
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    @staticmethod
+    def _job_key(job_id: UUID) -> str:
+        return f"job:{job_id}"
+
+    @staticmethod
+    def _slot_key(tenant_id: UUID, slot: int) -> str:
+        return f"job:slot:{tenant_id}:{slot}"
+
+    @staticmethod
+    def _dedupe_key(tenant_id: UUID, kind: str, params: Dict[str, Any]) -> str:
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"job:inflight:{tenant_id}:{kind}:{digest[:32]}"
+
+    async def _save(self, job: Dict[str, Any]) -> None:
+        await insight_cache.backend.set(self._job_key(job["id"]), json.dumps(job, default=str), expire=JOB_RESULT_TTL)
+
+    async def get_job(self, tenant_id: UUID, job_id: UUID) -> Optional[Dict[str, Any]]:
+        """Return a job of the tenant, or None if unknown, expired or owned by another tenant."""
+        raw = await insight_cache.backend.get(self._job_key(job_id))
+        if raw is None:
+            return None
+        job = json.loads(raw)
+        if job.get("tenant_id") != str(tenant_id):
+            return None
+        return job
+
+    async def submit(self, tenant_id: UUID, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Submit a job, or join an identical one that is still in flight.
+
+        Args:
+            tenant_id: Tenant the job runs for
+            kind: Registered job kind
+            params: Keyword arguments for the job handler
+
+        Returns:
+            The job record (status "queued" for new jobs)
+
+        Raises:
+            JobError: If the kind is unknown
+            JobParamsError: If the parameters fail the kind's schema
+        """
+        registered = self._handlers.get(kind)
+        if registered is None:
+            raise JobError(f"Unknown job kind '{kind}'. Available: {', '.join(self.kinds)}")
+        handler, params_model = registered
+        try:
+            # Normalised (defaults filled in) so equivalent submissions share a dedupe key
+            params = params_model(**(params or {})).model_dump()
+        except ValidationError as e:
+            raise JobParamsError(kind, e.errors(include_url=False, include_context=False))
+
+        job_id = uuid.uuid4()
+        job = {
+            "id": str(job_id),
+            "tenant_id": str(tenant_id),
+            "kind": kind,
+            "params": params,
+            "status": "queued",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        # Saved before claiming the dedupe slot, so a job found through the slot always has a record
+        await self._save(job)
+
+        dedupe_key = self._dedupe_key(tenant_id, kind, params)
+        if not await insight_cache.backend.acquire_lock(dedupe_key, str(job_id), JOB_TIMEOUT):
+            existing_id = await insight_cache.backend.get(dedupe_key)
+            if existing_id is not None:
+                existing = await self.get_job(tenant_id, UUID(existing_id))
+                if existing is not None and existing["status"] in ("queued", "running"):
+                    await insight_cache.backend.delete(self._job_key(job_id))
+                    return existing
+            # The in-flight job vanished (expired or crashed); take over the slot
+            await insight_cache.backend.set(dedupe_key, str(job_id), expire=JOB_TIMEOUT)
+
+        task = asyncio.create_task(self._run(job, handler, dedupe_key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def shutdown(self) -> None:
+        """Cancel running jobs; their records are marked failed."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _acquire_slot(self, tenant_id: UUID, job_id: str) -> Optional[str]:
+        """Wait for one of the tenant's concurrency slots; returns its key, or None if locks are unavailable."""
+        while True:
+            for slot in range(self.tenant_concurrency):
+                key = self._slot_key(tenant_id, slot)
+                try:
+                    # Expires with the job timeout, so a crashed worker cannot hold a slot forever
+                    if await insight_cache.backend.acquire_lock(key, job_id, JOB_TIMEOUT + 60):
+                        return key
+                except Exception as e:
+                    logger.warning(f"Job slot lock unavailable for tenant {tenant_id}: {e}")
+                    return None
+            await asyncio.sleep(JOB_SLOT_POLL_INTERVAL)
+
+    async def _run(self, job: Dict[str, Any], handler: JobHandler, dedupe_key: str) -> None:
+        tenant_id = UUID(job["tenant_id"])
+        slot_key = None
+        try:
+            slot_key = await self._acquire_slot(tenant_id, job["id"])
+            job["status"] = "running"
+            job["started_at"] = datetime.now(timezone.utc).isoformat()
+            await self._save(job)
+
+            async with SessionLocal() as db:
+                try:
+                    result = await asyncio.wait_for(handler(db, tenant_id, **job["params"]), JOB_TIMEOUT)
+                    job["status"] = "succeeded"
+                    job["result"] = result
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Job {job['id']} ({job['kind']}) failed for tenant {tenant_id}: {e}")
+                    job["status"] = "failed"
+                    job["error"] = str(e) or e.__class__.__name__
+        finally:
+            if job["status"] in ("queued", "running"):
+                job["status"] = "failed"
+                job["error"] = "Job was cancelled"
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+            try:
+                await self._save(job)
+                await insight_cache.backend.release_lock(dedupe_key, job["id"])
+                if slot_key is not None:
+                    await insight_cache.backend.release_lock(slot_key, job["id"])
+            except Exception as e:
+                logger.error(f"Failed to store result of job {job['id']}: {e}")
+
+
+# --- Job kinds ---
+
+async def _network_metrics_job(db: AsyncSession, tenant_id: UUID, include_historical: bool = False):
+    return await insight_service.calculate_network_metrics(db, tenant_id, include_historical=include_historical)
+
+
+async def _project_overlaps_job(db: AsyncSession, tenant_id: UUID, min_overlap_keywords: int = 3, mode: str = "exact"):
+    return await insight_service.find_project_overlaps(
+        db, tenant_id, min_overlap_keywords=min_overlap_keywords, mode=mode, precompute=True
+    )
+
+
+async def _betweenness_job(db: AsyncSession, tenant_id: UUID, epsilon: float = 0.05, top_k: int = 20):
+    return await insight_service.calculate_betweenness(db, tenant_id, epsilon=epsilon, top_k=top_k, precompute=True)
+
+
+async def _heatmap_job(db: AsyncSession, tenant_id: UUID, entity_type: str, metric: str = "connections", top_k: int = 50):
+    return await insight_service.generate_heatmap_data(db, tenant_id, entity_type, metric, top_k=top_k, precompute=True)
+
+
+async def _communities_job(db: AsyncSession, tenant_id: UUID):
+    return await community_service.detect_communities(db, tenant_id)
+
+
+async def _recommendations_job(db: AsyncSession, tenant_id: UUID, top_k: int = 3, partners_per_team: int = 5):
+    return {
+        "goal_alignment": await insight_service.suggest_project_goals(db, tenant_id, top_k=top_k),
+        "team_collaborations": await insight_service.find_team_collaborations(db, tenant_id, top_k=partners_per_team),
+    }
+
+
+# Singleton service instance
+job_service = JobService()
+
+job_service.register("network_metrics", _network_metrics_job, NetworkMetricsJobParams)
+job_service.register("project_overlaps", _project_overlaps_job, ProjectOverlapsJobParams)
+job_service.register("betweenness", _betweenness_job, BetweennessJobParams)
+job_service.register("heatmap", _heatmap_job, HeatmapJobParams)
+job_service.register("communities", _communities_job, CommunitiesJobParams)
+job_service.register("recommendations", _recommendations_job, RecommendationsJobParams)
@@ -0,0 +1,232 @@
+"""
+LLM Service
+
+Text generation for briefings and summaries, behind a response cache.
+
+Responses are content-addressed: the cache key is a SHA-256 hash of the
+backend, model, prompt and generation parameters, so the same prompt built
+from the same data is answered from the cache instead of the model. Entries
+live in a size-bounded in-process LRU (LLM_CACHE_MAX_ENTRIES) in front of
+the shared cache backend, both with a TTL (LLM_CACHE_TTL_SECONDS).
+Concurrent identical requests in a process share one model call.
+
+Two backends are available:
+
+- ``openai``: the OpenAI (or Azure OpenAI) chat completions API, over the
+  shared keep-alive client of ``app.core.http_clients``
+- ``stub``: a deterministic local summariser for development and tests
+
+LLM_BACKEND selects one explicitly; by default ``openai`` is used when an API
+key is configured and OpenAI is not disabled, otherwise ``stub``.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core import http_clients
+from app.core.config import settings
+from app.core.insight_cache import insight_cache
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "30"))
+STUB_MAX_LINES = 4
+
+
+class LLMError(Exception):
+    """Raised when the model backend fails to produce a response."""
+    pass
+
+
+class StubLLMBackend:
+    """Deterministic local backend: summarises the bullet lines of the prompt."""
+
+    name = "stub"
+    model = "stub"
+
+    async def generate(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        lines = [line[2:].strip() for line in prompt.splitlines() if line.startswith("- ")]
+        if not lines:
+            lines = [line.strip() for line in prompt.splitlines() if line.strip()][:1]
+        summary = "; ".join(lines[:STUB_MAX_LINES])
+        if len(lines) > STUB_MAX_LINES:
+            summary += f"; and {len(lines) - STUB_MAX_LINES} more"
+        words = summary.split()
+        return " ".join(words[:max_tokens]) + ("." if words else "")
+
+    async def close(self) -> None:
+        pass
+
+
+class OpenAIBackend:
+    """OpenAI / Azure OpenAI chat completions over HTTP."""
+
+    name = "openai"
+
+    def __init__(self):
+        self.model = settings.OPENAI_MODEL or "gpt-3.5-turbo"
+        if settings.OPENAI_IS_AZURE:
+            endpoint = (settings.AZURE_OPENAI_ENDPOINT or "").rstrip("/")
+            self.url = (
+                f"{endpoint}/openai/deployments/{settings.AZURE_OPENAI_DEPLOYMENT}/chat/completions"
+                f"?api-version={settings.AZURE_OPENAI_API_VERSION}"
+            )
+            self.headers = {"api-key": settings.OPENAI_API_KEY or ""}
+        else:
+            self.url = "https://api.openai.com/v1/chat/completions"
+            self.headers = {"Authorization": f"Bearer {settings.OPENAI_API_KEY}"}
+
+    async def generate(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        try:
+            response = await http_clients.get_client("openai").post(
+                self.url, headers=self.headers, json=payload, timeout=LLM_REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"].strip()
+        except (httpx.HTTPError, KeyError, IndexError, ValueError) as e:
+            raise LLMError(f"OpenAI request failed: {e}")
+
+    async def close(self) -> None:
+        # The shared "openai" client is closed with the other shared clients
+        pass
+
+
+def _create_backend():
+    backend = os.getenv("LLM_BACKEND")
+    if backend is None:
+        backend = "openai" if settings.OPENAI_API_KEY and not settings.DISABLE_OPENAI else "stub"
+    if backend == "openai":
+        return OpenAIBackend()
+    if backend != "stub":
+        logger.warning(f"Unknown LLM_BACKEND '{backend}', using the stub backend")
+    return StubLLMBackend()
+
+
+class LLMService:
+    """Cached, coalesced access to the configured LLM backend."""
+
+    def __init__(self, backend=None, ttl: int = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self._backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # cache key -> (monotonic expiry, response)
+        self._lru: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = _create_backend()
+            logger.info(f"LLM service uses the {self._backend.name} backend ({self._backend.model})")
+        return self._backend
+
+    def cache_key(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        """Content address of a request: hash of backend, model, prompt and parameters."""
+        request = {
+            "backend": self.backend.name,
+            "model": self.backend.model,
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        digest = hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"llm:{digest}"
+
+    def _get_local(self, key: str) -> Optional[str]:
+        item = self._lru.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        self._lru[key] = (time.monotonic() + self.ttl, value)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def generate_summary(self, prompt: str, max_tokens: int = 200, temperature: float = 0.5) -> str:
+        """
+        Generate a completion for ``prompt``, served from the cache when possible.
+
+        Args:
+            prompt: Full prompt text
+            max_tokens: Maximum tokens in the response
+            temperature: Sampling temperature
+
+        Returns:
+            The generated text
+
+        Raises:
+            LLMError: If the backend fails
+        """
+        key = self.cache_key(prompt, max_tokens, temperature)
+        value = self._get_local(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        # Identical in-flight requests share one task, which outlives callers that time out
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._generate(key, prompt, max_tokens, temperature))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    async def _generate(self, key: str, prompt: str, max_tokens: int, temperature: float) -> str:
+        value = await self._get_shared(key)
+        if value is None:
+            self.misses += 1
+            value = await self.backend.generate(prompt, max_tokens, temperature)
+            await self._set_shared(key, value)
+        else:
+            self.hits += 1
+        self._set_local(key, value)
+        return value
+
+    async def _get_shared(self, key: str) -> Optional[str]:
+        try:
+            return await insight_cache.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache backend get failed: {e}")
+            return None
+
+    async def _set_shared(self, key: str, value: str) -> None:
+        try:
+            await insight_cache.backend.set(key, value, expire=self.ttl)
+        except Exception as e:
+            logger.warning(f"LLM cache backend set failed: {e}")
+
+    async def close(self) -> None:
+        """Release the backend's HTTP resources (called on application shutdown)."""
+        if self._backend is not None:
+            await self._backend.close()
+
+
+# Singleton service instance
+llm_service = LLMService()
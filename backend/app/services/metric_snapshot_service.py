@@ -0,0 +1,329 @@
+"""
+Metric Snapshot Service
+
+Materialises per-tenant network metrics as a time series so history is read
+from storage instead of being recomputed.
+
+A background job takes a "raw" snapshot of every tenant at a fixed interval
+and folds it into hourly, daily, weekly and monthly rollup rows as a running
+mean, so each snapshot touches one row per resolution. Every resolution has
+its own retention window. Time series requests are a primary-key range scan
+over (tenant_id, resolution, bucket_start).
+
+Besides the network metrics, each snapshot records the modularity of the
+tenant's stored community partition and its activity (activity log entries
+in the trailing ACTIVITY_WINDOW).
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.models.activity_log import ActivityLog
+from app.models.metric_snapshot import MetricSnapshot
+from app.models.tenant import Tenant
+from app.services.community_detection import community_service
+from app.services.incremental_metrics import network_metrics_tracker
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_INTERVAL = int(os.getenv("METRIC_SNAPSHOT_INTERVAL_SECONDS", "900"))
+# Trailing window the "activity" metric counts activity log entries over
+ACTIVITY_WINDOW = timedelta(days=1)
+
+ROLLUP_RESOLUTIONS = ("hourly", "daily", "weekly", "monthly")
+
+# How long rows of each resolution are kept (None keeps them forever)
+RETENTION: Dict[str, Optional[timedelta]] = {
+    "raw": timedelta(days=2),
+    "hourly": timedelta(days=30),
+    "daily": timedelta(days=365),
+    "weekly": timedelta(weeks=156),
+    "monthly": None,
+}
+
+# Snapshot metric name -> key in the network metrics response
+SNAPSHOT_METRICS = {
+    "node_count": "node_count",
+    "edge_count": "edge_count",
+    "density": "density",
+    "clustering": "clustering",
+    "components": "connected_components",
+    "avg_shortest_path": "avg_shortest_path",
+}
+
+# Every metric a snapshot stores and a time series can be requested for
+METRIC_TYPES = frozenset(SNAPSHOT_METRICS) | {"centralization", "modularity", "activity"}
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Start of the bucket of the given resolution that contains ``ts``."""
+    if resolution == "raw":
+        epoch = int(ts.timestamp())
+        return datetime.fromtimestamp(epoch - epoch % SNAPSHOT_INTERVAL, tz=timezone.utc)
+    day = ts.replace(minute=0, second=0, microsecond=0)
+    if resolution == "hourly":
+        return day
+    day = day.replace(hour=0)
+    if resolution == "daily":
+        return day
+    if resolution == "weekly":
+        return day - timedelta(days=day.weekday())
+    if resolution == "monthly":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def extract_snapshot_metrics(metrics: Dict[str, Any]) -> Dict[str, float]:
+    """Reduce a network metrics response to the scalar values stored per snapshot."""
+    values = {
+        name: float(metrics.get(key) or 0.0)
+        for name, key in SNAPSHOT_METRICS.items()
+    }
+    # Freeman degree centralization from the normalised degree centralities
+    centralities = list((metrics.get("degree_centrality") or {}).values())
+    n = len(centralities)
+    if n > 2:
+        peak = max(centralities)
+        values["centralization"] = sum(peak - c for c in centralities) / (n - 2)
+    else:
+        values["centralization"] = 0.0
+    return values
+
+
+class MetricSnapshotService:
+    """Stores, rolls up and serves tenant metric snapshots."""
+
+    def __init__(self, interval: int = SNAPSHOT_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def take_snapshot(self, db: AsyncSession, tenant_id: UUID, now: Optional[datetime] = None) -> bool:
+        """
+        Record the tenant's current metrics and fold them into the rollups.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant to snapshot
+            now: Snapshot time (defaults to the current UTC time)
+
+        Returns:
+            True if a snapshot was written, False if this interval was already taken
+        """
+        now = now or datetime.now(timezone.utc)
+        raw_bucket = bucket_start(now, "raw")
+
+        # Only one worker snapshots a tenant per interval
+        lock_key = f"lock:metric_snapshot:{tenant_id}:{raw_bucket.isoformat()}"
+        token = uuid.uuid4().hex
+        try:
+            if not await insight_cache.backend.acquire_lock(lock_key, token, self.interval):
+                return False
+        except Exception as e:
+            logger.warning(f"Snapshot lock unavailable for tenant {tenant_id}: {e}")
+
+        # Gather values first: a failed community read rolls the session back
+        values = extract_snapshot_metrics(await network_metrics_tracker.get_metrics(db, tenant_id))
+        values.update(await self._community_and_activity(db, tenant_id, now))
+
+        buckets = {"raw": raw_bucket}
+        buckets.update({resolution: bucket_start(now, resolution) for resolution in ROLLUP_RESOLUTIONS})
+
+        result = await db.execute(
+            select(MetricSnapshot).where(
+                MetricSnapshot.tenant_id == tenant_id,
+                MetricSnapshot.resolution.in_(list(buckets)),
+                MetricSnapshot.bucket_start.in_(list(set(buckets.values()))),
+            )
+        )
+        existing = {
+            row.resolution: row
+            for row in result.scalars().all()
+            if buckets.get(row.resolution) == row.bucket_start
+        }
+        if "raw" in existing:
+            return False
+
+        db.add(MetricSnapshot(
+            tenant_id=tenant_id, resolution="raw", bucket_start=raw_bucket, samples=1, metrics=values
+        ))
+        for resolution in ROLLUP_RESOLUTIONS:
+            row = existing.get(resolution)
+            if row is None:
+                db.add(MetricSnapshot(
+                    tenant_id=tenant_id,
+                    resolution=resolution,
+                    bucket_start=buckets[resolution],
+                    samples=1,
+                    metrics=dict(values),
+                ))
+                continue
+            # Running mean: fold the new sample in without re-reading raw rows.
+            # Metrics missing from this sample keep their previous mean.
+            samples = row.samples + 1
+            metrics = dict(row.metrics)
+            for name, value in values.items():
+                previous = metrics.get(name, value)
+                metrics[name] = previous + (value - previous) / samples
+            row.metrics = metrics
+            row.samples = samples
+
+        await db.commit()
+        return True
+
+    async def _community_and_activity(self, db: AsyncSession, tenant_id: UUID, now: datetime) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        try:
+            summary = await community_service.get_summary(db, tenant_id, compute_if_missing=True)
+            if summary is not None:
+                values["modularity"] = float(summary.get("modularity") or 0.0)
+        except Exception as e:
+            await db.rollback()
+            logger.warning(f"Failed to read community modularity for tenant {tenant_id}: {e}")
+
+        result = await db.execute(
+            select(func.count(ActivityLog.id)).where(
+                ActivityLog.tenant_id == tenant_id,
+                ActivityLog.timestamp > now - ACTIVITY_WINDOW,
+                ActivityLog.timestamp <= now,
+            )
+        )
+        values["activity"] = float(result.scalar_one())
+        return values
+
+    async def apply_retention(self, db: AsyncSession, now: Optional[datetime] = None) -> None:
+        """Delete snapshot rows older than the retention window of their resolution."""
+        now = now or datetime.now(timezone.utc)
+        for resolution, window in RETENTION.items():
+            if window is None:
+                continue
+            await db.execute(
+                delete(MetricSnapshot).where(
+                    MetricSnapshot.resolution == resolution,
+                    MetricSnapshot.bucket_start < now - window,
+                )
+            )
+        await db.commit()
+
+    async def get_timeseries(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        metric_type: str,
+        start: datetime,
+        end: datetime,
+        interval: str = "daily",
+    ) -> List[Dict[str, Any]]:
+        """
+        Read a metric time series from the stored rollups.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to filter data
+            metric_type: Snapshot metric name, one of METRIC_TYPES
+            start: Start of the range (inclusive)
+            end: End of the range (inclusive)
+            interval: "raw", "hourly", "daily", "weekly" or "monthly"
+
+        Returns:
+            List of {"date", "value"} points in chronological order
+
+        Raises:
+            ValueError: If the metric type or interval is unknown
+        """
+        if metric_type not in METRIC_TYPES:
+            raise ValueError(f"Unknown metric type: {metric_type} (expected one of {', '.join(sorted(METRIC_TYPES))})")
+        if interval not in RETENTION:
+            raise ValueError(f"Unknown interval: {interval}")
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        if end.tzinfo is None:
+            end = end.replace(tzinfo=timezone.utc)
+
+        result = await db.execute(
+            select(MetricSnapshot.bucket_start, MetricSnapshot.metrics)
+            .where(
+                and_(
+                    MetricSnapshot.tenant_id == tenant_id,
+                    MetricSnapshot.resolution == interval,
+                    MetricSnapshot.bucket_start >= bucket_start(start, interval),
+                    MetricSnapshot.bucket_start <= end,
+                )
+            )
+            .order_by(MetricSnapshot.bucket_start)
+        )
+
+        date_format = "%Y-%m-%dT%H:%M" if interval in ("raw", "hourly") else "%Y-%m-%d"
+        return [
+            {"date": bucket.strftime(date_format), "value": metrics[metric_type]}
+            for bucket, metrics in result.all()
+            if metric_type in metrics
+        ]
+
+    async def get_history(self, db: AsyncSession, tenant_id: UUID, days: int = 30) -> Dict[str, List[Dict[str, Any]]]:
+        """Daily density, clustering and component history for the network metrics response."""
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(days=days)
+        return {
+            "density": await self.get_timeseries(db, tenant_id, "density", start, end, "daily"),
+            "clustering": await self.get_timeseries(db, tenant_id, "clustering", start, end, "daily"),
+            "components": await self.get_timeseries(db, tenant_id, "components", start, end, "daily"),
+        }
+
+    # --- Background job ---
+
+    async def snapshot_all_tenants(self) -> None:
+        """Snapshot every active tenant and apply retention."""
+        async with SessionLocal() as db:
+            result = await db.execute(select(Tenant.id).where(Tenant.is_active.is_(True)))
+            tenant_ids = result.scalars().all()
+
+        for tenant_id in tenant_ids:
+            # A fresh session per tenant keeps one failure from aborting the rest
+            async with SessionLocal() as db:
+                try:
+                    await self.take_snapshot(db, tenant_id)
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Failed to snapshot metrics for tenant {tenant_id}: {e}")
+
+        async with SessionLocal() as db:
+            await self.apply_retention(db)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.snapshot_all_tenants()
+            except Exception as e:
+                logger.error(f"Metric snapshot run failed: {e}")
+            # Align runs to interval boundaries so every worker targets the same bucket
+            now = datetime.now(timezone.utc).timestamp()
+            await asyncio.sleep(self.interval - now % self.interval + 1)
+
+    def start(self) -> None:
+        """Start the periodic snapshot job."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic snapshot job."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton service instance
+metric_snapshot_service = MetricSnapshotService()
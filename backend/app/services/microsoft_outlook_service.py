@@ -1,7 +1,9 @@
 """Microsoft Outlook calendar service for fetching calendar events."""
 
 import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional, Tuple, Union
 
@@ -9,8 +11,10 @@ from typing import Dict, Any, List, Optional, Tuple, Union
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import http_clients
 from app.core.config import settings
 from app.models.user import User
+from app.services.oauth_token_service import oauth_token_service
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
@@ -19,6 +23,10 @@ logger = logging.getLogger(__name__)
 MICROSOFT_TOKEN_URL = "https://login.microsoftonline.com/common/oauth2/v2.0/token"
 MICROSOFT_GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
 
+# Access tokens (by SHA-256) already checked against /me, so the check costs one request per token
+VERIFIED_TOKEN_CACHE_SIZE = 1024
+_verified_tokens: "OrderedDict[str, None]" = OrderedDict()
+
 
 class MicrosoftTokenRefreshError(Exception):
     """Exception raised when token refresh fails."""
@@ -54,90 +62,96 @@ async def refresh_microsoft_token(user: User) -> Tuple[str, datetime]:
             "scope": "https://graph.microsoft.com/.default"
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                MICROSOFT_TOKEN_URL, 
-                data=refresh_data,
-                timeout=30.0  # Set a reasonable timeout
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                logger.error(f"Microsoft token refresh failed for user {user.id}: {error_data}")
-                raise MicrosoftTokenRefreshError(f"Microsoft API error: {error_data}")
-            
-            token_data = response.json()
-            
-            # Extract the new token and expiry time
-            new_token = token_data.get("access_token")
-            expires_in = token_data.get("expires_in", 3600)  # Default to 1 hour
-            expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-            
-            logger.info(f"Successfully refreshed Microsoft token for user {user.id}, expires at {expiry}")
-            return new_token, expiry
+        response = await http_clients.get_client("microsoft").post(
+            MICROSOFT_TOKEN_URL, 
+            data=refresh_data,
+            timeout=30.0  # Set a reasonable timeout
+        )
+        
+        if response.status_code != 200:
+            error_data = response.json()
+            logger.error(f"Microsoft token refresh failed for user {user.id}: {error_data}")
+            raise MicrosoftTokenRefreshError(f"Microsoft API error: {error_data}")
+        
+        token_data = response.json()
+        
+        # Extract the new token and expiry time
+        new_token = token_data.get("access_token")
+        expires_in = token_data.get("expires_in", 3600)  # Default to 1 hour
+        expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+        
+        logger.info(f"Successfully refreshed Microsoft token for user {user.id}, expires at {expiry}")
+        return new_token, expiry
     
     except Exception as e:
         logger.exception(f"Unexpected error refreshing Microsoft token for user {user.id}: {e}")
         raise MicrosoftTokenRefreshError(f"Unexpected error during refresh: {e}") from e
 
 
-async def get_microsoft_outlook_service(user: User, db: AsyncSession = None) -> Optional[httpx.AsyncClient]:
+class GraphClient:
+    """
+    Microsoft Graph access for one user over the shared Microsoft HTTP client.
+
+    Mirrors the parts of ``httpx.AsyncClient`` callers use, adding the user's
+    bearer token to each request.
     """
-    Create a Microsoft Graph API client session with authenticated headers.
+
+    def __init__(self, access_token: str):
+        self._client = http_clients.get_client("microsoft")
+        self.headers = {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json"
+        }
+
+    async def get(self, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                  timeout: float = 30.0) -> httpx.Response:
+        return await self._client.get(url, params=params, headers={**self.headers, **(headers or {})}, timeout=timeout)
+
+    async def aclose(self) -> None:
+        """No-op: the shared client stays open until application shutdown."""
+        pass
+
+
+def _token_fingerprint(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+async def get_microsoft_outlook_service(user: User, db: AsyncSession = None) -> Optional[GraphClient]:
+    """
+    Create a Microsoft Graph API client with authenticated headers.
     
     Args:
         user: User model with Microsoft tokens
-        db: Optional database session for updating tokens
+        db: Unused; refreshed tokens are saved by the OAuth token service
         
     Returns:
-        Authenticated httpx.AsyncClient or None if authentication fails
+        Authenticated GraphClient or None if authentication fails
     """
-    logger.info(f"Creating Microsoft Outlook service for user {user.id}")
-    
-    # Check if we need to refresh the token
-    needs_refresh = (
-        not user.microsoft_access_token or
-        (user.microsoft_token_expiry and user.microsoft_token_expiry < datetime.now(timezone.utc))
-    )
+    logger.debug(f"Creating Microsoft Outlook service for user {user.id}")
     
-    if needs_refresh:
-        logger.info(f"Microsoft access token missing or expired for user {user.id}")
-        try:
-            new_token, expiry = await refresh_microsoft_token(user)
-            
-            # Update user with new token
-            user.microsoft_access_token = new_token
-            user.microsoft_token_expiry = expiry
-            
-            # Persist changes if DB session provided
-            if db:
-                db.add(user)
-                await db.commit()
-                await db.refresh(user)
-                logger.info(f"Updated Microsoft tokens in DB for user {user.id}")
-        
-        except MicrosoftTokenRefreshError as e:
-            logger.error(f"Failed to refresh Microsoft token: {e}")
-            return None
+    # Refreshed once per expiry across concurrent requests; the new token is saved by the token service
+    try:
+        access_token = await oauth_token_service.get_access_token(user, "microsoft", refresh_microsoft_token)
+    except MicrosoftTokenRefreshError as e:
+        logger.error(f"Failed to refresh Microsoft token: {e}")
+        return None
     
     # Check if we have a valid token now
-    if not user.microsoft_access_token:
+    if not access_token:
         logger.error(f"No valid Microsoft access token for user {user.id}")
         return None
     
-    # Create authenticated client session
-    headers = {
-        "Authorization": f"Bearer {user.microsoft_access_token}",
-        "Content-Type": "application/json"
-    }
-    client = httpx.AsyncClient(headers=headers)
-    
-    # Test that the token works
+    client = GraphClient(access_token)
+
+    # Test that the token works, once per token
+    fingerprint = _token_fingerprint(access_token)
+    if fingerprint in _verified_tokens:
+        _verified_tokens.move_to_end(fingerprint)
+        return client
     try:
         response = await client.get(f"{MICROSOFT_GRAPH_BASE_URL}/me", timeout=30.0)
         if response.status_code != 200:
             logger.error(f"Microsoft authentication failed: {response.status_code} - {response.text}")
-            await client.aclose()
             return None
             
         me_data = response.json()
@@ -145,14 +159,16 @@ async def get_microsoft_outlook_service(user: User, db: AsyncSession = None) ->
     
     except Exception as e:
         logger.exception(f"Error testing Microsoft API connection: {e}")
-        await client.aclose()
         return None
-    
+
+    _verified_tokens[fingerprint] = None
+    while len(_verified_tokens) > VERIFIED_TOKEN_CACHE_SIZE:
+        _verified_tokens.popitem(last=False)
     return client
 
 
 async def _get_calendar_events(
-    client: httpx.AsyncClient,
+    client: GraphClient,
     start_time: str = None,
     end_time: str = None
 ) -> List[Dict[str, Any]]:
@@ -207,7 +223,7 @@ async def _get_calendar_events(
         return []
 
 
-async def get_todays_calendar_events(client: httpx.AsyncClient) -> List[Dict[str, Any]]:
+async def get_todays_calendar_events(client: GraphClient) -> List[Dict[str, Any]]:
     """
     Get today's calendar events for the authenticated user.
     
@@ -238,7 +254,7 @@ async def get_todays_calendar_events(client: httpx.AsyncClient) -> List[Dict[str
 
 
 async def get_calendar_events_range(
-    client: httpx.AsyncClient,
+    client: GraphClient,
     start_date: datetime,
     end_date: datetime
 ) -> List[Dict[str, Any]]:
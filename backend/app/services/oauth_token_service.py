@@ -0,0 +1,182 @@
+"""
+OAuth Token Service
+
+Hands out users' Google and Microsoft access tokens and refreshes them
+single-flight: however many requests of a user (calendar, briefing, sync)
+find the token expired at once, the provider is asked for a new token once.
+
+- Tokens are refreshed proactively, OAUTH_TOKEN_REFRESH_MARGIN seconds
+  before they expire, so requests do not start with a token that expires
+  mid-flight.
+- Current tokens are cached in memory (LRU, OAUTH_TOKEN_CACHE_SIZE), so a
+  refreshed token is used even by requests whose user row predates it.
+- Within a process, concurrent refreshes of a user and provider share one
+  task. Across workers, a lock in the shared cache backend elects the
+  refreshing worker. The others poll the user row until the new token lands
+  there, and refresh themselves only if the lock holder does not finish
+  within OAUTH_TOKEN_REFRESH_LOCK_WAIT.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.insight_cache import insight_cache
+from app.db.session import SessionLocal
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+OAUTH_TOKEN_REFRESH_MARGIN = int(os.getenv("OAUTH_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+OAUTH_TOKEN_REFRESH_LOCK_WAIT = float(os.getenv("OAUTH_TOKEN_REFRESH_LOCK_WAIT_SECONDS", "10"))
+OAUTH_TOKEN_CACHE_SIZE = int(os.getenv("OAUTH_TOKEN_CACHE_SIZE", "4096"))
+# Upper bound on one refresh; the cross-worker lock expires after it
+REFRESH_LOCK_TTL = 30
+LOCK_POLL_INTERVAL = 0.25
+
+# Provider -> (access token field, expiry field) on User
+TOKEN_FIELDS = {
+    "google": ("google_access_token", "google_token_expiry"),
+    "microsoft": ("microsoft_access_token", "microsoft_token_expiry"),
+}
+
+Token = Tuple[Optional[str], Optional[datetime]]
+Refresher = Callable[[User], Awaitable[Tuple[str, Optional[datetime]]]]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # google-auth reports naive UTC expiries
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _stored_token(user: User, provider: str) -> Token:
+    token_field, expiry_field = TOKEN_FIELDS[provider]
+    return getattr(user, token_field, None), _as_utc(getattr(user, expiry_field, None))
+
+
+class OAuthTokenService:
+    """Per-user, per-provider access tokens with single-flight refresh."""
+
+    def __init__(self, margin: int = OAUTH_TOKEN_REFRESH_MARGIN, cache_size: int = OAUTH_TOKEN_CACHE_SIZE):
+        self.margin = margin
+        self.cache_size = cache_size
+        # (user ID, provider) -> current token and expiry
+        self._tokens: "OrderedDict[Tuple[uuid.UUID, str], Token]" = OrderedDict()
+        self._inflight: Dict[Tuple[uuid.UUID, str], asyncio.Task] = {}
+        self._lock_token = str(uuid.uuid4())
+        self.refreshes = 0
+
+    def is_fresh(self, token: Token) -> bool:
+        """Whether a token is present and not within the refresh margin of its expiry."""
+        access_token, expiry = token
+        if not access_token:
+            return False
+        return expiry is None or expiry - datetime.now(timezone.utc) > timedelta(seconds=self.margin)
+
+    def _remember(self, key: Tuple[uuid.UUID, str], token: Token) -> None:
+        self._tokens[key] = token
+        self._tokens.move_to_end(key)
+        while len(self._tokens) > self.cache_size:
+            self._tokens.popitem(last=False)
+
+    async def get_access_token(self, user: User, provider: str, refresh: Refresher) -> str:
+        """
+        Return a current access token of the user, refreshing it if needed.
+
+        Args:
+            user: User whose token to return
+            provider: "google" or "microsoft"
+            refresh: Provider refresh function, called with a freshly loaded
+                user and returning (access token, expiry)
+
+        Returns:
+            Access token valid for at least the refresh margin (or without expiry)
+
+        Raises:
+            Whatever ``refresh`` raises when the token cannot be refreshed
+        """
+        key = (user.id, provider)
+        cached = self._tokens.get(key)
+        stored = _stored_token(user, provider)
+        # Prefer whichever token lives longer: the cache may be ahead of the caller's user row,
+        # or the row may hold a token from a new login
+        for token in sorted(
+            [t for t in (cached, stored) if t is not None],
+            key=lambda t: t[1] or datetime.max.replace(tzinfo=timezone.utc),
+            reverse=True,
+        ):
+            if self.is_fresh(token):
+                self._remember(key, token)
+                return token[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(user.id, provider, refresh))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        access_token, _ = await asyncio.shield(task)
+        return access_token
+
+    async def _refresh(self, user_id: uuid.UUID, provider: str, refresh: Refresher) -> Token:
+        lock_key = f"oauth:refresh:{provider}:{user_id}"
+        acquired = False
+        deadline = time.monotonic() + OAUTH_TOKEN_REFRESH_LOCK_WAIT
+        while True:
+            try:
+                acquired = await insight_cache.backend.acquire_lock(lock_key, self._lock_token, REFRESH_LOCK_TTL)
+            except Exception as e:
+                logger.warning(f"Token refresh lock unavailable for user {user_id}: {e}")
+                break
+            if acquired:
+                break
+            # Another worker is refreshing; its token lands in the user row
+            token = await self._load_stored(user_id, provider)
+            if self.is_fresh(token):
+                self._remember((user_id, provider), token)
+                return token
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out waiting for another worker to refresh the {provider} token of user {user_id}")
+                break
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+        try:
+            # Own session: the refresh is shared and may outlive the request that started it
+            async with SessionLocal() as db:
+                user = await db.get(User, user_id)
+                if user is None:
+                    raise LookupError(f"User {user_id} not found")
+                token = _stored_token(user, provider)
+                # The previous lock holder may have refreshed in the meantime
+                if not self.is_fresh(token):
+                    access_token, expiry = await refresh(user)
+                    self.refreshes += 1
+                    token = (access_token, _as_utc(expiry))
+                    token_field, expiry_field = TOKEN_FIELDS[provider]
+                    setattr(user, token_field, token[0])
+                    setattr(user, expiry_field, token[1])
+                    db.add(user)
+                    await db.commit()
+            self._remember((user_id, provider), token)
+            return token
+        finally:
+            if acquired:
+                try:
+                    await insight_cache.backend.release_lock(lock_key, self._lock_token)
+                except Exception:
+                    pass
+
+    async def _load_stored(self, user_id: uuid.UUID, provider: str) -> Token:
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+            return _stored_token(user, provider) if user is not None else (None, None)
+
+
+# Singleton service instance
+oauth_token_service = OAuthTokenService()
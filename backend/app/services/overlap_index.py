@@ -0,0 +1,271 @@
+"""
+Project Overlap Index
+
+Maintains a per-tenant inverted keyword index (keyword -> project IDs) used by
+InsightService to detect overlapping projects without comparing every pair.
+
+Two candidate generation strategies are supported:
+
+- "exact": prefix filtering over the inverted index. Keywords are ordered by
+  document frequency (rarest first); two projects sharing at least ``k``
+  keywords are guaranteed to share one of the first ``len(keywords) - k + 1``
+  keywords of each project, so only those short, rare postings are probed.
+- "lsh": MinHash signatures bucketed into LSH bands, for callers that
+  accept lower recall on very large tenants. Candidates are still verified
+  against the exact keyword intersection, so it can only miss pairs, never
+  report false ones. LSH selects pairs by Jaccard similarity J, not by
+  shared-keyword count: a pair becomes a candidate with probability
+  1 - (1 - J^ROWS_PER_BAND)^NUM_BANDS: about 50% at J = 0.38 and 80% at
+  J = 0.47 with 32 bands of 4 rows.
+  Pairs sharing ``k`` keywords out of large keyword sets have a low J and are
+  mostly missed (J = 0.2 is found about 5% of the time).
+
+Exact prefix filtering is the default; LSH is only used when asked for.
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.project import Project
+
+logger = logging.getLogger(__name__)
+
+OVERLAP_MODES = ("exact", "lsh")
+
+# MinHash parameters: NUM_BANDS * ROWS_PER_BAND must equal NUM_PERMUTATIONS
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32
+ROWS_PER_BAND = 4
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Fixed seed so signatures are comparable across processes and restarts
+_rng = np.random.RandomState(1729)
+_PERM_A = _rng.randint(1, np.iinfo(np.int32).max, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+_PERM_B = _rng.randint(0, np.iinfo(np.int32).max, size=NUM_PERMUTATIONS, dtype=np.int64).astype(np.uint64)
+
+
+def _hash_keyword(keyword: str) -> int:
+    """Stable 32-bit hash of a keyword (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(keyword.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def _entry_digest(project_id: str, keywords: FrozenSet[str]) -> int:
+    """Stable 128-bit digest of one project's indexed keywords."""
+    payload = "\0".join([project_id, *sorted(keywords)]).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=16).digest(), "little")
+
+
+def minhash_signature(keywords: Iterable[str]) -> np.ndarray:
+    """Compute a MinHash signature for a keyword set."""
+    hashes = np.fromiter((_hash_keyword(k) for k in keywords), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    # (a * x + b) mod p, truncated to 32 bits; shape (num_perm, num_keywords)
+    permuted = ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=1)
+
+
+class ProjectOverlapIndex:
+    """Inverted keyword index over the projects of a single tenant."""
+
+    def __init__(self):
+        self._keywords: Dict[str, FrozenSet[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._signatures: Dict[str, np.ndarray] = {}
+        # Bumped on every change (local to this process)
+        self.version = 0
+        # XOR of the per-project entry digests: equal indexed content gives an
+        # equal digest in every process, so it can key results in the shared cache
+        self._content_digest = 0
+        # Fingerprint of the projects table at the last sync (count, max updated_at)
+        self.synced_count = 0
+        self.synced_until: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._keywords)
+
+    @property
+    def content_hash(self) -> str:
+        """Digest of the indexed projects and keywords, identical across processes."""
+        return f"{self._content_digest:032x}"
+
+    def upsert(self, project_id: str, keywords: Set[str]) -> None:
+        """Add or replace the keywords of a project."""
+        new_keywords = frozenset(keywords)
+        old_keywords = self._keywords.get(project_id)
+        if old_keywords == new_keywords:
+            return
+
+        if old_keywords:
+            for keyword in old_keywords - new_keywords:
+                self._discard_posting(keyword, project_id)
+        for keyword in new_keywords - (old_keywords or frozenset()):
+            self._postings[keyword].add(project_id)
+
+        if old_keywords is not None:
+            self._content_digest ^= _entry_digest(project_id, old_keywords)
+        self._content_digest ^= _entry_digest(project_id, new_keywords)
+        self._keywords[project_id] = new_keywords
+        self._signatures.pop(project_id, None)  # Recomputed lazily in LSH mode
+        self.version += 1
+
+    def remove(self, project_id: str) -> None:
+        """Remove a project from the index."""
+        old_keywords = self._keywords.pop(project_id, None)
+        if old_keywords is None:
+            return
+        for keyword in old_keywords:
+            self._discard_posting(keyword, project_id)
+        self._content_digest ^= _entry_digest(project_id, old_keywords)
+        self._signatures.pop(project_id, None)
+        self.version += 1
+
+    def _discard_posting(self, keyword: str, project_id: str) -> None:
+        posting = self._postings.get(keyword)
+        if posting is None:
+            return
+        posting.discard(project_id)
+        if not posting:
+            del self._postings[keyword]
+
+    def find_overlaps(self, min_overlap_keywords: int = 3, mode: str = "exact") -> Dict[str, List[str]]:
+        """
+        Find all project pairs sharing at least ``min_overlap_keywords`` keywords.
+
+        Args:
+            min_overlap_keywords: Minimum number of shared keywords
+            mode: "exact" (all pairs), or "lsh" (approximate, Jaccard-based
+                recall; see the module docstring)
+
+        Returns:
+            Mapping of project ID -> list of overlapping project IDs
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in OVERLAP_MODES:
+            raise ValueError(f"Unknown overlap mode: {mode}")
+        min_overlap_keywords = max(1, min_overlap_keywords)
+
+        if mode == "lsh":
+            candidates = self._lsh_candidates()
+        else:
+            candidates = self._prefix_candidates(min_overlap_keywords)
+
+        overlaps: Dict[str, List[str]] = defaultdict(list)
+        for proj_id_1, proj_id_2 in candidates:
+            common_keywords = self._keywords[proj_id_1] & self._keywords[proj_id_2]
+            if len(common_keywords) >= min_overlap_keywords:
+                overlaps[proj_id_1].append(proj_id_2)
+                overlaps[proj_id_2].append(proj_id_1)
+        return dict(overlaps)
+
+    def _prefix_candidates(self, min_overlap_keywords: int) -> Set[Tuple[str, str]]:
+        """Candidate pairs via prefix filtering on document-frequency ordered keywords."""
+        prefix_postings: Dict[str, List[str]] = defaultdict(list)
+        candidates: Set[Tuple[str, str]] = set()
+
+        for project_id, keywords in self._keywords.items():
+            if len(keywords) < min_overlap_keywords:
+                continue
+            ordered = sorted(keywords, key=lambda k: (len(self._postings[k]), k))
+            prefix = ordered[: len(ordered) - min_overlap_keywords + 1]
+            for keyword in prefix:
+                posting = prefix_postings[keyword]
+                for other_id in posting:
+                    candidates.add((other_id, project_id))
+                posting.append(project_id)
+
+        return candidates
+
+    def _lsh_candidates(self) -> Set[Tuple[str, str]]:
+        """Candidate pairs whose MinHash signatures collide in at least one band."""
+        for project_id, keywords in self._keywords.items():
+            if project_id not in self._signatures:
+                self._signatures[project_id] = minhash_signature(keywords)
+
+        candidates: Set[Tuple[str, str]] = set()
+        for band in range(NUM_BANDS):
+            start = band * ROWS_PER_BAND
+            buckets: Dict[bytes, List[str]] = defaultdict(list)
+            for project_id, signature in self._signatures.items():
+                if not self._keywords[project_id]:
+                    continue
+                buckets[signature[start:start + ROWS_PER_BAND].tobytes()].append(project_id)
+            for members in buckets.values():
+                for i in range(len(members)):
+                    for j in range(i + 1, len(members)):
+                        candidates.add((members[i], members[j]))
+        return candidates
+
+
+class ProjectOverlapIndexRegistry:
+    """Per-tenant registry of overlap indexes, synchronised with the projects table."""
+
+    def __init__(self, keyword_extractor: Callable[[Optional[str]], Set[str]]):
+        self._extract_keywords = keyword_extractor
+        self._indexes: Dict[UUID, ProjectOverlapIndex] = {}
+
+    def get(self, tenant_id: UUID) -> Optional[ProjectOverlapIndex]:
+        """Return the tenant's index if it has been loaded in this process."""
+        return self._indexes.get(tenant_id)
+
+    async def ensure_synced(self, db: AsyncSession, tenant_id: UUID) -> ProjectOverlapIndex:
+        """
+        Return the tenant's index, bringing it up to date with the database.
+
+        Local writes are applied immediately through the entity event hooks;
+        this catches writes made by other workers by comparing a cheap
+        (count, max(updated_at)) fingerprint and loading only changed rows.
+        """
+        index = self._indexes.get(tenant_id)
+
+        fingerprint = await db.execute(
+            select(func.count(Project.id), func.max(Project.updated_at)).where(Project.tenant_id == tenant_id)
+        )
+        count, max_updated_at = fingerprint.one()
+
+        if index is not None and count == index.synced_count and max_updated_at == index.synced_until:
+            return index
+
+        query = select(Project.id, Project.description).where(Project.tenant_id == tenant_id)
+        if index is not None and index.synced_until is not None:
+            # Only rows changed since the last sync
+            await self._load(db, index, query.where(Project.updated_at >= index.synced_until))
+        if index is None or len(index) != count:
+            # First load, or rows were deleted elsewhere: rebuild from scratch
+            index = ProjectOverlapIndex()
+            await self._load(db, index, query)
+
+        index.synced_count = count
+        index.synced_until = max_updated_at
+        self._indexes[tenant_id] = index
+        logger.debug(f"Synced project overlap index for tenant {tenant_id}: {len(index)} projects")
+        return index
+
+    async def _load(self, db: AsyncSession, index: ProjectOverlapIndex, query) -> None:
+        result = await db.execute(query)
+        for project_id, description in result.all():
+            index.upsert(str(project_id), self._extract_keywords(description))
+
+    def upsert_project(self, tenant_id: UUID, project_id: UUID, description: Optional[str]) -> None:
+        """Apply a local project create/update to an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.upsert(str(project_id), self._extract_keywords(description))
+
+    def remove_project(self, tenant_id: UUID, project_id: UUID) -> None:
+        """Apply a local project delete to an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.remove(str(project_id))
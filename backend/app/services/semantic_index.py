@@ -0,0 +1,468 @@
+"""
+Semantic Vector Index
+
+Building blocks for local semantic search: text embedders, a per-tenant
+float32 vector store backed by a memory-mapped file, and an inverted-file
+(IVF) index for approximate search.
+
+Embeddings come from a local sentence-transformers model when
+SEMANTIC_SEARCH_MODEL is set and the package is installed. Otherwise hashed
+TF-IDF is used: words are hashed into a large sparse feature space, weighted
+by IDF, and folded into VECTOR_DIM dense dimensions by a sparse random
+projection, so dot products approximate TF-IDF cosine.
+
+All vectors are L2-normalised, so the dot product is the cosine similarity.
+"""
+
+import copy
+import functools
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+logger = logging.getLogger(__name__)
+
+VECTOR_DIM = int(os.getenv("SEMANTIC_SEARCH_DIM", "256"))
+INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR", os.path.join(tempfile.gettempdir(), "semantic-index"))
+HASHING_FEATURES = 1 << 20
+# Odd 64-bit constants; one projection bucket per constant
+_PROJECTION_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+# Entity types that can be indexed; the position is the stored type code
+ENTITY_TYPES = ("user", "team", "project", "goal", "knowledge_asset")
+TYPE_CODES = {entity_type: code for code, entity_type in enumerate(ENTITY_TYPES)}
+
+# IVF parameters: lists are retrained once the store grows past this factor
+IVF_RETRAIN_GROWTH = 4.0
+# Rows upserted since the last list build before the lists are rebuilt
+IVF_REBUILD_FRACTION = 0.1
+IVF_TRAIN_SAMPLE = 65_536
+IVF_TRAIN_ITERATIONS = 8
+SEARCH_CHUNK_ROWS = 262_144
+
+
+def _normalise_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+@functools.lru_cache(maxsize=4)
+def _hashing_projection(n_features: int, dim: int) -> sparse.csr_matrix:
+    """
+    Sparse random projection from hashed features to ``dim`` dimensions.
+
+    Each feature is spread over one dimension per _PROJECTION_MULTIPLIERS
+    constant (four), with random signs,
+    so a single hash collision only adds a fraction of a term's weight.
+    Buckets and signs are derived from the feature index, so the matrix is
+    the same in every process.
+    """
+    features = np.arange(n_features, dtype=np.uint64)
+    rows, cols, signs = [], [], []
+    for multiplier in _PROJECTION_MULTIPLIERS:
+        hashed = features * np.uint64(multiplier)
+        rows.append(features.astype(np.int64))
+        cols.append(((hashed >> np.uint64(32)) % np.uint64(dim)).astype(np.int64))
+        signs.append(np.where(hashed >> np.uint64(63), -1.0, 1.0).astype(np.float32))
+    scale = np.float32(1.0 / np.sqrt(len(_PROJECTION_MULTIPLIERS)))
+    return sparse.csr_matrix(
+        (np.concatenate(signs) * scale, (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_features, dim),
+    )
+
+
+class HashingEmbedder:
+    """Hashed TF-IDF embeddings; stateless apart from IDF weights."""
+
+    name = "hashing"
+    # Tokenising holds the GIL, so batches are embedded in the analytics process pool
+    in_process = True
+
+    def __init__(self, dim: int = VECTOR_DIM, n_features: int = HASHING_FEATURES):
+        self.dim = dim
+        self.n_features = n_features
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features, alternate_sign=False, norm=None, stop_words="english", dtype=np.float32
+        )
+        self.idf = np.ones(n_features, dtype=np.float32)
+
+    @property
+    def _projection(self) -> sparse.csr_matrix:
+        return _hashing_projection(self.n_features, self.dim)
+
+    def _weighted(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        counts = self._vectorizer.transform(texts).tocsr()
+        counts.data = 1.0 + np.log(counts.data)  # Sublinear term frequency
+        counts.data *= self.idf[counts.indices]
+        return counts
+
+    def fit(self, texts: Sequence[str]) -> None:
+        """Set IDF weights from a corpus."""
+        counts = self._vectorizer.transform(texts).tocsr()
+        df = np.bincount(counts.indices, minlength=self.n_features)
+        self.idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts as L2-normalised float32 rows."""
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return _normalise_rows((self._weighted(texts) @ self._projection).toarray())
+
+    def clone(self) -> "HashingEmbedder":
+        """Copy with its own IDF weights (fit replaces, never mutates, the array)."""
+        return copy.copy(self)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"idf": self.idf}
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.idf = state["idf"].astype(np.float32)
+
+
+class TransformerEmbedder:
+    """Embeddings from a local sentence-transformers model."""
+
+    # Model inference releases the GIL; keep the loaded model in this process
+    in_process = False
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self._model = SentenceTransformer(model_name)
+        self.name = f"model:{model_name}"
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+
+    def clone(self) -> "TransformerEmbedder":
+        return self  # Stateless; all tenants share the loaded model
+
+    def fit(self, texts: Sequence[str]) -> None:
+        pass
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        vectors = self._model.encode(list(texts), batch_size=64, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {}
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        pass
+
+
+def load_embedder():
+    """Return the configured local model embedder, falling back to hashed TF-IDF."""
+    model_name = os.getenv("SEMANTIC_SEARCH_MODEL")
+    if model_name:
+        try:
+            return TransformerEmbedder(model_name)
+        except ImportError:
+            logger.warning("SEMANTIC_SEARCH_MODEL is set but sentence-transformers is not installed; using hashed TF-IDF")
+        except Exception as e:
+            logger.warning(f"Failed to load embedding model {model_name}: {e}; using hashed TF-IDF")
+    return HashingEmbedder()
+
+
+def fit_embedder(embedder, texts: Sequence[str]):
+    """Fit the embedder on a corpus and return it (executed in the analytics process pool)."""
+    embedder.fit(texts)
+    return embedder
+
+
+def top_k_rows(scores: np.ndarray, rows: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best ``top_k`` (rows, scores), highest score first."""
+    if scores.size > top_k:
+        keep = np.argpartition(-scores, top_k - 1)[:top_k]
+        scores, rows = scores[keep], rows[keep]
+    order = np.argsort(-scores, kind="stable")
+    return rows[order], scores[order]
+
+
+class VectorStore:
+    """
+    Vectors of one tenant in a memory-mapped float32 matrix.
+
+    Rows are addressed by (entity type, entity ID). Deleted rows are
+    tombstoned and reused by later inserts; the matrix doubles in capacity
+    when full.
+
+    The working matrix lives in an unlinked temporary file, so it is paged
+    by the OS rather than held on the heap and disappears with the process.
+    ``save`` writes an atomic snapshot to a tenant directory; ``load`` maps
+    that snapshot copy-on-write, so workers sharing a directory never see
+    each other's in-place writes.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.size = 0  # Rows in use, including tombstones
+        self._rows: Dict[bytes, int] = {}
+        self._free: List[int] = []
+        self._allocate(capacity)
+
+    @staticmethod
+    def _key(entity_type: str, entity_id: UUID) -> bytes:
+        return bytes((TYPE_CODES[entity_type],)) + entity_id.bytes
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _allocate(self, capacity: int) -> None:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=INDEX_DIR, suffix=".f32")
+        try:
+            self.vectors = np.memmap(path, dtype=np.float32, mode="w+", shape=(capacity, self.dim))
+        finally:
+            os.close(fd)
+            os.unlink(path)  # The mapping keeps the file alive
+        self.types = np.full(capacity, -1, dtype=np.int8)
+        self.ids = np.zeros((capacity, 16), dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    @property
+    def capacity(self) -> int:
+        return self.vectors.shape[0]
+
+    def _grow(self, required: int) -> None:
+        capacity = max(1, self.capacity)
+        while capacity < required:
+            capacity *= 2
+        old_vectors, old_types, old_ids, old_alive = self.vectors, self.types, self.ids, self.alive
+        self._allocate(capacity)
+        self.vectors[:self.size] = old_vectors[:self.size]
+        self.types[:self.size] = old_types[:self.size]
+        self.ids[:self.size] = old_ids[:self.size]
+        self.alive[:self.size] = old_alive[:self.size]
+
+    def upsert(self, entity_type: str, entity_id: UUID, vector: np.ndarray) -> int:
+        """Store a vector and return its row."""
+        key = self._key(entity_type, entity_id)
+        row = self._rows.get(key)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self.size >= self.capacity:
+                    self._grow(self.size + 1)
+                row = self.size
+                self.size += 1
+            self._rows[key] = row
+            self.types[row] = TYPE_CODES[entity_type]
+            self.ids[row] = np.frombuffer(entity_id.bytes, dtype=np.uint8)
+            self.alive[row] = True
+        self.vectors[row] = vector
+        return row
+
+    def extend(self, keys: Sequence[Tuple[str, UUID]], vectors: np.ndarray) -> None:
+        """Append new entities in bulk; keys must not be stored yet."""
+        start, stop = self.size, self.size + len(keys)
+        if stop > self.capacity:
+            self._grow(stop)
+        self.vectors[start:stop] = vectors
+        self.alive[start:stop] = True
+        for row, (entity_type, entity_id) in enumerate(keys, start):
+            self._rows[self._key(entity_type, entity_id)] = row
+            self.types[row] = TYPE_CODES[entity_type]
+            self.ids[row] = np.frombuffer(entity_id.bytes, dtype=np.uint8)
+        self.size = stop
+
+    def remove(self, entity_type: str, entity_id: UUID) -> Optional[int]:
+        """Tombstone an entity's row; returns the row if it was stored."""
+        row = self._rows.pop(self._key(entity_type, entity_id), None)
+        if row is None:
+            return None
+        self.alive[row] = False
+        self.vectors[row] = 0.0
+        self._free.append(row)
+        return row
+
+    def contains(self, entity_type: str, entity_id: UUID) -> bool:
+        return self._key(entity_type, entity_id) in self._rows
+
+    def count(self, entity_type: str) -> int:
+        return int(np.count_nonzero(self.alive[:self.size] & (self.types[:self.size] == TYPE_CODES[entity_type])))
+
+    def entity(self, row: int) -> Tuple[str, UUID]:
+        return ENTITY_TYPES[self.types[row]], UUID(bytes=self.ids[row].tobytes())
+
+    def mask(self, type_codes: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rows eligible as results: alive and, optionally, of the given types."""
+        eligible = self.alive[:self.size]
+        if type_codes is not None:
+            eligible = eligible & np.isin(self.types[:self.size], type_codes)
+        return eligible
+
+    def search_exact(self, query: np.ndarray, top_k: int, type_codes: Optional[np.ndarray] = None):
+        """Brute-force top-k over all rows, scanned in chunks of the memory map."""
+        eligible = self.mask(type_codes)
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, self.size, SEARCH_CHUNK_ROWS):
+            stop = min(self.size, start + SEARCH_CHUNK_ROWS)
+            rows = np.flatnonzero(eligible[start:stop]) + start
+            if rows.size == 0:
+                continue
+            scores = self.vectors[start:stop] @ query
+            best_rows, best_scores = top_k_rows(
+                np.concatenate([best_scores, scores[rows - start]]),
+                np.concatenate([best_rows, rows]),
+                top_k,
+            )
+        return best_rows, best_scores
+
+    # --- Persistence ---
+
+    def save(self, directory: str, header: Dict[str, Any], state: Dict[str, np.ndarray]) -> None:
+        """Write an atomic snapshot (vectors, row metadata, header) to a directory."""
+        os.makedirs(directory, exist_ok=True)
+        header = dict(header, dim=self.dim, size=self.size)
+
+        def _replace(name: str, write) -> None:
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp_path, os.path.join(directory, name))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+        _replace("vectors.npy", lambda f: np.save(f, np.asarray(self.vectors[:self.size])))
+        _replace("meta.npz", lambda f: np.savez(
+            f,
+            types=self.types[:self.size],
+            ids=self.ids[:self.size],
+            alive=self.alive[:self.size],
+            **{f"state_{name}": value for name, value in state.items()},
+        ))
+        # Written last: a reader only trusts the snapshot if the sizes agree
+        _replace("meta.json", lambda f: f.write(json.dumps(header).encode("utf-8")))
+
+    @classmethod
+    def load(cls, directory: str) -> Optional[Tuple["VectorStore", Dict[str, Any], Dict[str, np.ndarray]]]:
+        """Map a saved snapshot copy-on-write; returns (store, header, embedder state) or None."""
+        try:
+            with open(os.path.join(directory, "meta.json")) as f:
+                header = json.load(f)
+            vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="c")
+            with np.load(os.path.join(directory, "meta.npz")) as meta:
+                types, ids, alive = meta["types"], meta["ids"], meta["alive"]
+                state = {key[len("state_"):]: meta[key] for key in meta.files if key.startswith("state_")}
+            size = header["size"]
+            if vectors.shape != (size, header["dim"]) or types.shape[0] != size:
+                raise ValueError("snapshot files are out of sync")
+        except (OSError, KeyError, ValueError) as e:
+            logger.info(f"No usable semantic index snapshot in {directory}: {e}")
+            return None
+
+        store = cls.__new__(cls)
+        store.dim = header["dim"]
+        store.size = size
+        store.vectors = vectors
+        store.types = types.astype(np.int8)
+        store.ids = ids.astype(np.uint8)
+        store.alive = alive.astype(bool)
+        store._rows = {
+            bytes((int(store.types[row]),)) + store.ids[row].tobytes(): int(row)
+            for row in np.flatnonzero(store.alive)
+        }
+        store._free = np.flatnonzero(~store.alive).tolist()
+        return store, header, state
+
+
+def train_centroids(sample: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over normalised vectors."""
+    rng = np.random.default_rng(seed)
+    nlist = max(1, min(nlist, sample.shape[0]))
+    centroids = sample[rng.choice(sample.shape[0], nlist, replace=False)].copy()
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        empty = ~np.any(sums, axis=1)
+        # Re-seed empty lists with random samples
+        sums[empty] = sample[rng.choice(sample.shape[0], int(empty.sum()))]
+        centroids = _normalise_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file index over a VectorStore.
+
+    Vectors are assigned to their nearest centroid; a query scans only the
+    ``nprobe`` lists whose centroids are closest to it. Rows upserted after
+    the lists were built are kept in a small delta that every query scans,
+    until the lists are rebuilt.
+    """
+
+    def __init__(self, centroids: np.ndarray, trained_size: int):
+        self.centroids = centroids
+        self.trained_size = trained_size
+        self._offsets = np.zeros(centroids.shape[0] + 1, dtype=np.int64)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._delta: List[int] = []
+        self.built_size = 0
+
+    @classmethod
+    def train(cls, store: VectorStore, seed: int = 0) -> "IVFIndex":
+        rows = np.flatnonzero(store.mask())
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(rows, min(rows.size, IVF_TRAIN_SAMPLE), replace=False))
+        nlist = int(min(4096, max(1, np.sqrt(rows.size))))
+        index = cls(train_centroids(np.asarray(store.vectors[sample_rows]), nlist, seed), rows.size)
+        index.build(store)
+        return index
+
+    def needs_retrain(self, store: VectorStore) -> bool:
+        return len(store) > IVF_RETRAIN_GROWTH * max(1, self.trained_size)
+
+    def needs_rebuild(self) -> bool:
+        return len(self._delta) > IVF_REBUILD_FRACTION * max(1, self.built_size)
+
+    def build(self, store: VectorStore) -> None:
+        """Assign every live row to its nearest centroid (may run while rows are being added)."""
+        delta_start = len(self._delta)
+        rows = np.flatnonzero(store.mask())
+        assignment = np.empty(rows.size, dtype=np.int64)
+        for start in range(0, rows.size, SEARCH_CHUNK_ROWS):
+            chunk = rows[start:start + SEARCH_CHUNK_ROWS]
+            assignment[start:start + chunk.size] = np.argmax(store.vectors[chunk] @ self.centroids.T, axis=1)
+        order = np.argsort(assignment, kind="stable")
+        self._rows = rows[order]
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.centroids.shape[0]))])
+        # Rows added during the build may have been missed by it
+        self._delta = self._delta[delta_start:]
+        self.built_size = rows.size
+
+    def add(self, row: int) -> None:
+        """Record an upserted row; stale list entries are filtered at query time."""
+        self._delta.append(row)
+
+    def add_many(self, rows: Sequence[int]) -> None:
+        self._delta.extend(rows)
+
+    def search(
+        self, store: VectorStore, query: np.ndarray, top_k: int, nprobe: int, type_codes: Optional[np.ndarray] = None
+    ):
+        nprobe = min(nprobe, self.centroids.shape[0])
+        probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        candidates = np.concatenate(
+            [self._rows[self._offsets[p]:self._offsets[p + 1]] for p in probes]
+            + [np.asarray(self._delta, dtype=np.int64)]
+        )
+        candidates = np.unique(candidates)
+        candidates = candidates[store.mask(type_codes)[candidates]]
+        if candidates.size == 0:
+            return candidates, np.empty(0, dtype=np.float32)
+        scores = np.asarray(store.vectors[candidates]) @ query
+        return top_k_rows(scores, candidates, top_k)
@@ -0,0 +1,425 @@
+"""
+Semantic Search Service
+
+Per-tenant vector search over users, teams, projects, goals and knowledge
+assets, built on app.services.semantic_index.
+
+Each tenant's index is loaded from its last snapshot (or built from the
+database) on first use. Local entity writes reach it through the entity
+event hooks, which only queue the change; queued changes are embedded in
+one batch before the next search. Writes made by other workers are caught
+by a per-type (count, max(updated_at)) fingerprint, checked at most every
+SYNC_INTERVAL seconds.
+
+Search is exact (brute force over the memory-mapped matrix) for small
+tenants and IVF-approximate above IVF_AUTO_THRESHOLD entities; both can be
+requested explicitly, and results report the mode actually used since IVF is
+only available once a tenant's IVF index has been trained.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.process_pool import run_in_process
+from app.models.goal import Goal
+from app.models.knowledge_asset import KnowledgeAsset
+from app.models.project import Project
+from app.models.team import Team
+from app.models.user import User
+from app.services.semantic_index import (
+    ENTITY_TYPES,
+    INDEX_DIR,
+    TYPE_CODES,
+    IVFIndex,
+    VectorStore,
+    fit_embedder,
+    load_embedder,
+)
+
+logger = logging.getLogger(__name__)
+
+IVF_AUTO_THRESHOLD = int(os.getenv("SEMANTIC_SEARCH_IVF_THRESHOLD", "50000"))
+DEFAULT_NPROBE = int(os.getenv("SEMANTIC_SEARCH_NPROBE", "32"))
+SYNC_INTERVAL = float(os.getenv("SEMANTIC_SEARCH_SYNC_SECONDS", "5"))
+EMBED_BATCH_SIZE = 20000
+# Batches up to this size are embedded inline; a process pool round trip costs more
+INLINE_EMBED_LIMIT = 64
+MAX_TEXT_CHARS = 4000
+
+SEARCH_MODES = ("auto", "exact", "ivf")
+
+# entity type -> (model, title column, text columns)
+ENTITY_SOURCES = {
+    "user": (User, User.name, (User.name, User.title)),
+    "team": (Team, Team.name, (Team.name, Team.description)),
+    "project": (Project, Project.name, (Project.name, Project.description)),
+    "goal": (Goal, Goal.title, (Goal.title, Goal.description)),
+    "knowledge_asset": (KnowledgeAsset, KnowledgeAsset.title, (KnowledgeAsset.title, KnowledgeAsset.content)),
+}
+
+# Attribute names used by the entity hooks, matching ENTITY_SOURCES
+ENTITY_TEXT_FIELDS = {
+    entity_type: tuple(column.key for column in columns)
+    for entity_type, (_, _, columns) in ENTITY_SOURCES.items()
+}
+
+Fingerprint = Tuple[int, Optional[str]]
+
+
+def entity_text(*parts: Optional[str]) -> str:
+    return " ".join(part for part in parts if part)[:MAX_TEXT_CHARS]
+
+
+def _updated_at(model):
+    # users.updated_at is only set on update
+    return func.coalesce(model.updated_at, model.created_at)
+
+
+class TenantSemanticIndex:
+    """Vector store, optional IVF index and sync state of one tenant."""
+
+    def __init__(self, store: VectorStore, embedder, fingerprints: Dict[str, Fingerprint]):
+        self.store = store
+        self.embedder = embedder
+        self.fingerprints = fingerprints
+        self.ivf: Optional[IVFIndex] = None
+        self.ivf_task: Optional[asyncio.Task] = None
+        # Rows upserted while an IVF index is being trained; added to it once ready
+        self.rows_during_training: List[int] = []
+        # (entity type, entity ID) -> text, or None for deletes; applied before the next search
+        self.pending: Dict[Tuple[str, UUID], Optional[str]] = {}
+        self.checked_at = 0.0
+
+
+class SemanticSearchService:
+    """Builds, updates and queries per-tenant semantic indexes."""
+
+    def __init__(self, index_dir: str = INDEX_DIR, ivf_threshold: int = IVF_AUTO_THRESHOLD):
+        self.index_dir = index_dir
+        self.ivf_threshold = ivf_threshold
+        self._embedder = None
+        self._indexes: Dict[UUID, TenantSemanticIndex] = {}
+        self._locks: Dict[UUID, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    @property
+    def embedder(self):
+        """Prototype embedder; loaded on first use since a model can be large."""
+        if self._embedder is None:
+            self._embedder = load_embedder()
+            logger.info(f"Semantic search uses the {self._embedder.name} embedder ({self._embedder.dim} dimensions)")
+        return self._embedder
+
+    def _tenant_dir(self, tenant_id: UUID) -> str:
+        return os.path.join(self.index_dir, str(tenant_id))
+
+    @staticmethod
+    async def _embed(embedder, texts: Sequence[str]) -> np.ndarray:
+        if not embedder.in_process:
+            return await asyncio.to_thread(embedder.embed, texts)
+        if len(texts) > INLINE_EMBED_LIMIT:
+            return await run_in_process(embedder.embed, texts)
+        return embedder.embed(texts)
+
+    # --- Hooks ---
+
+    def enqueue_upsert(self, tenant_id: UUID, entity_type: str, entity_id: UUID, text: str) -> None:
+        """Queue a local entity create/update for an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.pending[(entity_type, entity_id)] = text
+
+    def enqueue_remove(self, tenant_id: UUID, entity_type: str, entity_id: UUID) -> None:
+        """Queue a local entity delete for an already loaded index."""
+        index = self._indexes.get(tenant_id)
+        if index is not None:
+            index.pending[(entity_type, entity_id)] = None
+
+    # --- Sync ---
+
+    async def _fingerprints(self, db: AsyncSession, tenant_id: UUID) -> Dict[str, Fingerprint]:
+        fingerprints = {}
+        for entity_type, (model, _, _) in ENTITY_SOURCES.items():
+            result = await db.execute(
+                select(func.count(model.id), func.max(_updated_at(model))).where(model.tenant_id == tenant_id)
+            )
+            count, max_updated_at = result.one()
+            fingerprints[entity_type] = (count, max_updated_at.isoformat() if max_updated_at else None)
+        return fingerprints
+
+    @staticmethod
+    async def _load_texts(db: AsyncSession, entity_type: str, condition) -> List[Tuple[UUID, str]]:
+        model, _, columns = ENTITY_SOURCES[entity_type]
+        result = await db.execute(select(model.id, *columns).where(condition))
+        return [(row[0], entity_text(*row[1:])) for row in result.all()]
+
+    async def _build(self, db: AsyncSession, tenant_id: UUID) -> TenantSemanticIndex:
+        """Embed every entity of the tenant into a fresh index."""
+        fingerprints = await self._fingerprints(db, tenant_id)
+        keys: List[Tuple[str, UUID]] = []
+        texts: List[str] = []
+        for entity_type, (model, _, _) in ENTITY_SOURCES.items():
+            for entity_id, text in await self._load_texts(db, entity_type, model.tenant_id == tenant_id):
+                keys.append((entity_type, entity_id))
+                texts.append(text)
+
+        embedder = self.embedder.clone()
+        if embedder.in_process and texts:
+            embedder = await run_in_process(fit_embedder, embedder, texts)
+        else:
+            embedder.fit(texts)
+
+        store = await asyncio.to_thread(VectorStore, embedder.dim, max(1024, len(keys)))
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            vectors = await self._embed(embedder, texts[start:start + EMBED_BATCH_SIZE])
+            store.extend(keys[start:start + EMBED_BATCH_SIZE], vectors)
+
+        logger.info(f"Built semantic index for tenant {tenant_id}: {len(store)} entities")
+        index = TenantSemanticIndex(store, embedder, fingerprints)
+        await self._save(tenant_id, index)
+        return index
+
+    async def _open(self, db: AsyncSession, tenant_id: UUID) -> TenantSemanticIndex:
+        """Reopen the tenant's snapshot if it matches the embedder, otherwise build."""
+        loaded = await asyncio.to_thread(VectorStore.load, self._tenant_dir(tenant_id))
+        if loaded is not None:
+            store, header, state = loaded
+            if header.get("embedder") == self.embedder.name and store.dim == self.embedder.dim:
+                embedder = self.embedder.clone()
+                embedder.load_state(state)
+                fingerprints = {
+                    entity_type: tuple(value) for entity_type, value in header.get("fingerprints", {}).items()
+                }
+                return TenantSemanticIndex(store, embedder, fingerprints)
+        return await self._build(db, tenant_id)
+
+    async def _save(self, tenant_id: UUID, index: TenantSemanticIndex) -> None:
+        header = {"embedder": index.embedder.name, "fingerprints": index.fingerprints}
+        try:
+            await asyncio.to_thread(index.store.save, self._tenant_dir(tenant_id), header, index.embedder.state())
+        except OSError as e:
+            logger.warning(f"Failed to save semantic index for tenant {tenant_id}: {e}")
+
+    async def _catch_up(self, db: AsyncSession, tenant_id: UUID, index: TenantSemanticIndex) -> None:
+        """Apply rows written by other workers since the last fingerprint."""
+        fingerprints = await self._fingerprints(db, tenant_id)
+        for entity_type, (model, _, _) in ENTITY_SOURCES.items():
+            fingerprint = fingerprints[entity_type]
+            previous = index.fingerprints.get(entity_type)
+            if previous == fingerprint:
+                continue
+            condition = model.tenant_id == tenant_id
+            if previous is not None and previous[1] is not None:
+                since = datetime.fromisoformat(previous[1])
+                for entity_id, text in await self._load_texts(db, entity_type, condition & (_updated_at(model) >= since)):
+                    index.pending[(entity_type, entity_id)] = text
+            if index.store.count(entity_type) + self._pending_delta(index, entity_type) != fingerprint[0]:
+                # Rows were deleted (or missed) elsewhere: reconcile the ID sets
+                stored_ids = await db.execute(select(model.id).where(condition))
+                current = set(stored_ids.scalars().all())
+                for row in np.flatnonzero(index.store.mask(np.array([TYPE_CODES[entity_type]]))):
+                    _, entity_id = index.store.entity(row)
+                    if entity_id not in current:
+                        index.pending[(entity_type, entity_id)] = None
+                missing = [
+                    entity_id for entity_id in current
+                    if not index.store.contains(entity_type, entity_id) and (entity_type, entity_id) not in index.pending
+                ]
+                if missing:
+                    for entity_id, text in await self._load_texts(db, entity_type, model.id.in_(missing)):
+                        index.pending[(entity_type, entity_id)] = text
+            index.fingerprints[entity_type] = fingerprint
+
+    @staticmethod
+    def _pending_delta(index: TenantSemanticIndex, entity_type: str) -> int:
+        """Net change in stored entities of a type once pending changes are applied."""
+        delta = 0
+        for (pending_type, entity_id), text in index.pending.items():
+            if pending_type != entity_type:
+                continue
+            stored = index.store.contains(entity_type, entity_id)
+            if text is None and stored:
+                delta -= 1
+            elif text is not None and not stored:
+                delta += 1
+        return delta
+
+    async def _apply_pending(self, index: TenantSemanticIndex) -> None:
+        if not index.pending:
+            return
+        pending, index.pending = index.pending, {}
+        upserts = [(key, text) for key, text in pending.items() if text is not None]
+        for (entity_type, entity_id), text in pending.items():
+            if text is None:
+                index.store.remove(entity_type, entity_id)
+        for start in range(0, len(upserts), EMBED_BATCH_SIZE):
+            batch = upserts[start:start + EMBED_BATCH_SIZE]
+            vectors = await self._embed(index.embedder, [text for _, text in batch])
+            for ((entity_type, entity_id), _), vector in zip(batch, vectors):
+                row = index.store.upsert(entity_type, entity_id, vector)
+                if index.ivf is not None:
+                    index.ivf.add(row)
+                if index.ivf_task is not None:
+                    index.rows_during_training.append(row)
+
+    def _maintain_ivf(self, index: TenantSemanticIndex) -> None:
+        """Train or rebuild the IVF index in the background; searches stay exact until it is ready."""
+        if len(index.store) < self.ivf_threshold:
+            index.ivf = None
+            return
+        if index.ivf_task is not None:
+            return
+        if index.ivf is None or index.ivf.needs_retrain(index.store):
+            index.ivf_task = asyncio.create_task(self._train_ivf(index))
+        elif index.ivf.needs_rebuild():
+            index.ivf_task = asyncio.create_task(self._rebuild_ivf(index))
+
+    async def _train_ivf(self, index: TenantSemanticIndex) -> None:
+        try:
+            ivf = await asyncio.to_thread(IVFIndex.train, index.store)
+            ivf.add_many(index.rows_during_training)
+            index.ivf = ivf
+        except Exception as e:
+            logger.error(f"Training semantic IVF index failed: {e}")
+        finally:
+            index.ivf_task = None
+            index.rows_during_training = []
+
+    async def _rebuild_ivf(self, index: TenantSemanticIndex) -> None:
+        try:
+            await asyncio.to_thread(index.ivf.build, index.store)
+        except Exception as e:
+            logger.error(f"Rebuilding semantic IVF index failed: {e}")
+        finally:
+            index.ivf_task = None
+
+    async def ensure_synced(self, db: AsyncSession, tenant_id: UUID) -> TenantSemanticIndex:
+        """Return the tenant's index with all known changes applied."""
+        async with self._locks[tenant_id]:
+            index = self._indexes.get(tenant_id)
+            if index is None:
+                index = await self._open(db, tenant_id)
+                self._indexes[tenant_id] = index
+                index.checked_at = 0.0
+            if time.monotonic() - index.checked_at >= SYNC_INTERVAL:
+                await self._catch_up(db, tenant_id, index)
+                index.checked_at = time.monotonic()
+            await self._apply_pending(index)
+            self._maintain_ivf(index)
+            return index
+
+    # --- Search ---
+
+    async def search(
+        self,
+        db: AsyncSession,
+        tenant_id: UUID,
+        query: str,
+        top_k: int = 10,
+        types: Optional[Sequence[str]] = None,
+        mode: str = "auto",
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> Dict[str, Any]:
+        """
+        Find the entities most similar to a free-text query.
+
+        Args:
+            db: Database session
+            tenant_id: Tenant ID to search in
+            query: Free-text query
+            top_k: Number of results
+            types: Entity types to include (default: all)
+            mode: "exact", "ivf", or "auto" (IVF above IVF_AUTO_THRESHOLD entities);
+                "ivf" falls back to exact while no IVF index is available (below
+                IVF_AUTO_THRESHOLD entities, or while it is being trained)
+            nprobe: IVF lists scanned per query; higher is slower and more accurate
+
+        Returns:
+            Dictionary with the requested mode, the mode actually used, index
+            size and scored results
+
+        Raises:
+            ValueError: If the mode or an entity type is unknown
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode '{mode}'. Available: {', '.join(SEARCH_MODES)}")
+        unknown = set(types or ()) - set(ENTITY_TYPES)
+        if unknown:
+            raise ValueError(f"Unsupported entity types: {', '.join(sorted(unknown))}")
+
+        index = await self.ensure_synced(db, tenant_id)
+        started = time.perf_counter()
+        type_codes = np.array([TYPE_CODES[t] for t in types], dtype=np.int8) if types else None
+        requested_mode = mode
+        ivf = index.ivf
+        if ivf is None:
+            # Small tenant, or the IVF index is still being trained
+            mode = "exact"
+            if requested_mode == "ivf":
+                logger.debug(
+                    f"IVF search requested for tenant {tenant_id} with {len(index.store)} entities "
+                    f"but no IVF index is available; searching exactly"
+                )
+        elif mode == "auto":
+            mode = "ivf"
+
+        vector = (await self._embed(index.embedder, [query]))[0]
+        if mode == "ivf":
+            rows, scores = await asyncio.to_thread(ivf.search, index.store, vector, top_k, nprobe, type_codes)
+        else:
+            rows, scores = await asyncio.to_thread(index.store.search_exact, vector, top_k, type_codes)
+
+        hits = [(index.store.entity(row), float(score)) for row, score in zip(rows, scores) if score > 0]
+        titles = await self._titles(db, tenant_id, [key for key, _ in hits])
+        results = [
+            {"id": entity_id, "type": entity_type, "title": titles[(entity_type, entity_id)], "score": score}
+            for (entity_type, entity_id), score in hits
+            if (entity_type, entity_id) in titles
+        ]
+        return {
+            "query": query,
+            "requested_mode": requested_mode,
+            "mode": mode,
+            "total_indexed": len(index.store),
+            "took_ms": (time.perf_counter() - started) * 1000.0,
+            "results": results,
+        }
+
+    @staticmethod
+    async def _titles(
+        db: AsyncSession, tenant_id: UUID, keys: List[Tuple[str, UUID]]
+    ) -> Dict[Tuple[str, UUID], Optional[str]]:
+        """Titles of result entities; entities deleted since indexing are absent."""
+        by_type: Dict[str, List[UUID]] = defaultdict(list)
+        for entity_type, entity_id in keys:
+            by_type[entity_type].append(entity_id)
+        titles = {}
+        for entity_type, entity_ids in by_type.items():
+            model, title_column, _ = ENTITY_SOURCES[entity_type]
+            result = await db.execute(
+                select(model.id, title_column).where(model.tenant_id == tenant_id, model.id.in_(entity_ids))
+            )
+            for entity_id, title in result.all():
+                titles[(entity_type, entity_id)] = title
+        return titles
+
+    async def flush(self) -> None:
+        """Snapshot all loaded indexes so the next start can skip re-embedding."""
+        for tenant_id, index in list(self._indexes.items()):
+            async with self._locks[tenant_id]:
+                # Fingerprints already cover queued local writes, so they must be in the snapshot
+                await self._apply_pending(index)
+                await self._save(tenant_id, index)
+
+
+# Singleton service instance
+semantic_search_service = SemanticSearchService()
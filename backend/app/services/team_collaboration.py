@@ -0,0 +1,130 @@
+"""
+Team Collaboration Matching
+
+Finds teams working towards the same goals from a sparse team x goal
+incidence matrix M. One product M @ M.T yields the number of shared goals
+for every team pair; Jaccard scores follow from the row sums. Pairs are
+thresholded and limited to the top-k partners per team, so the result grows
+with the number of teams rather than the number of team pairs.
+
+A team works on a goal when it owns a project aligned with that goal.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.goal import Goal
+from app.models.project import Project
+from app.models.team import Team
+
+
+def team_goal_incidence(
+    pairs: Iterable[Tuple[Any, Any]], team_index: Dict[Any, int], goal_index: Dict[Any, int]
+) -> sparse.csr_matrix:
+    """Binary teams x goals matrix from (team ID, goal ID) pairs; unknown IDs are skipped."""
+    indexed = [(team_index[t], goal_index[g]) for t, g in pairs if t in team_index and g in goal_index]
+    shape = (len(team_index), len(goal_index))
+    if not indexed:
+        return sparse.csr_matrix(shape, dtype=np.float64)
+    array = np.asarray(indexed, dtype=np.int64)
+    matrix = sparse.csr_matrix((np.ones(len(indexed)), (array[:, 0], array[:, 1])), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0
+    return matrix
+
+
+async def load_team_goals(
+    db: AsyncSession, tenant_id: UUID
+) -> Tuple[Sequence[Any], Sequence[Any], sparse.csr_matrix]:
+    """
+    Load a tenant's teams, goals and team x goal incidence matrix in three queries.
+
+    Returns:
+        (teams, goals, incidence): rows of (id, name) and (id, title), indexed
+        like the rows and columns of the incidence matrix
+    """
+    teams = (await db.execute(
+        select(Team.id, Team.name).where(Team.tenant_id == tenant_id)
+    )).all()
+    goals = (await db.execute(
+        select(Goal.id, Goal.title).where(Goal.tenant_id == tenant_id)
+    )).all()
+    team_goal_pairs = (await db.execute(
+        select(Project.owning_team_id, Project.goal_id).where(
+            Project.tenant_id == tenant_id,
+            Project.owning_team_id.isnot(None),
+            Project.goal_id.isnot(None),
+        ).distinct()
+    )).all()
+    incidence = team_goal_incidence(
+        team_goal_pairs,
+        {team_id: i for i, (team_id, _) in enumerate(teams)},
+        {goal_id: i for i, (goal_id, _) in enumerate(goals)},
+    )
+    return teams, goals, incidence
+
+
+def collaboration_candidates(
+    incidence: sparse.csr_matrix,
+    min_shared: int = 1,
+    min_jaccard: float = 0.0,
+    top_k: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Score all team pairs by shared goals.
+
+    Args:
+        incidence: Binary teams x goals matrix
+        min_shared: Minimum number of shared goals
+        min_jaccard: Minimum Jaccard similarity of the goal sets
+        top_k: Partners kept per team; a pair is kept if it is in the top-k of either team
+
+    Returns:
+        List of {"team_a", "team_b", "shared", "jaccard", "goals"} with row
+        indices (team_a < team_b) and the shared goal column indices,
+        best pairs first
+    """
+    incidence = sparse.csr_matrix(incidence, dtype=np.float64)
+    sizes = np.asarray(incidence.sum(axis=1)).ravel()
+
+    shared = (incidence @ incidence.T).tocoo()
+    mask = (shared.row != shared.col) & (shared.data >= max(1, min_shared))
+    rows, cols, counts = shared.row[mask], shared.col[mask], shared.data[mask]
+    jaccard = counts / (sizes[rows] + sizes[cols] - counts)
+    mask = jaccard >= min_jaccard
+    rows, cols, counts, jaccard = rows[mask], cols[mask], counts[mask], jaccard[mask]
+    if rows.size == 0:
+        return []
+
+    # Rank partners within each team (both directions are present) and keep the top-k
+    order = np.lexsort((-counts, -jaccard, rows))
+    rows, cols, counts, jaccard = rows[order], cols[order], counts[order], jaccard[order]
+    row_starts = np.searchsorted(rows, rows, side="left")
+    keep = (np.arange(rows.size) - row_starts) < top_k
+    rows, cols, counts, jaccard = rows[keep], cols[keep], counts[keep], jaccard[keep]
+
+    # Collapse (a, b) and (b, a) into one pair
+    low, high = np.minimum(rows, cols), np.maximum(rows, cols)
+    _, first = np.unique(low * incidence.shape[0] + high, return_index=True)
+    first = first[np.lexsort((-counts[first], -jaccard[first]))]
+
+    indptr, indices = incidence.indptr, incidence.indices
+    return [
+        {
+            "team_a": int(low[i]),
+            "team_b": int(high[i]),
+            "shared": int(counts[i]),
+            "jaccard": float(jaccard[i]),
+            "goals": np.intersect1d(
+                indices[indptr[low[i]]:indptr[low[i] + 1]],
+                indices[indptr[high[i]]:indptr[high[i] + 1]],
+                assume_unique=True,
+            ).tolist(),
+        }
+        for i in first
+    ]
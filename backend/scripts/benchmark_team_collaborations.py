@@ -0,0 +1,73 @@
+"""
+Benchmark team collaboration matching on a synthetic tenant.
+
+Compares the sparse team x goal matrix approach used by
+AlignmentRecommendationService against the previous pairwise set comparison.
+The pairwise baseline is timed on a sample of teams and extrapolated, since
+it is quadratic in the number of teams.
+
+Usage:
+    python -m scripts.benchmark_team_collaborations [--teams 5000] [--goals 2000]
+"""
+import argparse
+import random
+import time
+
+from app.services.team_collaboration import collaboration_candidates, team_goal_incidence
+
+
+def generate_team_goals(teams: int, goals: int, max_goals_per_team: int, seed: int):
+    rng = random.Random(seed)
+    return {
+        team: set(rng.sample(range(goals), rng.randint(1, max_goals_per_team)))
+        for team in range(teams)
+    }
+
+
+def pairwise_baseline(team_goals):
+    """The previous implementation: compare the goal sets of every team pair."""
+    pairs = 0
+    teams = list(team_goals)
+    for i, team1 in enumerate(teams):
+        for team2 in teams[i + 1:]:
+            common = team_goals[team1] & team_goals[team2]
+            if common:
+                pairs += 1
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--teams", type=int, default=5000)
+    parser.add_argument("--goals", type=int, default=2000)
+    parser.add_argument("--max-goals-per-team", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--baseline-sample", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    team_goals = generate_team_goals(args.teams, args.goals, args.max_goals_per_team, args.seed)
+    print(f"{args.teams} teams, {args.goals} goals, {sum(map(len, team_goals.values()))} team-goal links")
+
+    start = time.perf_counter()
+    incidence = team_goal_incidence(
+        ((team, goal) for team, goal_set in team_goals.items() for goal in goal_set),
+        {team: team for team in team_goals},
+        {goal: goal for goal in range(args.goals)},
+    )
+    candidates = collaboration_candidates(incidence, top_k=args.top_k)
+    sparse_seconds = time.perf_counter() - start
+    print(f"sparse:   {sparse_seconds:8.3f}s  ({len(candidates)} recommended pairs)")
+
+    sample_size = min(args.baseline_sample, args.teams)
+    sample = {team: team_goals[team] for team in list(team_goals)[:sample_size]}
+    start = time.perf_counter()
+    pairwise_baseline(sample)
+    sample_seconds = time.perf_counter() - start
+    # Pair count scales quadratically with the number of teams
+    estimate = sample_seconds * (args.teams * (args.teams - 1)) / max(1, sample_size * (sample_size - 1))
+    print(f"pairwise: {estimate:8.3f}s  (extrapolated from {sample_size} teams, excluding per-team queries)")
+
+
+if __name__ == "__main__":
+    main()